@@ -45,11 +45,12 @@ This file documents the game's structure and design for developers.
 
 2. MilitaryForce (Dataclass)
    - infantry, chariots, archers, navy
-   - Method: get_total_strength()
+   - Methods: get_total_strength(), get_upkeep()
 
 3. Civilization (Dataclass)
    - name, description, resources, military
-   - relationships (Dict[str, int])
+   - relationships (Dict[str, int]; inside a Game this is a RelationshipView
+     onto the world-level RelationshipMatrix)
    - prestige, technology_level
    - Methods: 
      * get_relationship_status()
@@ -60,14 +61,42 @@ This file documents the game's structure and design for developers.
 4. Game (Class)
    - civilizations (Dict[str, Civilization])
    - player_civ, turn, game_over
-   - Methods:
-     * initialize_civilizations()
+   - relations: RelationshipMatrix (flat int8 N x N, civ_index maps names;
+     tier rows are cached and dropped by every write that touches them)
+   - rng: per-game random.Random (Game(seed=...) replays exactly;
+     Game(prefetch=N) uses PrefetchRandom block draws)
+   - Rule methods (headless, return ActionResult/RaidResult/EventResult/TurnResult):
+     * send_gift(), propose_alliance(), threaten(), request_aid()
+     * establish_trade_route(), trade_resources(), produce_bronze()
+     * recruit(), declare_war(), queue_raid(), invest(), hold_festival()
+     * resolve_raid(), resolve_events(), resolve_random_event(), strike_event()
+     * resolve_turn(), resolve_victory()
+     * ai_turn(), world_status(), simulate()
+     * snapshot(), restore(), fork() (GameSnapshot: flat state buffer)
+     * reset(seed): the world Game(seed) builds, rewritten in place from a
+       cached snapshot (GamePool hands out and recycles reset games)
+   - journal: optional Journal; @journaled rule methods report each call
+   - wars: set of civ_index pairs at war; pending_raids: raids queued
+     this turn; both fought at once in phase_battles (lbac_battle)
+   - market_orders: limit Orders posted this turn (place_order), cleared
+     in phase_market by one uniform-price call auction per good (lbac_market)
+   - profiler: optional Profiler; resolve_turn then runs TURN_PHASES
+     (phase_production ... phase_victory) under per-phase timers
+   - Front-end methods (I/O on top of the rules, through self.renderer):
      * choose_civilization()
      * display_status()
      * main_menu(), diplomacy_menu(), trade_menu(), military_menu()
      * conduct_raid(), random_event()
-     * ai_turn(), end_turn()
-     * check_victory(), play()
+     * end_turn(), check_victory(), play()
+   - params: GameParams (frozen; DEFAULT_PARAMS unless given to Game())
+   - world_map: WorldMap (lbac_map; shared eastern_mediterranean() by
+     default). route_cost(), rivals_within(), raid_targets() and
+     trade_partners() limit targets to params.raid_range/trade_range
+   - renderer: Renderer (write/ask/flush/pause)
+     * TerminalRenderer (default): one write per screen
+     * JSONRenderer: one JSON object per screen
+     * BufferedTextRenderer: in-memory output, scripted input
+     * NullRenderer: no output; display-only screens are skipped
 """
 
 # ============================================================================
@@ -103,7 +132,7 @@ Game Loop:
 │    c. AI Turns                                   │
 │       - AI production                            │
 │       - AI actions                               │
-│    d. Random Events (30% chance)                │
+│    d. Random Events (30% per civ)               │
 │       - Drought, Earthquake, Sea Peoples        │
 │       - Plague, Good Harvest, Trade             │
 │       - Diplomatic Incidents                     │
@@ -220,7 +249,15 @@ Trade Exchanges:
 # ============================================================================
 
 """
-Random Events (30% chance per turn):
+Random Events (30% chance per civilization per turn):
+
+Events are rows of EVENT_TABLE (EventSpec: probability, effect ranges,
+optional defence and message). Game.resolve_events rolls once for every
+living civilization in a single batched draw, picks the row from the
+cumulative EVENT_BOUNDS, and only then draws the effect amounts for the
+civilizations that were hit. TurnResult.events lists every hit;
+TurnResult.event is the player's. BatchWorld.apply_events applies the same
+table to whole batches of games.
 
 1. DROUGHT
    - Effect: -30 to -60 food
@@ -266,13 +303,16 @@ Simple AI (per turn):
 3. Consume resources (same as player)
 4. 30% chance: Recruit infantry (if affordable)
 
-Future AI Improvements:
-- Diplomatic actions (gifts, alliances)
-- Strategic raiding of weak neighbors
-- Resource trading
-- Technology investment
-- Prestige building
-- Coalition formation
+AI Policies:
+- Game.ai_policy (default) and Game.ai_policies[name] (per civ) choose
+  the actions after production/consumption (AIPolicy.act)
+- RecruitPolicy: the simple AI above (default)
+- PassivePolicy: does nothing
+- TraderPolicy: RecruitPolicy plus market orders (sells surplus food,
+  buys shortfalls, evens out tin and copper)
+- MCTSPolicy (lbac_mcts.py): UCT search over the player's actions
+  (gifts, alliances, trade, raids, war, recruitment, investments) on a
+  forked copy of the game, with a per-turn time budget
 """
 
 # ============================================================================
@@ -325,6 +365,16 @@ Design Goals:
 - Resource scarcity creates meaningful choices
 - Random events add replayability
 - Historical flavor through events and factions
+
+Tunables (GameParams; override() takes "name" or "unit_costs.<unit>" keys):
+- gift_cost, gift_gain           Send Gift price and relationship gain range
+- unit_costs, trade_offers       Recruitment prices, fixed trade rates
+- event_severity                 Scales every EVENT_TABLE effect range
+- food_divisor, upkeep_divisor   consume_resources population/military divisors
+- victory_turn, prestige_victory When and how the player can win
+
+lbac_sweep.py races grids or random samples of these against each other,
+dropping a configuration once a paired test says it trails the leader.
 """
 
 # ============================================================================
@@ -334,7 +384,25 @@ Design Goals:
 """
 Repository Structure:
 LBAC/
-├── lbac_game.py          # Main game file (all code)
+├── lbac_game.py          # Main game file (rules + interactive front-end)
+├── lbac_batch.py         # BatchWorld: many games as column arrays
+├── lbac_runner.py        # Parallel Monte Carlo runner (CLI + API)
+├── lbac_bench.py         # Benchmark suite with JSON baselines
+├── lbac_mcts.py          # Monte Carlo tree search AI policy
+├── lbac_journal.py       # Append-only action journal and replay
+├── lbac_server.py        # asyncio multi-session server (JSON lines protocol)
+├── lbac_loadgen.py       # Load generator for the server
+├── lbac_profile.py       # Per-phase turn profiler
+├── lbac_telemetry.py     # Columnar per-turn telemetry (.npy chunks)
+├── lbac_sweep.py         # Parallel balance-parameter sweeps with early stopping
+├── lbac_battle.py        # Simultaneous raid and war resolution
+├── lbac_map.py           # Regions, spatial index and cached route costs
+├── lbac_slots.py         # Shared dataclass options (SLOTS)
+├── lbac_market.py        # Batch market clearing (call auction per good)
+├── lbac_actions.py       # Typed actions, validation and apply_batch
+├── lbac_env.py           # Vectorized RL environment (shared-memory workers)
+├── lbac_legal.py         # Legal-action masks for every civilization
+├── lbac_lockstep.py      # Lockstep LAN multiplayer (action relay, hashes, deltas)
 ├── test_game.py          # Unit tests for mechanics
 ├── demo.py               # Interactive demo script
 ├── README.md             # Full documentation
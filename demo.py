@@ -34,6 +34,7 @@ def demo_game():
     # Show initial status
     game.display_status()
     game.display_relationships()
+    game.renderer.flush()
     
     input("\nPress Enter to continue...")
     
@@ -162,6 +163,7 @@ def demo_game():
     
     game.display_status()
     game.display_relationships()
+    game.renderer.flush()
     
     print("\n" + "="*70)
     print("DEMO COMPLETE")
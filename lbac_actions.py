@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Typed actions for LBAC
+
+Every rule method a civilization can call on its turn has an Action class
+here (SendGift, Recruit, Raid, ...). An action names the acting
+civilization (None for the player) and the method's arguments, checks them
+against the game with validate(), and calls the rule method with apply().
+
+apply_batch(game, actions) applies a whole turn's orders, for any number of
+civilizations, in one call: each action is validated and applied in list
+order, and invalid actions come back as failed ActionResults instead of
+raising. play_turn() then resolves the end of turn.
+
+Actions round-trip through plain dicts ({"action": "send_gift", "target":
+..., "civ": ...}), which is the request format of lbac_server.
+"""
+
+from dataclasses import dataclass, fields
+from typing import ClassVar, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+from lbac_game import (
+    Game, Civilization, ActionResult, RaidResult, TurnResult, MARKET_GOODS, SLOTS
+)
+
+
+INVEST_SECTORS = ("agriculture", "technology")
+
+
+class Action:
+    """Base class of the typed actions
+
+    Subclasses are slotted dataclasses whose fields are the rule method's
+    arguments, in order, followed by civ. name is the rule method and menu
+    the game menu it belongs to. (Slotted dataclasses are rebuilt classes,
+    so overrides call their base explicitly rather than through super().)
+    """
+    __slots__ = ()
+    name: ClassVar[str] = ""
+    menu: ClassVar[str] = ""
+
+    @classmethod
+    def params(cls) -> Tuple[str, ...]:
+        """Argument names of the rule method (every field but civ)"""
+        names = cls.__dict__.get("_params")
+        if names is None:
+            names = tuple(f.name for f in fields(cls) if f.name != "civ")
+            cls._params = names
+        return names
+
+    def args(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.params())
+
+    def actor(self, game: Game) -> Optional[Civilization]:
+        """The acting civilization"""
+        civ = self.civ
+        return game.player_civ if civ is None else game.civilizations.get(civ)
+
+    def validate(self, game: Game) -> Optional[str]:
+        """Why the action cannot be taken, or None if it is well formed
+
+        Checks the actor and the arguments; what the action costs is left to
+        the rule method, which reports it in the returned result.
+        """
+        civ = self.actor(game)
+        if civ is None:
+            return "Unknown civilization!"
+        if not civ.is_alive:
+            return f"{civ.name} has collapsed!"
+        if game.game_over:
+            return "Game is over!"
+        return None
+
+    def apply(self, game: Game) -> Union[ActionResult, RaidResult]:
+        """Call the rule method (no validation)"""
+        return getattr(game, self.name)(*self.args(), civ=self.actor(game))
+
+    def to_dict(self) -> Dict[str, object]:
+        """Request form of the action"""
+        body: Dict[str, object] = {"action": self.name}
+        for name in self.params():
+            body[name] = getattr(self, name)
+        if self.civ is not None:
+            body["civ"] = self.civ
+        return body
+
+
+class TargetedAction(Action):
+    """An action aimed at another living civilization"""
+    __slots__ = ()
+
+    def validate(self, game: Game) -> Optional[str]:
+        error = Action.validate(self, game)
+        if error is None:
+            target = game.civilizations.get(self.target)
+            if target is None or target is self.actor(game) or not target.is_alive:
+                return "Invalid target!"
+        return error
+
+
+@dataclass(frozen=True, **SLOTS)
+class SendGift(TargetedAction):
+    target: str
+    civ: Optional[str] = None
+    name: ClassVar[str] = "send_gift"
+    menu: ClassVar[str] = "diplomacy"
+
+
+@dataclass(frozen=True, **SLOTS)
+class ProposeAlliance(TargetedAction):
+    target: str
+    civ: Optional[str] = None
+    name: ClassVar[str] = "propose_alliance"
+    menu: ClassVar[str] = "diplomacy"
+
+
+@dataclass(frozen=True, **SLOTS)
+class Threaten(TargetedAction):
+    target: str
+    civ: Optional[str] = None
+    name: ClassVar[str] = "threaten"
+    menu: ClassVar[str] = "diplomacy"
+
+
+@dataclass(frozen=True, **SLOTS)
+class RequestAid(TargetedAction):
+    target: str
+    civ: Optional[str] = None
+    name: ClassVar[str] = "request_aid"
+    menu: ClassVar[str] = "diplomacy"
+
+
+@dataclass(frozen=True, **SLOTS)
+class EstablishTradeRoute(TargetedAction):
+    target: str
+    civ: Optional[str] = None
+    name: ClassVar[str] = "establish_trade_route"
+    menu: ClassVar[str] = "trade"
+
+    def validate(self, game: Game) -> Optional[str]:
+        error = TargetedAction.validate(self, game)
+        if error is None and self.target not in game.trade_partners(self.actor(game)):
+            return f"{self.target} is out of reach!"
+        return error
+
+
+@dataclass(frozen=True, **SLOTS)
+class TradeResources(Action):
+    offer: int
+    civ: Optional[str] = None
+    name: ClassVar[str] = "trade_resources"
+    menu: ClassVar[str] = "trade"
+
+    def validate(self, game: Game) -> Optional[str]:
+        error = Action.validate(self, game)
+        if error is None and not (isinstance(self.offer, int) and
+                                  0 <= self.offer < len(game.params.trade_offers)):
+            return "Invalid offer!"
+        return error
+
+
+@dataclass(frozen=True, **SLOTS)
+class ProduceBronze(Action):
+    civ: Optional[str] = None
+    name: ClassVar[str] = "produce_bronze"
+    menu: ClassVar[str] = "trade"
+
+
+@dataclass(frozen=True, **SLOTS)
+class PlaceOrder(Action):
+    good: str
+    side: str
+    lots: int
+    price: int
+    civ: Optional[str] = None
+    name: ClassVar[str] = "place_order"
+    menu: ClassVar[str] = "trade"
+
+    def validate(self, game: Game) -> Optional[str]:
+        error = Action.validate(self, game)
+        if error is None and (self.good not in MARKET_GOODS or self.side not in ("buy", "sell")
+                              or not isinstance(self.lots, int) or self.lots <= 0
+                              or not isinstance(self.price, int) or self.price <= 0):
+            return "Invalid order!"
+        return error
+
+
+@dataclass(frozen=True, **SLOTS)
+class Recruit(Action):
+    unit: str
+    amount: int
+    civ: Optional[str] = None
+    name: ClassVar[str] = "recruit"
+    menu: ClassVar[str] = "military"
+
+    def validate(self, game: Game) -> Optional[str]:
+        error = Action.validate(self, game)
+        if error is None and (self.unit not in game.params.unit_costs or
+                              not isinstance(self.amount, int) or self.amount <= 0):
+            return "Invalid recruitment order!"
+        return error
+
+
+@dataclass(frozen=True, **SLOTS)
+class Raid(TargetedAction):
+    """An immediate raid (Game.resolve_raid), like the military menu's"""
+    target: str
+    civ: Optional[str] = None
+    name: ClassVar[str] = "resolve_raid"
+    menu: ClassVar[str] = "military"
+
+    def validate(self, game: Game) -> Optional[str]:
+        error = TargetedAction.validate(self, game)
+        if error is None and self.target not in game.raid_targets(self.actor(game)):
+            return f"{self.target} is out of reach!"
+        return error
+
+
+@dataclass(frozen=True, **SLOTS)
+class QueueRaid(Raid):
+    """A raid fought with every other battle at the end of the turn"""
+    name: ClassVar[str] = "queue_raid"
+
+
+@dataclass(frozen=True, **SLOTS)
+class DeclareWar(TargetedAction):
+    target: str
+    civ: Optional[str] = None
+    name: ClassVar[str] = "declare_war"
+    menu: ClassVar[str] = "military"
+
+
+@dataclass(frozen=True, **SLOTS)
+class Invest(Action):
+    sector: str
+    civ: Optional[str] = None
+    name: ClassVar[str] = "invest"
+    menu: ClassVar[str] = "internal"
+
+    def validate(self, game: Game) -> Optional[str]:
+        error = Action.validate(self, game)
+        if error is None and self.sector not in INVEST_SECTORS:
+            return "Invalid sector!"
+        return error
+
+
+@dataclass(frozen=True, **SLOTS)
+class HoldFestival(Action):
+    civ: Optional[str] = None
+    name: ClassVar[str] = "hold_festival"
+    menu: ClassVar[str] = "internal"
+
+
+# Rule method name -> action class
+ACTION_TYPES: Dict[str, Type[Action]] = {cls.name: cls for cls in (
+    SendGift, ProposeAlliance, Threaten, RequestAid,
+    EstablishTradeRoute, TradeResources, ProduceBronze, PlaceOrder,
+    Recruit, Raid, QueueRaid, DeclareWar,
+    Invest, HoldFestival,
+)}
+
+
+def action_from_dict(body: Dict[str, object]) -> Action:
+    """Build an action from its request form; ValueError if malformed"""
+    cls = ACTION_TYPES.get(body.get("action"))
+    if cls is None:
+        raise ValueError(f"Unknown action {body.get('action')!r}")
+    try:
+        args = [body[name] for name in cls.params()]
+    except KeyError as e:
+        raise ValueError(f"{cls.name} needs {e.args[0]!r}") from None
+    return cls(*args, civ=body.get("civ"))
+
+
+def apply_batch(game: Game, actions: Sequence[Action]) -> List[Union[ActionResult, RaidResult]]:
+    """Validate and apply actions in order; one result per action
+
+    Actions that fail validation are skipped and reported as failed
+    ActionResults, so one bad order never stops the rest of the batch.
+    """
+    results: List[Union[ActionResult, RaidResult]] = []
+    append = results.append
+    for action in actions:
+        error = action.validate(game)
+        append(ActionResult(False, error) if error is not None else action.apply(game))
+    return results
+
+
+def play_turn(game: Game, actions: Sequence[Action]
+              ) -> Tuple[List[Union[ActionResult, RaidResult]], TurnResult]:
+    """apply_batch followed by Game.resolve_turn"""
+    results = apply_batch(game, actions)
+    return results, game.resolve_turn()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Batch simulation of many LBAC games at once.
+
+BatchWorld stores N games x M civilizations as struct-of-arrays columns
+(one contiguous array per Resources/MilitaryForce/Civilization field) and
+applies the end-of-turn rules to every civilization of every game in whole
+column passes, instead of mutating one dataclass field at a time.
+
+The columns are stdlib ``array.array('q')`` buffers so the game keeps its
+no-dependency promise; each column is laid out game-major, so civilization
+``m`` of game ``g`` lives at index ``g * num_civs + m``. Column rules are
+chains of ``map`` over ``operator`` functions (masked by multiplying with a
+0/1 mask), and masks are combined by big-integer AND, so the per-civilization
+arithmetic runs in C rather than in interpreted loops.
+
+Random draws are taken from each game's own generator in exactly the order
+the scalar Game.resolve_turn takes them, so a BatchWorld built from the same
+seeds reproduces the scalar results turn for turn. Random events come from
+the same event table; relationship effects are drawn (to keep the streams in
+step) but not stored, since the batch holds no relationship matrix.
+"""
+
+from array import array
+from bisect import bisect_right
+from itertools import compress, repeat
+from operator import add, floordiv, le, lt, mul, sub
+from random import Random
+from typing import List, Optional, Sequence, Tuple
+
+from lbac_game import (
+    Game, GameParams, DEFAULT_PARAMS, RESOURCE_FIELDS, MILITARY_FIELDS, draw_event_effects,
+    event_bounds
+)
+
+
+CIV_FIELDS = ("prestige", "technology_level")
+FIELDS = RESOURCE_FIELDS + MILITARY_FIELDS + CIV_FIELDS
+
+# bytes.translate table turning a 0/1 mask into its complement
+_FLIP = bytes([1, 0]) + bytes(254)
+
+
+def _and(*masks: bytes) -> bytearray:
+    """Cell-wise AND of equal-length 0/1 byte strings (see lbac_legal._and)"""
+    result = int.from_bytes(masks[0], "little")
+    for mask in masks[1:]:
+        result &= int.from_bytes(mask, "little")
+    return bytearray(result.to_bytes(len(masks[0]), "little"))
+
+
+def _indices(mask: bytes) -> List[int]:
+    """Positions of the 1 entries of a sparse 0/1 mask"""
+    found = []
+    i = mask.find(1)
+    while i >= 0:
+        found.append(i)
+        i = mask.find(1, i + 1)
+    return found
+
+
+def _masked(values, mask: bytearray):
+    """values with unmasked entries zeroed (values itself when every entry is masked)"""
+    return values if 0 not in mask else map(mul, values, mask)
+
+
+class BatchWorld:
+    """N independent games of M civilizations stored as column arrays
+
+    All games share one set of balance parameters (default: DEFAULT_PARAMS).
+    """
+
+    def __init__(self, num_games: int, num_civs: int, params: Optional[GameParams] = None):
+        self.num_games = num_games
+        self.num_civs = num_civs
+        self.params = params or DEFAULT_PARAMS
+        self.event_table = self.params.event_table()
+        self.event_bounds = event_bounds(self.event_table)
+        size = num_games * num_civs
+        for name in FIELDS:
+            setattr(self, name, array("q", bytes(8 * size)))
+        self.is_alive = bytearray(b"\x01" * size)
+        self.is_player = bytearray(size)
+        self.turn = array("q", [1] * num_games)
+        self.game_over = bytearray(num_games)
+        self.civ_names: List[str] = []
+        self.rngs: List = []
+
+    @classmethod
+    def from_games(cls, games: Sequence[Game]) -> "BatchWorld":
+        """Build a batch from Game instances that share the same civilizations
+
+        The batch draws from the games' own generators (world.rngs) and uses
+        the first game's parameters.
+        """
+        names = list(games[0].civilizations)
+        world = cls(len(games), len(names), games[0].params)
+        world.civ_names = names
+        world.rngs = [game.rng for game in games]
+        for g, game in enumerate(games):
+            world.load_game(g, game)
+        return world
+
+    def index(self, game: int, civ: int) -> int:
+        """Flat column index of a civilization"""
+        return game * self.num_civs + civ
+
+    def load_game(self, g: int, game: Game):
+        """Copy the state of a Game into slot g"""
+        base = g * self.num_civs
+        for m, civ in enumerate(game.civilizations.values()):
+            i = base + m
+            for name in RESOURCE_FIELDS:
+                getattr(self, name)[i] = getattr(civ.resources, name)
+            for name in MILITARY_FIELDS:
+                getattr(self, name)[i] = getattr(civ.military, name)
+            for name in CIV_FIELDS:
+                getattr(self, name)[i] = getattr(civ, name)
+            self.is_alive[i] = civ.is_alive
+            self.is_player[i] = civ.is_player
+        self.turn[g] = game.turn
+        self.game_over[g] = game.game_over
+
+    def store_game(self, g: int, game: Game):
+        """Copy slot g back into a Game instance"""
+        base = g * self.num_civs
+        for m, civ in enumerate(game.civilizations.values()):
+            i = base + m
+            for name in RESOURCE_FIELDS:
+                setattr(civ.resources, name, getattr(self, name)[i])
+            for name in MILITARY_FIELDS:
+                setattr(civ.military, name, getattr(self, name)[i])
+            for name in CIV_FIELDS:
+                setattr(civ, name, getattr(self, name)[i])
+            civ.is_alive = bool(self.is_alive[i])
+        game.turn = self.turn[g]
+        game.game_over = bool(self.game_over[g])
+
+    def active_mask(self, players: Optional[bool] = None) -> bytearray:
+        """1 for each living civilization of a running game
+
+        players=True keeps only player civilizations, False only AI ones.
+        """
+        m = self.num_civs
+        ones, zeros = b"\x01" * m, bytes(m)
+        playing = b"".join(zeros if over else ones for over in self.game_over)
+        if players is None:
+            return _and(self.is_alive, playing)
+        if players:
+            return _and(self.is_alive, playing, self.is_player)
+        return _and(self.is_alive, playing, self.is_player.translate(_FLIP))
+
+    # ------------------------------------------------------------------
+    # Column rules
+    # ------------------------------------------------------------------
+
+    def produce_bronze(self, mask: Optional[bytearray] = None) -> array:
+        """Turn min(tin, copper) into bronze for every masked civilization"""
+        if mask is None:
+            mask = self.active_mask()
+        made = list(_masked(map(min, self.tin, self.copper), mask))
+        self.tin[:] = array("q", map(sub, self.tin, made))
+        self.copper[:] = array("q", map(sub, self.copper, made))
+        self.bronze[:] = array("q", map(add, self.bronze, made))
+        return array("q", made)
+
+    def consume_resources(self, mask: Optional[bytearray] = None) -> array:
+        """Population and military upkeep; returns population lost to starvation"""
+        if mask is None:
+            mask = self.active_mask()
+        fd, ud = self.params.food_divisor, self.params.upkeep_divisor
+        # Intermediate columns that are read more than once are kept as lists,
+        # which (unlike arrays) hand out their ints without boxing them again
+        population = self.population.tolist()
+        # MilitaryForce.get_upkeep: infantry + archers + 2 * (chariots + navy)
+        units = map(add, map(add, self.infantry, self.archers),
+                    map(mul, map(add, self.chariots, self.navy), repeat(2)))
+        upkeep = map(add, map(floordiv, population, repeat(fd)),
+                     map(floordiv, units, repeat(ud)))
+        food = list(map(sub, self.food, _masked(upkeep, mask)))
+        # Starving civilizations (food < 0) lose min(-10 * food, population // 4)
+        # and their food resets to 0; short is min(food, 0) for masked civs
+        short = list(_masked(map(min, food, repeat(0)), mask))
+        lost = map(min, map(mul, short, repeat(-10)), map(floordiv, population, repeat(4)))
+        if min(population, default=0) < 0:
+            # min(0, population // 4) is only 0 for a non-negative population
+            lost = map(mul, lost, map(lt, short, repeat(0)))
+        lost = list(lost)
+        self.population[:] = array("q", map(sub, population, lost))
+        self.food[:] = array("q", map(sub, food, short))
+        return array("q", lost)
+
+    def player_production(self, mask: Optional[bytearray] = None):
+        """Base production for player civilizations (Game.resolve_turn)"""
+        if mask is None:
+            mask = self.active_mask(players=True)
+        food = map(add, map(floordiv, self.technology_level, repeat(10)), repeat(30))
+        gold = map(add, map(floordiv, self.prestige, repeat(10)), repeat(15))
+        self.food[:] = array("q", map(add, self.food, map(mul, food, mask)))
+        self.gold[:] = array("q", map(add, self.gold, map(mul, gold, mask)))
+        ten = array("q", map(mul, mask, repeat(10)))
+        self.tin[:] = array("q", map(add, self.tin, ten))
+        self.copper[:] = array("q", map(add, self.copper, ten))
+
+    def add_ai_production(self, mask: bytearray, rngs: Sequence) -> List[int]:
+        """Add the random food, gold, tin and copper of masked AI civs
+
+        Returns the indices of the civilizations whose recruit roll came up.
+
+        Draws happen game by game, civ by civ, in the same order as the scalar
+        Game.ai_turn so that per-game random streams stay in sync. The draws
+        are the one per-civilization loop of the AI turn, so they are added
+        straight into the columns rather than gathered and summed afterwards.
+        Random.randint(a, b) is documented as randrange(a, b + 1), and calling
+        that directly saves a call per draw; generators that override randint
+        (PrefetchRandom) keep their own.
+        """
+        recruits = []
+        food, gold, tin, copper = self.food, self.gold, self.tin, self.copper
+        m = self.num_civs
+        for g in range(self.num_games):
+            base = g * m
+            civs = list(compress(range(base, base + m), mask[base:base + m]))
+            if not civs:
+                continue
+            rng = rngs[g]
+            if type(rng).randint is Random.randint:
+                draw, top = rng.randrange, 1
+            else:
+                draw, top = rng.randint, 0
+            rand = rng.random
+            for i in civs:
+                food[i] += draw(20, 40 + top)
+                gold[i] += draw(10, 20 + top)
+                tin[i] += draw(5, 15 + top)
+                copper[i] += draw(5, 15 + top)
+                if rand() < 0.3:
+                    recruits.append(i)
+        return recruits
+
+    def ai_turn(self, rngs: Optional[Sequence] = None,
+                mask: Optional[bytearray] = None):
+        """Game.ai_turn for every masked AI civilization at once"""
+        if mask is None:
+            mask = self.active_mask(players=False)
+        if rngs is None:
+            rngs = self.rngs
+        self.produce_bronze(mask)
+        recruits = self.add_ai_production(mask, rngs)
+        self.consume_resources(mask)
+
+        # Few civilizations recruit in a turn, so only those are visited
+        cost_b, cost_g = self.params.unit_costs["infantry"]
+        bronze, gold, infantry = self.bronze, self.gold, self.infantry
+        for i in recruits:
+            if bronze[i] >= cost_b and gold[i] >= cost_g:
+                bronze[i] -= cost_b
+                gold[i] -= cost_g
+                infantry[i] += 1
+
+    def check_defeats(self) -> List[int]:
+        """Mark civilizations with no population as collapsed; returns their indices"""
+        m = self.num_civs
+        collapsed = _indices(_and(self.active_mask(), bytes(map(le, self.population, repeat(0)))))
+        for i in collapsed:
+            self.is_alive[i] = 0
+            if self.is_player[i]:
+                self.game_over[i // m] = 1
+        return collapsed
+
+    def check_victory(self):
+        """End player games won by survival or prestige (Game.resolve_victory)"""
+        m = self.num_civs
+        victory_turn, prestige_victory = self.params.victory_turn, self.params.prestige_victory
+        for g in range(self.num_games):
+            if self.game_over[g] or self.turn[g] < victory_turn:
+                continue
+            base = g * m
+            civs = range(base, base + m)
+            player = next((i for i in civs if self.is_player[i]), None)
+            if player is None:
+                continue
+            alive_count = sum(self.is_alive[i] for i in civs)
+            if (alive_count == 1 and self.is_alive[player]) or self.prestige[player] >= prestige_victory:
+                self.game_over[g] = 1
+
+    def apply_events(self, games: Sequence[int],
+                     rngs: Optional[Sequence] = None) -> List[Tuple[int, int]]:
+        """Game.resolve_events for the given games; returns (flat index, table row) hits
+        
+        Each game takes one batched roll for all its living civilizations,
+        then effect draws for the civilizations that were hit.
+        """
+        if rngs is None:
+            rngs = self.rngs
+        m = self.num_civs
+        table, bounds = self.event_table, self.event_bounds
+        limit = bounds[-1]
+        hits = []
+        for g in games:
+            rng = rngs[g]
+            rand = rng.random
+            base = g * m
+            alive = list(compress(range(base, base + m), self.is_alive[base:base + m]))
+            rolls = [rand() for _ in alive]
+            for i, roll in zip(alive, rolls):
+                if roll >= limit:
+                    continue
+                row = bisect_right(bounds, roll)
+                spec = table[row]
+                defended = (spec.defended_by is not None and
+                            getattr(self, spec.defended_by[0])[i] >= spec.defended_by[1])
+                values, _ = draw_event_effects(rng, spec, defended, i - base, m)
+                for name, change in values.items():
+                    if name == "relationship":
+                        continue
+                    column = getattr(self, name)
+                    if name in MILITARY_FIELDS:
+                        column[i] = max(0, column[i] + change)
+                    else:
+                        column[i] += change
+                hits.append((i, row))
+        return hits
+    
+    def end_turn(self, rngs: Optional[Sequence] = None) -> List[int]:
+        """Game.resolve_turn for every running game
+
+        Returns the flat indices of civilizations that collapsed this turn.
+        """
+        running = [g for g in range(self.num_games) if not self.game_over[g]]
+        players = self.active_mask(players=True)
+        ais = self.active_mask(players=False)
+
+        if 1 in players:
+            self.player_production(players)
+            self.produce_bronze(players)
+            self.consume_resources(players)
+        self.ai_turn(rngs, ais)
+        collapsed = self.check_defeats()
+        self.apply_events(running, rngs)
+        self.check_victory()
+
+        for g in running:
+            self.turn[g] += 1
+        return collapsed
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Simultaneous battle resolution for LBAC
+
+All of a turn's fighting (raids queued with Game.queue_raid, plus one
+engagement for every pair of civilizations at war) is resolved at once in
+Game.phase_battles. Every battle is fought with the armies as they stood at
+the start of the phase, so the order raids were queued in changes nothing
+but the order of the random draws; losses, loot, prestige and relationship
+changes from all battles are summed per civilization (per matrix cell) and
+applied in one pass, with unit counts floored at 0 and relationships
+clamped once.
+
+A single raid reproduces Game.resolve_raid exactly: the same random draws
+in the same order and the same changes to both civilizations.
+
+Only the civilizations that fight are gathered into the per-battle columns,
+so a quiet turn costs nothing and a turn of many wars costs one pass over
+the combatants rather than a scan of the whole relationship matrix.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+from lbac_game import Game, RaidResult, EngagementResult, MILITARY_FIELDS
+
+
+# Strength per unit, in MILITARY_FIELDS order (MilitaryForce.get_total_strength)
+UNIT_STRENGTH = (1, 5, 2, 3)
+
+
+def _army(military) -> List[int]:
+    return [getattr(military, name) for name in MILITARY_FIELDS]
+
+
+def _strength(units: Sequence[int]) -> int:
+    return sum(count * weight for count, weight in zip(units, UNIT_STRENGTH))
+
+
+def resolve_battles(game: Game, raids: Sequence[Tuple[int, int]],
+                    wars: Sequence[Tuple[int, int]]
+                    ) -> Tuple[List[RaidResult], List[EngagementResult]]:
+    """Resolve raids and war engagements (civ_index pairs) simultaneously
+
+    Raids draw from game.rng in the order given; engagements are
+    deterministic. Raids whose attacker or target is no longer alive are
+    dropped.
+    """
+    civs = list(game.civilizations.values())
+    rng = game.rng
+    n = len(civs)
+
+    involved = sorted({k for pair in raids for k in pair} | {k for pair in wars for k in pair})
+    armies: Dict[int, List[int]] = {k: _army(civs[k].military) for k in involved}
+    strength = {k: _strength(units) for k, units in armies.items()}
+
+    unit_losses: Dict[int, List[int]] = {k: [0, 0, 0, 0] for k in involved}
+    gold: Dict[int, int] = dict.fromkeys(involved, 0)
+    food: Dict[int, int] = dict.fromkeys(involved, 0)
+    prestige: Dict[int, int] = dict.fromkeys(involved, 0)
+    relations: Dict[int, int] = {}
+
+    def relate(i: int, j: int, change: int):
+        k = i * n + j
+        relations[k] = relations.get(k, 0) + change
+
+    raid_results = []
+    for a, t in raids:
+        if not (civs[a].is_alive and civs[t].is_alive):
+            continue
+        result = RaidResult(civs[a].name, civs[t].name, strength[a], strength[t] // 2,
+                            strength[a] > strength[t] // 2)
+        if result.victory:
+            result.loot_gold = rng.randint(20, 50)
+            result.loot_food = rng.randint(10, 30)
+            result.attacker_losses = rng.randint(5, 15)
+            result.defender_losses = rng.randint(10, 25)
+            gold[a] += result.loot_gold
+            food[a] += result.loot_food
+            relate(a, t, -30)
+            relate(t, a, -30)
+            prestige[a] += 5
+        else:
+            result.attacker_losses = rng.randint(15, 30)
+            result.defender_losses = rng.randint(5, 10)
+            relate(a, t, -20)
+            relate(t, a, -10)
+            prestige[a] -= 5
+        unit_losses[a][0] += result.attacker_losses
+        unit_losses[t][0] += result.defender_losses
+        raid_results.append(result)
+
+    engagements = []
+    for a, b in wars:
+        sa, sb = strength[a], strength[b]
+        if sa == sb:
+            winner, rate_a, rate_b = None, 20, 20
+        elif sa > sb:
+            winner, rate_a, rate_b = a, 20, 10
+            prestige[a] += 2
+            prestige[b] -= 2
+        else:
+            winner, rate_a, rate_b = b, 10, 20
+            prestige[b] += 2
+            prestige[a] -= 2
+        lost_a = [count // rate_a for count in armies[a]]
+        lost_b = [count // rate_b for count in armies[b]]
+        for k, (la, lb) in enumerate(zip(lost_a, lost_b)):
+            unit_losses[a][k] += la
+            unit_losses[b][k] += lb
+        engagements.append(EngagementResult(
+            civs[a].name, civs[b].name, sa, sb,
+            civs[winner].name if winner is not None else None,
+            dict(zip(MILITARY_FIELDS, lost_a)), dict(zip(MILITARY_FIELDS, lost_b))))
+
+    for k in involved:
+        civ = civs[k]
+        military = civ.military
+        for name, lost in zip(MILITARY_FIELDS, unit_losses[k]):
+            if lost:
+                setattr(military, name, max(0, getattr(military, name) - lost))
+        civ.resources.gold += gold[k]
+        civ.resources.food += food[k]
+        civ.prestige += prestige[k]
+    if relations:
+        game.relations.adjust_cells(relations)
+    return raid_results, engagements
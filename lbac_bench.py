@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the LBAC turn pipeline
+
+Times the hot paths in isolation (Game.end_turn's headless resolve_turn,
+Game.ai_turn, Civilization.consume_resources, Resources.can_afford,
+Civilization.get_relationship_status, map neighbour and route queries,
+legal-action masks) plus a full 50-turn game, for worlds of several sizes, and reports operations
+per second and memory per civilization. The BatchWorld engine is timed against
+scalar games playing the same turns, and headless games are timed with and
+without telemetry recording.
+
+Results can be saved as a JSON baseline, and a later run compared against
+it fails (exit status 1) when any benchmark regresses past a threshold. A run
+also fails when a performance claim does not hold (see check_claims), such as
+the batch engine being faster than scalar games. Telemetry overhead past its
+budget (see check_budgets) is reported but does not fail the run.
+
+Usage:
+    python3 lbac_bench.py --civs 6 100 10000 --save baseline.json
+    python3 lbac_bench.py --compare baseline.json --threshold 0.15
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional
+
+from lbac_batch import BatchWorld
+from lbac_game import Game, Civilization, Resources
+from lbac_legal import legal_mask
+from lbac_map import generate_map
+from lbac_telemetry import TelemetryRecorder
+
+
+DEFAULT_SIZES = (6, 100, 10000)
+
+# Largest world whose legal-action masks (8 bytes per pair of civilizations) are benchmarked
+MASK_MAX_CIVS = 1000
+
+# Games stepped together by the batch benchmark, and the turns each of them plays
+BATCH_GAMES = 500
+BATCH_TURNS = 10
+
+# Largest fraction of a headless simulation's time telemetry recording may add
+TELEMETRY_BUDGET = 0.05
+
+
+def build_world(num_civs: int, seed: int = 0, placed: bool = False) -> Game:
+    """A game with num_civs civilizations cloned from the six historical ones
+
+    placed=True moves every civilization onto a generated map with at least
+    as many regions as civilizations (clones have no home on the
+    historical map).
+    """
+    game = Game(seed=seed)
+    templates = list(game.civilizations.values())
+    clones = []
+    for i in range(len(templates), num_civs):
+        template = templates[i % len(templates)]
+        clones.append(Civilization(
+            name=f"{template.name} {i // len(templates) + 1}",
+            description=template.description,
+            resources=replace(template.resources),
+            military=replace(template.military),
+        ))
+    if clones:
+        game.add_civilizations(clones)
+        game.relations.randomize(game.rng, -20, 20)
+    if placed:
+        game.world_map = generate_map(max(num_civs, 64), seed, civs=list(game.civilizations))
+
+    game.set_player(templates[0].name)
+    return game
+
+
+def measure(func: Callable[[], object], min_time: float) -> float:
+    """Calls per second of func, timed over at least min_time seconds"""
+    calls = 0
+    batch = 1
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        for _ in range(batch):
+            func()
+        calls += batch
+        batch *= 2
+        elapsed = time.perf_counter() - start
+    return calls / elapsed
+
+
+def memory_per_civ(num_civs: int) -> float:
+    """Bytes allocated per civilization while building a world"""
+    tracemalloc.start()
+    try:
+        game = build_world(num_civs)
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del game
+    return allocated / num_civs
+
+
+def _cycler(items: List) -> Callable[[], object]:
+    """Returns successive items, wrapping around"""
+    state = {"i": 0}
+    count = len(items)
+
+    def next_item():
+        i = state["i"]
+        state["i"] = i + 1 if i + 1 < count else 0
+        return items[i]
+    return next_item
+
+
+def bench_world(num_civs: int, min_time: float = 0.5) -> Dict[str, float]:
+    """Run every benchmark for one world size; returns name -> ops/sec"""
+    results: Dict[str, float] = {}
+    suffix = f"@{num_civs}"
+
+    game = build_world(num_civs)
+    results["end_turn" + suffix] = measure(game.resolve_turn, min_time)
+
+    game = build_world(num_civs)
+    civs = list(game.civilizations.values())
+    next_civ = _cycler(civs[1:])
+    results["ai_turn" + suffix] = measure(lambda: game.ai_turn(next_civ()), min_time)
+
+    game = build_world(num_civs)
+    next_civ = _cycler(list(game.civilizations.values()))
+    results["consume_resources" + suffix] = measure(
+        lambda: next_civ().consume_resources(), min_time)
+
+    wallet = Resources(food=100, bronze=50, gold=50, tin=30, copper=30)
+    cost = Resources(food=0, bronze=10, gold=5, tin=0, copper=0)
+    results["can_afford" + suffix] = measure(lambda: wallet.can_afford(cost), min_time)
+
+    game = build_world(num_civs)
+    civ = next(iter(game.civilizations.values()))
+    next_name = _cycler([name for name in game.civilizations if name != civ.name])
+    results["get_relationship_status" + suffix] = measure(
+        lambda: civ.get_relationship_status(next_name()), min_time)
+
+    game = build_world(num_civs, placed=True)
+    civ = next(iter(game.civilizations.values()))
+    next_civ = _cycler(list(game.civilizations.values()))
+    results["raid_targets" + suffix] = measure(lambda: game.raid_targets(next_civ()), min_time)
+    next_name = _cycler([name for name in game.civilizations if name != civ.name])
+    results["route_cost" + suffix] = measure(
+        lambda: game.route_cost(civ.name, next_name()), min_time)
+    if num_civs <= MASK_MAX_CIVS:
+        results["legal_mask" + suffix] = measure(lambda: legal_mask(game), min_time)
+
+    def full_game():
+        build_world(num_civs).simulate(50)
+    results["full_game_50" + suffix] = measure(full_game, min_time)
+
+    results["memory_per_civ" + suffix] = memory_per_civ(num_civs)
+    return results
+
+
+def bench_batch(num_games: int = BATCH_GAMES, turns: int = BATCH_TURNS,
+                repeats: int = 3) -> Dict[str, float]:
+    """Game-turns per second of BatchWorld.end_turn and of scalar resolve_turn
+
+    Both paths play the same turns of the same freshly built games; only the
+    turns are timed, and each path keeps its best of repeats runs.
+    """
+    def scalar() -> float:
+        games = [Game(seed=g) for g in range(num_games)]
+        start = time.perf_counter()
+        for game in games:
+            for _ in range(turns):
+                if not game.game_over:
+                    game.resolve_turn()
+        return time.perf_counter() - start
+
+    def batch() -> float:
+        world = BatchWorld.from_games([Game(seed=g) for g in range(num_games)])
+        start = time.perf_counter()
+        for _ in range(turns):
+            world.end_turn()
+        return time.perf_counter() - start
+
+    best = {"scalar": float("inf"), "batch": float("inf")}
+    for _ in range(repeats):
+        best["scalar"] = min(best["scalar"], scalar())
+        best["batch"] = min(best["batch"], batch())
+    suffix = f"@{num_games}g"
+    return {f"{path}_turns{suffix}": num_games * turns / elapsed
+            for path, elapsed in best.items()}
+
+
+def bench_telemetry(num_games: int = BATCH_GAMES, turns: int = BATCH_TURNS,
+                    repeats: int = 3) -> Dict[str, float]:
+    """Game-turns per second of headless games with and without telemetry
+
+    Scalar games are played with Game.simulate and TelemetryRecorder.simulate,
+    a BatchWorld with end_turn and TelemetryRecorder.simulate_world; recorded
+    runs include spilling the chunks to a temporary directory. Each path
+    keeps its best of repeats runs.
+    """
+    def scalar(recorded: bool) -> float:
+        games = [Game(seed=g) for g in range(num_games)]
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            if recorded:
+                with TelemetryRecorder(directory) as recorder:
+                    for g, game in enumerate(games):
+                        recorder.simulate(game, g, turns)
+            else:
+                for game in games:
+                    game.simulate(turns)
+            return time.perf_counter() - start
+
+    def batch(recorded: bool) -> float:
+        world = BatchWorld.from_games([Game(seed=g) for g in range(num_games)])
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            if recorded:
+                with TelemetryRecorder(directory) as recorder:
+                    recorder.simulate_world(world, turns)
+            else:
+                while any(not over and turn <= turns
+                          for over, turn in zip(world.game_over, world.turn)):
+                    world.end_turn()
+            return time.perf_counter() - start
+
+    best = {name: float("inf") for name in
+            ("untraced", "traced", "untraced_batch", "traced_batch")}
+    for _ in range(repeats):
+        best["untraced"] = min(best["untraced"], scalar(False))
+        best["traced"] = min(best["traced"], scalar(True))
+        best["untraced_batch"] = min(best["untraced_batch"], batch(False))
+        best["traced_batch"] = min(best["traced_batch"], batch(True))
+    suffix = f"@{num_games}g"
+    return {f"{path}_turns{suffix}": num_games * turns / elapsed
+            for path, elapsed in best.items()}
+
+
+def check_claims(results: Dict[str, float]) -> List[str]:
+    """Describe every performance claim the results break
+
+    The batch engine must play more game-turns per second than scalar games.
+    """
+    broken = []
+    for name, batch in results.items():
+        if not name.startswith("batch_turns@"):
+            continue
+        scalar = results.get("scalar" + name[len("batch"):])
+        if scalar is not None and batch <= scalar:
+            broken.append(f"{name}: {batch:,.1f} is not faster than scalar {scalar:,.1f}")
+    return broken
+
+
+def check_budgets(results: Dict[str, float]) -> List[str]:
+    """Describe every recorded path whose telemetry overhead exceeds TELEMETRY_BUDGET
+
+    These are reported for information only: recording scalar games one at a
+    time reads every civilization's fields from Python each turn, which alone
+    costs several percent of a six-civilization turn.
+    """
+    over = []
+    for name, traced in results.items():
+        if not name.startswith("traced_"):
+            continue
+        untraced = results.get("un" + name)
+        if untraced and traced < untraced * (1 - TELEMETRY_BUDGET):
+            over.append(f"{name}: telemetry costs {1 - traced / untraced:.1%}, "
+                        f"over the {TELEMETRY_BUDGET:.0%} budget")
+    return over
+
+
+def run_suite(sizes=DEFAULT_SIZES, min_time: float = 0.5,
+              batch_games: int = BATCH_GAMES) -> Dict[str, object]:
+    """Run the benchmarks for every world size, then the batch and telemetry ones"""
+    results: Dict[str, float] = {}
+    for size in sizes:
+        results.update(bench_world(size, min_time))
+    if batch_games:
+        results.update(bench_batch(batch_games))
+        results.update(bench_telemetry(batch_games))
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def find_regressions(current: Dict[str, float], baseline: Dict[str, float],
+                     threshold: float) -> List[str]:
+    """Describe every benchmark that is more than threshold worse than baseline
+
+    Memory benchmarks regress by growing; everything else by getting slower.
+    """
+    regressions = []
+    for name, old in baseline.items():
+        new = current.get(name)
+        if new is None or old <= 0:
+            continue
+        if name.startswith("memory"):
+            change = new / old - 1
+        else:
+            change = 1 - new / old
+        if change > threshold:
+            regressions.append(f"{name}: {old:,.1f} -> {new:,.1f} ({change:+.1%} worse)")
+    return regressions
+
+
+def format_results(results: Dict[str, float]) -> str:
+    """Results as an aligned text table"""
+    lines = [f"{'Benchmark':<36} {'Value':>16}"]
+    for name, value in results.items():
+        unit = "B/civ" if name.startswith("memory") else "ops/s"
+        lines.append(f"{name:<36} {value:>16,.1f} {unit}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the LBAC turn pipeline")
+    parser.add_argument("--civs", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="world sizes to benchmark")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="minimum seconds spent timing each benchmark")
+    parser.add_argument("--batch-games", type=int, default=BATCH_GAMES,
+                        help="games in the batch and telemetry benchmarks (0 skips them)")
+    parser.add_argument("--save", help="write results to this JSON baseline")
+    parser.add_argument("--compare", help="compare against this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed fractional regression before failing")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.civs, args.min_time, args.batch_games)
+    print(format_results(report["results"]))
+    broken = check_claims(report["results"])
+    if broken:
+        print("\nCLAIMS NOT MET:")
+        for line in broken:
+            print(f"  {line}")
+    over = check_budgets(report["results"])
+    if over:
+        print("\nOVER BUDGET (informational):")
+        for line in over:
+            print(f"  {line}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report["results"], baseline["results"], args.threshold)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 1 if broken else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Vectorized reinforcement-learning environment for LBAC
+
+VectorEnv steps N independent headless games in lockstep, one player
+action per game per step (a typed action from lbac_actions, chosen by
+index from a fixed discrete action table, then Game.resolve_turn).
+
+Observations, rewards and done flags live in buffers allocated once and
+overwritten in place every step, so an agent can hold on to them (or wrap
+them without copying: numpy.frombuffer(env.observations, numpy.float32)
+.reshape(env.num_envs, env.observation_size)). Finished games are reset
+in place (Game.reset) to a fresh episode at once; the observation written for them is the first one
+of the new episode.
+
+Observation of each game (float32), in order:
+
+    OBS_FIELDS                  the player's resources, military, prestige,
+                                technology level and the turn
+    relations                   how the player regards every civilization,
+                                in civ_index order, divided by 100
+
+With masks=True the env also keeps legal, one byte per game and action
+index (1: the rules would accept the action now, from lbac_legal), updated
+with the observations.
+
+The reward is the change in the player's score (prestige + population / 10,
+0 once collapsed) over the step. A game is done when it is over or has
+played max_turns turns.
+
+Episode seeds are derived from the environment seed, the game's slot and
+the slot's episode count (lbac_runner.derive_seed), so a run is
+reproducible and does not depend on how the games are spread over workers.
+
+With workers > 1 the games are split into contiguous shards, one per worker
+process, and every buffer (including the actions) lives in one
+multiprocessing.shared_memory block: a step writes the actions, wakes the
+workers through their pipes and waits for them, and nothing else crosses
+the process boundary. Call close() (or use the env as a context manager)
+to stop the workers.
+
+Usage (random-action throughput):
+    python3 lbac_env.py --envs 256 --workers 4 --steps 200
+"""
+
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from array import array
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence, Tuple
+
+from lbac_actions import (
+    Action, SendGift, ProposeAlliance, Threaten, RequestAid, EstablishTradeRoute,
+    TradeResources, ProduceBronze, Recruit, Raid, DeclareWar, Invest, HoldFestival,
+    INVEST_SECTORS
+)
+from lbac_game import Game, GameParams, DEFAULT_PARAMS
+from lbac_legal import TARGETED_KINDS, legal_mask, own_actions
+from lbac_runner import derive_seed
+
+
+OBS_FIELDS = ("food", "bronze", "gold", "tin", "copper", "population",
+              "infantry", "chariots", "archers", "navy",
+              "prestige", "technology_level", "turn")
+
+# Units recruited by one Recruit action of the table
+RECRUIT_BATCH = 5
+
+TARGETED_ACTIONS = (SendGift, ProposeAlliance, Threaten, RequestAid,
+                    EstablishTradeRoute, Raid, DeclareWar)
+
+
+def action_table(civs: Sequence[str], player: str,
+                 params: GameParams = DEFAULT_PARAMS) -> List[Optional[Action]]:
+    """The discrete action space: index -> player action (None: do nothing)"""
+    table: List[Optional[Action]] = [None]
+    for target in civs:
+        if target != player:
+            table.extend(cls(target) for cls in TARGETED_ACTIONS)
+    table.extend(TradeResources(offer) for offer in range(len(params.trade_offers)))
+    table.append(ProduceBronze())
+    table.extend(Recruit(unit, RECRUIT_BATCH) for unit in params.unit_costs)
+    table.extend(Invest(sector) for sector in INVEST_SECTORS)
+    table.append(HoldFestival())
+    return table
+
+
+class VectorEnv:
+    """N LBAC games stepped in lockstep with preallocated output buffers
+
+    The buffers are observations (num_envs x observation_size float32),
+    rewards (float32), dones (bytes) and legal (num_envs x action_count
+    bytes, filled when masks is set), all written in place.
+    """
+
+    def __init__(self, num_envs: int, civ: str = "Ugarit", seed: int = 0,
+                 max_turns: int = 50, params: Optional[GameParams] = None,
+                 workers: int = 1, masks: bool = False, first_slot: int = 0):
+        self.num_envs = num_envs
+        self.civ = civ
+        self.seed = seed
+        self.max_turns = max_turns
+        self.params = params or DEFAULT_PARAMS
+        self.first_slot = first_slot
+        self.episodes = array("q", bytes(8 * num_envs))
+
+        template = Game(params=self.params)
+        self.civ_names = list(template.civilizations)
+        self.player_index = template.civ_index[civ]
+        self.actions = action_table(self.civ_names, civ, self.params)
+        self.action_count = len(self.actions)
+        self.observation_size = len(OBS_FIELDS) + len(self.civ_names)
+        self.masks = masks
+        self._mask_index = self._mask_positions()
+        self.games: List[Game] = []
+        self.steps = 0
+        self.elapsed = 0.0
+
+        self.workers = min(max(1, workers), num_envs)
+        self._pipes: list = []
+        self._processes: list = []
+        self._memory: Optional[shared_memory.SharedMemory] = None
+        self._views: list = []
+        size = num_envs * self.observation_size
+        if self.workers == 1:
+            self.observations = array("f", bytes(4 * size))
+            self.rewards = array("f", bytes(4 * num_envs))
+            self.dones = bytearray(num_envs)
+            self.legal = bytearray(num_envs * self.action_count)
+            self.scores = array("q", bytes(8 * num_envs))
+        else:
+            self._start_workers()
+
+    def _new_game(self, i: int) -> Game:
+        """Next episode of slot i, reusing the slot's finished game if it has one"""
+        slot_seed = derive_seed(self.seed, self.first_slot + i)
+        seed = derive_seed(slot_seed, self.episodes[i])
+        if i < len(self.games):
+            game = self.games[i].reset(seed)
+        else:
+            game = Game(seed=seed, params=self.params)
+        game.set_player(self.civ)
+        self.episodes[i] += 1
+        return game
+
+    def _mask_positions(self) -> List[Optional[int]]:
+        """Where each action of the table sits in LegalMask.row (None: always legal)"""
+        n = len(self.civ_names)
+        own = own_actions(self.params, RECRUIT_BATCH)
+        positions: List[Optional[int]] = []
+        for action in self.actions:
+            if action is None:
+                positions.append(None)
+            elif type(action) in TARGETED_KINDS:
+                positions.append(TARGETED_KINDS.index(type(action)) * n
+                                 + self.civ_names.index(action.target))
+            else:
+                positions.append(len(TARGETED_KINDS) * n + own.index(action))
+        return positions
+
+    @staticmethod
+    def score(game: Game) -> int:
+        """The player's score (0 once collapsed)"""
+        civ = game.player_civ
+        if civ is None or not civ.is_alive:
+            return 0
+        return civ.prestige + civ.resources.population // 10
+
+    def _observe(self, i: int, game: Game):
+        """Write game's observation into row i of the buffer"""
+        civ = game.civilizations[self.civ]
+        r, m = civ.resources, civ.military
+        row = [r.food, r.bronze, r.gold, r.tin, r.copper, r.population,
+               m.infantry, m.chariots, m.archers, m.navy,
+               civ.prestige, civ.technology_level, game.turn]
+        row.extend(value / 100 for value in game.relations.row(self.player_index))
+        size = self.observation_size
+        self.observations[i * size:(i + 1) * size] = array("f", row)
+        if self.masks:
+            legal = legal_mask(game, RECRUIT_BATCH).row(self.civ)
+            count = self.action_count
+            self.legal[i * count:(i + 1) * count] = bytes(
+                [1 if p is None else legal[p] for p in self._mask_index])
+
+    def reset(self):
+        """Start a fresh episode in every game; returns the observation buffer"""
+        if self._pipes:
+            self._command("reset")
+            return self.observations
+        self.games = [self._new_game(i) for i in range(self.num_envs)]
+        for i, game in enumerate(self.games):
+            self._observe(i, game)
+            self.scores[i] = self.score(game)
+        self.dones[:] = bytes(self.num_envs)
+        return self.observations
+
+    def step(self, actions: Sequence[int]) -> Tuple:
+        """Apply one action index per game and resolve the turn of every game
+
+        Invalid actions (out-of-reach targets, unaffordable orders, ...)
+        do nothing; an index outside the action table raises ValueError.
+        Returns the observation, reward and done buffers.
+        """
+        count = self.action_count
+        if len(actions) and not (0 <= min(actions) and max(actions) < count):
+            raise ValueError(f"Action indices must be in range({count})")
+        start = time.perf_counter()
+        if self._pipes:
+            self._actions[:] = array("q", actions)
+            self._command("step")
+            self.steps += self.num_envs
+            self.elapsed += time.perf_counter() - start
+            return self.observations, self.rewards, self.dones
+        table = self.actions
+        games = self.games
+        rewards, dones, scores = self.rewards, self.dones, self.scores
+        max_turns = self.max_turns
+        score = self.score
+        for i, index in enumerate(actions):
+            game = games[i]
+            action = table[index]
+            if action is not None and action.validate(game) is None:
+                action.apply(game)
+            game.resolve_turn()
+            now = score(game)
+            rewards[i] = now - scores[i]
+            done = game.game_over or game.turn > max_turns
+            dones[i] = done
+            if done:
+                game = games[i] = self._new_game(i)
+                now = score(game)
+            scores[i] = now
+            self._observe(i, game)
+        self.steps += len(actions)
+        self.elapsed += time.perf_counter() - start
+        return self.observations, self.rewards, self.dones
+
+    @property
+    def steps_per_second(self) -> float:
+        return self.steps / self.elapsed if self.elapsed else 0.0
+
+    # ------------------------------------------------------------------
+    # Worker processes
+    # ------------------------------------------------------------------
+
+    def _layout(self, num_envs: int) -> List[Tuple[str, int, int]]:
+        """(buffer, offset, bytes) of each buffer in the shared block"""
+        sizes = [("observations", 4 * num_envs * self.observation_size),
+                 ("rewards", 4 * num_envs), ("actions", 8 * num_envs),
+                 ("dones", num_envs), ("legal", num_envs * self.action_count)]
+        layout, offset = [], 0
+        for name, size in sizes:
+            layout.append((name, offset, size))
+            offset += size
+        return layout
+
+    def _start_workers(self):
+        layout = self._layout(self.num_envs)
+        total = layout[-1][1] + layout[-1][2]
+        self._memory = shared_memory.SharedMemory(create=True, size=total)
+        views = {name: self._memory.buf[offset:offset + size] for name, offset, size in layout}
+        self.observations = views["observations"].cast("f")
+        self.rewards = views["rewards"].cast("f")
+        self._actions = views["actions"].cast("q")
+        self.dones = views["dones"]
+        self.legal = views["legal"]
+        self._views = [self.observations, self.rewards, self._actions, *views.values()]
+
+        per, extra = divmod(self.num_envs, self.workers)
+        first = 0
+        for w in range(self.workers):
+            count = per + (w < extra)
+            parent, child = multiprocessing.Pipe()
+            config = (self._memory.name, first, count, self.num_envs, self.civ, self.seed,
+                      self.max_turns, self.params, self.masks, self.first_slot)
+            process = multiprocessing.Process(target=_worker, args=(child, config), daemon=True)
+            process.start()
+            child.close()
+            self._pipes.append(parent)
+            self._processes.append(process)
+            first += count
+
+    def _command(self, command: str):
+        for pipe in self._pipes:
+            pipe.send(command)
+        for pipe in self._pipes:
+            pipe.recv()
+
+    def close(self):
+        """Stop the worker processes and free the shared buffers"""
+        for pipe in self._pipes:
+            pipe.send("close")
+        for process in self._processes:
+            process.join()
+        self._pipes, self._processes = [], []
+        if self._memory is not None:
+            # The caller may still hold the buffers: release them so the
+            # block can be closed (they raise ValueError from now on)
+            for view in self._views:
+                view.release()
+            self._views = []
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def __enter__(self) -> "VectorEnv":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _worker(conn, config):
+    """Worker process: steps one shard of the games into the shared buffers"""
+    name, first, count, total, civ, seed, max_turns, params, masks, first_slot = config
+    env = VectorEnv(count, civ, seed, max_turns, params, masks=masks,
+                    first_slot=first_slot + first)
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        width = env.observation_size
+        views = {key: memory.buf[offset:offset + size]
+                 for key, offset, size in env._layout(total)}
+        observations = views["observations"].cast("B")[
+            4 * first * width:4 * (first + count) * width]
+        rewards = views["rewards"].cast("B")[4 * first:4 * (first + count)]
+        actions = views["actions"].cast("q")[first:first + count]
+        dones = views["dones"][first:first + count]
+        actions_per_game = env.action_count
+        legal = views["legal"][first * actions_per_game:(first + count) * actions_per_game]
+        while True:
+            command = conn.recv()
+            if command == "close":
+                break
+            if command == "reset":
+                env.reset()
+            else:
+                env.step(actions)
+            observations[:] = env.observations.tobytes()
+            rewards[:] = env.rewards.tobytes()
+            dones[:] = env.dones
+            if masks:
+                legal[:] = env.legal
+            conn.send(None)
+        del observations, rewards, actions, dones, legal, views
+    finally:
+        memory.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point: step random actions and report throughput"""
+    parser = argparse.ArgumentParser(description="Measure LBAC vector environment throughput")
+    parser.add_argument("--envs", type=int, default=256, help="games stepped in lockstep")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--steps", type=int, default=200, help="steps of every game")
+    parser.add_argument("--turns", type=int, default=50, help="maximum turns per episode")
+    parser.add_argument("--civ", default="Ugarit", help="civilization played by the agent")
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    with VectorEnv(args.envs, args.civ, args.seed, args.turns, workers=args.workers) as env:
+        env.reset()
+        count = env.action_count
+        for _ in range(args.steps):
+            env.step([rng.randrange(count) for _ in range(args.envs)])
+        rate = env.steps_per_second
+        print(f"{env.steps} steps in {env.elapsed:.2f}s: "
+              f"{rate:,.0f} steps/s ({rate * 60:,.0f} steps/min)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
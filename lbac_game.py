@@ -7,12 +7,22 @@ Set in the Late Bronze Age Collapse era (circa 1200 BC), you lead one of the gre
 civilizations through a period of unprecedented crisis and opportunity.
 """
 
+import copy
+import functools
+import json
+import marshal
 import random
 import sys
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, field
+from array import array
+from bisect import bisect_right
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Set, Tuple, Optional
+from dataclasses import dataclass, field, replace, asdict
 from enum import Enum
 
+from lbac_map import WorldMap, eastern_mediterranean
+from lbac_slots import SLOTS
+
 
 class RelationshipStatus(Enum):
     """Diplomatic relationship statuses"""
@@ -35,7 +45,42 @@ class EventType(Enum):
     DIPLOMATIC_INCIDENT = "diplomatic_incident"
 
 
-@dataclass
+def relationship_status(value: int) -> RelationshipStatus:
+    """Classify a relationship value"""
+    if value >= 75:
+        return RelationshipStatus.ALLIED
+    elif value >= 25:
+        return RelationshipStatus.FRIENDLY
+    elif value >= -25:
+        return RelationshipStatus.NEUTRAL
+    elif value >= -75:
+        return RelationshipStatus.UNFRIENDLY
+    elif value >= -100:
+        return RelationshipStatus.HOSTILE
+    else:
+        return RelationshipStatus.WAR
+
+
+# Relationship tiers as small integer codes, in RelationshipStatus order
+TIER_STATUSES = tuple(RelationshipStatus)
+_TIER_CODES = {status: code for code, status in enumerate(TIER_STATUSES)}
+
+
+def _signed(byte: int) -> int:
+    """Value of an int8 stored as an unsigned byte"""
+    return byte - 256 if byte >= 128 else byte
+
+
+# bytes.translate table: int8 relationship value (as unsigned byte) -> tier code
+TIER_TABLE = bytes(_TIER_CODES[relationship_status(_signed(b))] for b in range(256))
+
+
+def _clamp_table(change: int) -> bytes:
+    """bytes.translate table adding change to an int8 value, clamped to -100..100"""
+    return bytes(max(-100, min(100, _signed(b) + change)) & 0xFF for b in range(256))
+
+
+@dataclass(**SLOTS)
 class Resources:
     """Civilization resources"""
     food: int = 100
@@ -70,7 +115,7 @@ class Resources:
         self.copper += gain.copper
 
 
-@dataclass
+@dataclass(**SLOTS)
 class MilitaryForce:
     """Military strength"""
     infantry: int = 100
@@ -81,9 +126,13 @@ class MilitaryForce:
     def get_total_strength(self) -> int:
         """Calculate total military strength"""
         return self.infantry + (self.chariots * 5) + (self.archers * 2) + (self.navy * 3)
+    
+    def get_upkeep(self) -> int:
+        """Upkeep weight of the army (chariots and ships count double)"""
+        return self.infantry + self.chariots * 2 + self.archers + self.navy * 2
 
 
-@dataclass
+@dataclass(**SLOTS)
 class Civilization:
     """Represents a civilization in the game"""
     name: str
@@ -98,19 +147,10 @@ class Civilization:
     
     def get_relationship_status(self, faction_name: str) -> RelationshipStatus:
         """Get relationship status with another faction"""
-        value = self.relationships.get(faction_name, 0)
-        if value >= 75:
-            return RelationshipStatus.ALLIED
-        elif value >= 25:
-            return RelationshipStatus.FRIENDLY
-        elif value >= -25:
-            return RelationshipStatus.NEUTRAL
-        elif value >= -75:
-            return RelationshipStatus.UNFRIENDLY
-        elif value >= -100:
-            return RelationshipStatus.HOSTILE
-        else:
-            return RelationshipStatus.WAR
+        relationships = self.relationships
+        if isinstance(relationships, RelationshipView):
+            return relationships.status(faction_name)
+        return relationship_status(relationships.get(faction_name, 0))
     
     def modify_relationship(self, faction_name: str, change: int):
         """Modify relationship with another faction"""
@@ -125,15 +165,14 @@ class Civilization:
         self.resources.bronze += producable
         return producable
     
-    def consume_resources(self):
-        """Consume resources each turn"""
+    def consume_resources(self, food_divisor: int = 20, upkeep_divisor: int = 10):
+        """Consume resources each turn (see GameParams for the divisors)"""
         # Population consumes food
-        food_needed = self.resources.population // 20
+        food_needed = self.resources.population // food_divisor
         self.resources.food -= food_needed
         
         # Military consumes resources
-        military_cost = (self.military.infantry + self.military.chariots * 2 + 
-                        self.military.archers + self.military.navy * 2) // 10
+        military_cost = self.military.get_upkeep() // upkeep_divisor
         self.resources.food -= military_cost
         
         # Check for starvation
@@ -146,169 +185,1620 @@ class Civilization:
         return None
 
 
+class RelationshipMatrix:
+    """World-level N x N relationship values (-100 to 100) indexed by civilization
+    
+    values[i * size + j] is how civilization i regards civilization j, stored
+    as a flat int8 array. Whole-row and whole-matrix operations run through
+    bytes.translate, so clamped updates and tier classification touch every
+    cell at C speed.
+    
+    Tier codes are cached per row and the rows a write touches are dropped
+    from the cache, so values must only be changed through these methods
+    (or followed by invalidate()).
+    """
+    
+    def __init__(self, size: int = 0):
+        self.size = size
+        self.values = array("b", bytes(size * size))
+        self._tier_rows: Dict[int, bytes] = {}
+    
+    def invalidate(self):
+        """Forget every cached tier row"""
+        self._tier_rows.clear()
+    
+    def load(self, data: bytes):
+        """Overwrite every value with raw int8 bytes (from values.tobytes())"""
+        memoryview(self.values).cast("B")[:] = data
+        self._tier_rows.clear()
+    
+    def resize(self, size: int):
+        """Grow (or shrink) to size civilizations, keeping existing values"""
+        old, n = self.values, self.size
+        values = array("b", bytes(size * size))
+        keep = min(n, size)
+        for i in range(keep):
+            values[i * size:i * size + keep] = old[i * n:i * n + keep]
+        self.values = values
+        self.size = size
+        self._tier_rows.clear()
+    
+    def get(self, i: int, j: int) -> int:
+        """How i regards j"""
+        return self.values[i * self.size + j]
+    
+    def set(self, i: int, j: int, value: int):
+        """Set how i regards j, clamped to -100..100"""
+        self.values[i * self.size + j] = max(-100, min(100, value))
+        self._tier_rows.pop(i, None)
+    
+    def adjust(self, i: int, j: int, change: int):
+        """Change how i regards j (asymmetric), clamped"""
+        k = i * self.size + j
+        self.values[k] = max(-100, min(100, self.values[k] + change))
+        self._tier_rows.pop(i, None)
+    
+    def adjust_pair(self, i: int, j: int, change_ij: int, change_ji: int):
+        """Change both directions of a pair by (possibly different) amounts"""
+        values, n = self.values, self.size
+        k = i * n + j
+        values[k] = max(-100, min(100, values[k] + change_ij))
+        k = j * n + i
+        values[k] = max(-100, min(100, values[k] + change_ji))
+        tier_rows = self._tier_rows
+        if tier_rows:
+            tier_rows.pop(i, None)
+            tier_rows.pop(j, None)
+    
+    def adjust_cells(self, changes: Dict[int, int]):
+        """Apply summed changes keyed by flat index (i * size + j), each clamped once"""
+        values, n = self.values, self.size
+        tier_rows = self._tier_rows
+        for k, change in changes.items():
+            values[k] = max(-100, min(100, values[k] + change))
+            tier_rows.pop(k // n, None)
+    
+    def adjust_mutual(self, i: int, j: int, change: int):
+        """Symmetric change: i and j both move by the same amount"""
+        self.adjust_pair(i, j, change, change)
+    
+    def set_mutual(self, i: int, j: int, value: int):
+        """Set both directions of a pair"""
+        value = max(-100, min(100, value))
+        self.values[i * self.size + j] = value
+        self.values[j * self.size + i] = value
+        self._tier_rows.pop(i, None)
+        self._tier_rows.pop(j, None)
+    
+    def _row_view(self, i: int) -> memoryview:
+        n = self.size
+        return memoryview(self.values).cast("B")[i * n:(i + 1) * n]
+    
+    def row(self, i: int) -> array:
+        """How i regards every civilization (copy)"""
+        n = self.size
+        return self.values[i * n:(i + 1) * n]
+    
+    def adjust_row(self, i: int, change: int):
+        """Change how i regards everyone else, clamped (vectorized)"""
+        view = self._row_view(i)
+        view[:] = view.tobytes().translate(_clamp_table(change))
+        self.values[i * self.size + i] = 0
+        self._tier_rows.pop(i, None)
+    
+    def adjust_column(self, j: int, change: int):
+        """Change how everyone else regards j, clamped (vectorized)"""
+        n = self.size
+        column = self.values[j::n].tobytes().translate(_clamp_table(change))
+        self.values[j::n] = array("b", column)
+        self.values[j * n + j] = 0
+        self._tier_rows.clear()
+    
+    def adjust_all(self, change: int):
+        """Change every relationship in the world, clamped (vectorized)"""
+        view = memoryview(self.values).cast("B")
+        view[:] = view.tobytes().translate(_clamp_table(change))
+        for i in range(self.size):
+            self.values[i * self.size + i] = 0
+        self._tier_rows.clear()
+    
+    def tiers_row(self, i: int) -> bytes:
+        """Tier code (index into TIER_STATUSES) of each of i's relationships"""
+        tiers = self._tier_rows.get(i)
+        if tiers is None:
+            tiers = self._tier_rows[i] = self._row_view(i).tobytes().translate(TIER_TABLE)
+        return tiers
+    
+    def status(self, i: int, j: int) -> RelationshipStatus:
+        """RelationshipStatus of how i regards j"""
+        tiers = self._tier_rows.get(i)
+        if tiers is None:
+            tiers = self.tiers_row(i)
+        return TIER_STATUSES[tiers[j]]
+    
+    def tiers(self) -> bytes:
+        """Tier codes for the whole matrix, row-major"""
+        return self.values.tobytes().translate(TIER_TABLE)
+    
+    def statuses_row(self, i: int) -> List[RelationshipStatus]:
+        """RelationshipStatus of each of i's relationships"""
+        return [TIER_STATUSES[code] for code in self.tiers_row(i)]
+    
+    def randomize(self, rng: random.Random, low: int, high: int):
+        """Fill every off-diagonal cell with a seeded value in [low, high]"""
+        span = high - low + 1
+        table = bytes((low + b % span) & 0xFF for b in range(256))
+        noise = rng.getrandbits(8 * len(self.values)).to_bytes(len(self.values), "little") \
+            if self.values else b""
+        memoryview(self.values).cast("B")[:] = noise.translate(table)
+        for i in range(self.size):
+            self.values[i * self.size + i] = 0
+        self._tier_rows.clear()
+
+
+class RelationshipView(Mapping):
+    """Dict-like view of one civilization's row of a RelationshipMatrix
+    
+    Lets Civilization.relationships keep its Dict[str, int] interface while the
+    values live in the world matrix.
+    """
+    
+    __slots__ = ("matrix", "index", "names")
+    
+    def __init__(self, matrix: RelationshipMatrix, index: int, names: Dict[str, int]):
+        self.matrix = matrix
+        self.index = index
+        self.names = names
+    
+    def __getitem__(self, name: str) -> int:
+        j = self.names[name]
+        if j == self.index:
+            raise KeyError(name)
+        matrix = self.matrix
+        return matrix.values[self.index * matrix.size + j]
+    
+    def get(self, name: str, default=None):
+        j = self.names.get(name)
+        if j is None or j == self.index:
+            return default
+        matrix = self.matrix
+        return matrix.values[self.index * matrix.size + j]
+    
+    def __setitem__(self, name: str, value: int):
+        j = self.names[name]
+        if j == self.index:
+            raise KeyError(name)
+        self.matrix.set(self.index, j, value)
+    
+    def status(self, name: str) -> RelationshipStatus:
+        """Cached relationship tier towards name (Neutral if unknown)"""
+        j = self.names.get(name)
+        if j is None or j == self.index:
+            return RelationshipStatus.NEUTRAL
+        return self.matrix.status(self.index, j)
+    
+    def __iter__(self):
+        return (name for name, j in self.names.items() if j != self.index)
+    
+    def __len__(self) -> int:
+        return len(self.names) - 1
+    
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class PrefetchRandom(random.Random):
+    """random.Random that serves draws from blocks of prefetched floats
+    
+    Floats are generated a block at a time and handed out through a C-level
+    list iterator, and randint() maps one buffered float straight onto its
+    range instead of going through the stdlib randint -> randrange ->
+    _randbelow chain. The stream is deterministic for a given seed but
+    differs from a plain random.Random with the same seed.
+    """
+    
+    def __init__(self, seed: Optional[int] = None, block: int = 1024):
+        self.block = block
+        super().__init__(seed)
+    
+    def seed(self, a=None, version=2):
+        """Reseed and drop any prefetched draws"""
+        super().seed(a, version)
+        self._buffer: List[float] = []
+        self._next = iter(self._buffer).__next__
+    
+    def _refill(self):
+        draw = super().random
+        self._buffer = [draw() for _ in range(self.block)]
+        self._next = iter(self._buffer).__next__
+    
+    def random(self) -> float:
+        """Next float in [0, 1)"""
+        try:
+            return self._next()
+        except StopIteration:
+            self._refill()
+            return self._next()
+    
+    def randint(self, a: int, b: int) -> int:
+        """Random integer in [a, b]"""
+        try:
+            return a + int(self._next() * (b - a + 1))
+        except StopIteration:
+            self._refill()
+            return a + int(self._next() * (b - a + 1))
+    
+    def choice(self, seq):
+        """Random element of a non-empty sequence"""
+        return seq[int(self.random() * len(seq))]
+    
+    def getstate(self):
+        """Generator state including the unread part of the current block"""
+        remaining = self._next.__self__.__length_hint__()
+        return super().getstate(), tuple(self._buffer[len(self._buffer) - remaining:])
+    
+    def __reduce__(self):
+        return self.__class__, (None, self.block), self.getstate()
+    
+    def setstate(self, state):
+        """Restore a state returned by getstate()"""
+        base, pending = state
+        super().setstate(base)
+        self._buffer = list(pending)
+        self._next = iter(self._buffer).__next__
+
+
+@dataclass(frozen=True)
+class EventSpec:
+    """One row of the random event table
+    
+    probability is the chance per civilization per turn. effects are
+    (field, low, high) deltas drawn uniformly; field is a Resources or
+    MilitaryForce attribute, prestige/technology_level, or "relationship"
+    (towards a randomly chosen other civilization). If the civ has at least
+    defended_by[1] of the defended_by[0] unit, defended_effects apply instead.
+    """
+    event: EventType
+    probability: float
+    effects: Tuple[Tuple[str, int, int], ...]
+    message: str
+    defended_by: Optional[Tuple[str, int]] = None
+    defended_effects: Tuple[Tuple[str, int, int], ...] = ()
+    defended_message: str = ""
+    
+    @property
+    def relational(self) -> bool:
+        """True if the event targets another civilization"""
+        return any(name == "relationship" for name, _, _ in self.effects)
+
+
+EVENT_TABLE = (
+    EventSpec(EventType.DROUGHT, 0.3 / 7, (("food", -60, -30),),
+              "DROUGHT strikes your lands! Lost {food} food."),
+    EventSpec(EventType.EARTHQUAKE, 0.3 / 7, (("gold", -40, -20), ("population", -150, -50)),
+              "EARTHQUAKE devastates your cities!\n"
+              "Lost {gold} gold and {population} population."),
+    EventSpec(EventType.SEA_PEOPLES, 0.3 / 7, (("infantry", -40, -20), ("gold", -30, -30)),
+              "SEA PEOPLES raid your coasts!\n"
+              "They plunder your lands! Lost {infantry} infantry and {gold} gold.",
+              defended_by=("navy", 10), defended_effects=(("prestige", 10, 10),),
+              defended_message="SEA PEOPLES raid your coasts!\nYour navy repels the attack!"),
+    EventSpec(EventType.PLAGUE, 0.3 / 7, (("population", -300, -100),),
+              "PLAGUE sweeps through your population! Lost {population} people."),
+    EventSpec(EventType.GOOD_HARVEST, 0.3 / 7, (("food", 40, 80),),
+              "GOOD HARVEST! Gained {food} food."),
+    EventSpec(EventType.TRADE_OPPORTUNITY, 0.3 / 7, (("gold", 30, 60),),
+              "TRADE OPPORTUNITY! Merchants bring {gold} gold."),
+    EventSpec(EventType.DIPLOMATIC_INCIDENT, 0.3 / 7, (("relationship", -20, 20),),
+              "DIPLOMATIC INCIDENT with {target}!\nRelations {direction} by {relationship}."),
+)
+
+EVENT_SPECS = {spec.event: spec for spec in EVENT_TABLE}
+
+
+def event_bounds(table: Tuple[EventSpec, ...]) -> List[float]:
+    """Cumulative probabilities: a roll below bounds[k] (and not below
+    bounds[k-1]) selects table[k]; a roll of bounds[-1] or more is no event"""
+    bounds, total = [], 0.0
+    for spec in table:
+        total += spec.probability
+        bounds.append(total)
+    return bounds
+
+
+EVENT_BOUNDS = event_bounds(EVENT_TABLE)
+
+
+def draw_event_effects(rng: random.Random, spec: EventSpec, defended: bool,
+                       index: int, count: int) -> Tuple[Dict[str, int], Optional[int]]:
+    """Draw the effect amounts of one event striking civilization index of count
+
+    A relational event's target is drawn as the index of one of the other
+    count - 1 civilizations (None when there are none), without listing them.
+    """
+    values: Dict[str, int] = {}
+    target = None
+    for name, low, high in (spec.defended_effects if defended else spec.effects):
+        if name == "relationship":
+            if count < 2:
+                continue
+            target = rng.randrange(count - 1)
+            target += target >= index
+        values[name] = low if low == high else rng.randint(low, high)
+    return values, target
+
+
+RESOURCE_FIELDS = ("food", "bronze", "gold", "tin", "copper", "population")
+MILITARY_FIELDS = ("infantry", "chariots", "archers", "navy")
+
+
+# The historical civilizations: name, description,
+# Resources (food, bronze, gold, tin, copper, population),
+# MilitaryForce (infantry, chariots, archers, navy)
+STARTING_CIVILIZATIONS = (
+    ("Mycenaean Greece",
+     "The warrior culture of mainland Greece, ruling from fortified palaces.",
+     (120, 60, 70, 40, 40, 1200), (150, 15, 60, 10)),
+    ("Hittite Empire",
+     "The powerful kingdom of Anatolia, masters of iron-working.",
+     (150, 80, 60, 50, 50, 1500), (200, 25, 80, 5)),
+    ("New Kingdom Egypt",
+     "The ancient civilization of the Nile, wealthy but facing threats.",
+     (200, 70, 100, 35, 50, 2000), (180, 20, 100, 15)),
+    ("Ugarit",
+     "A prosperous trading city-state on the Syrian coast.",
+     (80, 50, 80, 30, 30, 800), (80, 8, 40, 12)),
+    ("Cyprus",
+     "Island kingdom rich in copper deposits.",
+     (90, 60, 60, 20, 80, 900), (90, 5, 45, 15)),
+    ("Assyria",
+     "Rising power in northern Mesopotamia.",
+     (130, 70, 55, 45, 45, 1300), (160, 18, 90, 3)),
+)
+STARTING_NAMES = tuple(name for name, _, _, _ in STARTING_CIVILIZATIONS)
+
+# Unit recruitment costs: unit -> (bronze, gold)
+UNIT_COSTS = {
+    "infantry": (10, 5),
+    "chariots": (25, 15),
+    "archers": (8, 8),
+    "navy": (20, 20),
+}
+
+# Fixed-rate exchanges: (give resource, give amount, get resource, get amount)
+TRADE_OFFERS = [
+    ("food", 20, "gold", 10),
+    ("bronze", 15, "gold", 20),
+    ("gold", 25, "tin", 15),
+    ("gold", 25, "copper", 15),
+]
+
+# Goods traded on the market, priced in gold per lot
+MARKET_GOODS = ("food", "bronze", "tin", "copper")
+MARKET_PRICES = {"food": 5, "bronze": 13, "tin": 17, "copper": 17}
+
+# Gold costs and relationship thresholds of the rule methods
+TRADE_ROUTE_COST = 10
+FESTIVAL_COST = 30
+INVEST_COSTS = {"agriculture": 50, "technology": 60}
+ALLIANCE_RELATIONSHIP = 25
+AID_RELATIONSHIP = 50
+
+
+def _as_tuple(value):
+    """JSON lists (also inside dicts) back into tuples"""
+    if isinstance(value, list):
+        return tuple(_as_tuple(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _as_tuple(item) for key, item in value.items()}
+    return value
+
+
+@dataclass(frozen=True)
+class GameParams:
+    """Balance parameters of the rules
+    
+    The defaults are the standard game. gift_gain is the (low, high)
+    relationship gain of a gift; event_severity scales the effect ranges of
+    the harmful and helpful rows of EVENT_TABLE alike; food_divisor and
+    upkeep_divisor are Civilization.consume_resources' population and
+    military divisors; the player can win from victory_turn on, by survival
+    or by reaching prestige_victory. raid_range and trade_range are the
+    longest routes (WorldMap route cost) armies and merchants travel.
+    Market orders are for lots of market_lot units; market_prices are the
+    reference prices (gold per lot) the trading AI bids around.
+    """
+    gift_cost: int = 20
+    gift_gain: Tuple[int, int] = (10, 25)
+    unit_costs: Dict[str, Tuple[int, int]] = field(default_factory=lambda: dict(UNIT_COSTS))
+    trade_offers: Tuple[Tuple[str, int, str, int], ...] = tuple(TRADE_OFFERS)
+    event_severity: float = 1.0
+    food_divisor: int = 20
+    upkeep_divisor: int = 10
+    victory_turn: int = 50
+    prestige_victory: int = 100
+    raid_range: int = 1000
+    trade_range: int = 2000
+    market_lot: int = 10
+    market_prices: Dict[str, int] = field(default_factory=lambda: dict(MARKET_PRICES))
+    
+    def override(self, changes: Mapping) -> "GameParams":
+        """A copy with some parameters changed
+        
+        Keys are field names, or "unit_costs.<unit>", "market_prices.<good>"
+        and "trade_offers.<index>" to change a single entry. JSON lists are accepted wherever a tuple is.
+        """
+        fields: Dict[str, object] = {}
+        for key, value in changes.items():
+            name, _, item = key.partition(".")
+            if name not in self.__dataclass_fields__:
+                raise ValueError(f"Unknown parameter {key!r}")
+            value = _as_tuple(value)
+            if item:
+                entries = fields.get(name, getattr(self, name))
+                if isinstance(entries, dict):
+                    value = {**entries, item: value}
+                else:
+                    entries = list(entries)
+                    entries[int(item)] = value
+                    value = tuple(entries)
+            fields[name] = value
+        return replace(self, **fields)
+    
+    def to_dict(self) -> Dict[str, object]:
+        """JSON-ready form; DEFAULT_PARAMS.override(d) rebuilds the parameters"""
+        return asdict(self)
+    
+    def event_table(self) -> Tuple[EventSpec, ...]:
+        """EVENT_TABLE with its effect ranges scaled by event_severity"""
+        scale = self.event_severity
+        if scale == 1.0:
+            return EVENT_TABLE
+        return tuple(replace(spec, effects=tuple((name, round(low * scale), round(high * scale))
+                                                 for name, low, high in spec.effects))
+                     for spec in EVENT_TABLE)
+
+
+DEFAULT_PARAMS = GameParams()
+
+
+@dataclass
+class ActionResult:
+    """Outcome of a single game action"""
+    success: bool
+    message: str
+    values: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class RaidResult:
+    """Outcome of a raid"""
+    attacker: str
+    target: str
+    attacker_strength: int
+    defender_strength: int
+    victory: bool
+    loot_gold: int = 0
+    loot_food: int = 0
+    attacker_losses: int = 0
+    defender_losses: int = 0
+    refusal: Optional[str] = None  # why the raid was never fought
+
+    @property
+    def success(self) -> bool:
+        """Whether the raid was fought (won or lost)"""
+        return self.refusal is None
+
+    @property
+    def message(self) -> str:
+        """Human readable summary of the raid"""
+        if self.refusal is not None:
+            return self.refusal
+        if self.victory:
+            lines = [f"Victory! Plundered {self.loot_gold} gold and {self.loot_food} food!"]
+        else:
+            lines = ["Defeat! The raid failed!"]
+        lines.append(f"Your losses: {self.attacker_losses} infantry")
+        lines.append(f"Their losses: {self.defender_losses} infantry")
+        return "\n".join(lines)
+
+
+@dataclass(**SLOTS)
+class Order:
+    """A limit order on the market: buy or sell lots of a good at price gold per lot or better"""
+    civ: str
+    good: str
+    side: str
+    lots: int
+    price: int
+
+
+@dataclass
+class MarketClearing:
+    """Outcome of one turn's auction for one good
+    
+    Every fill trades at the single clearing price (None when no bid met an
+    ask). fills holds each trading civilization's net lots, positive for
+    bought and negative for sold.
+    """
+    good: str
+    price: Optional[int]
+    lots: int = 0
+    best_bid: Optional[int] = None
+    best_ask: Optional[int] = None
+    fills: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class EngagementResult:
+    """Outcome of one turn of fighting between two civilizations at war"""
+    side_a: str
+    side_b: str
+    strength_a: int
+    strength_b: int
+    winner: Optional[str]
+    losses_a: Dict[str, int] = field(default_factory=dict)
+    losses_b: Dict[str, int] = field(default_factory=dict)
+    
+    @property
+    def message(self) -> str:
+        """Human readable summary of the engagement"""
+        if self.winner is None:
+            lines = [f"{self.side_a} and {self.side_b} fight to a standstill."]
+        else:
+            loser = self.side_b if self.winner == self.side_a else self.side_a
+            lines = [f"{self.winner} defeats {loser} in the field!"]
+        for side, losses in ((self.side_a, self.losses_a), (self.side_b, self.losses_b)):
+            lost = ", ".join(f"{amount} {unit}" for unit, amount in losses.items() if amount)
+            lines.append(f"{side} losses: {lost or 'none'}")
+        return "\n".join(lines)
+
+
+@dataclass
+class EventResult:
+    """Outcome of a random event"""
+    event: EventType
+    civ: str
+    values: Dict[str, int] = field(default_factory=dict)
+    target: Optional[str] = None
+    defended: bool = False
+    
+    @property
+    def message(self) -> str:
+        """Announcement text for the event"""
+        spec = EVENT_SPECS[self.event]
+        template = spec.defended_message if self.defended else spec.message
+        if spec.relational and self.target is None:
+            return ""
+        amounts = {name: abs(value) for name, value in self.values.items()}
+        direction = "improved" if self.values.get("relationship", 0) > 0 else "worsened"
+        return template.format(target=self.target, direction=direction, **amounts)
+
+
+@dataclass
+class TurnResult:
+    """Everything that happened while processing one end of turn"""
+    turn: int
+    production: Dict[str, int] = field(default_factory=dict)
+    bronze_made: int = 0
+    starvation: Optional[str] = None
+    collapsed: List[str] = field(default_factory=list)
+    event: Optional[EventResult] = None
+    events: List[EventResult] = field(default_factory=list)
+    raids: List[RaidResult] = field(default_factory=list)
+    engagements: List[EngagementResult] = field(default_factory=list)
+    market: Dict[str, MarketClearing] = field(default_factory=dict)
+    victory: Optional[str] = None
+
+
+class AIPolicy:
+    """Decides what a computer-controlled civilization does on its turn
+    
+    Game.ai_turn handles production and upkeep, then calls act(). Policies
+    act through the Game rule methods (send_gift, recruit, resolve_raid, ...)
+    passing civ=civ, and must draw randomness from game.rng.
+    """
+    
+    def act(self, game: "Game", civ: Civilization):
+        """Take this turn's actions for civ"""
+        raise NotImplementedError
+
+
+class PassivePolicy(AIPolicy):
+    """Never takes any action"""
+    
+    def act(self, game: "Game", civ: Civilization):
+        pass
+
+
+class RecruitPolicy(AIPolicy):
+    """The original AI: 30% chance to recruit one infantry each turn"""
+    
+    def act(self, game: "Game", civ: Civilization):
+        if game.rng.random() < 0.3:
+            bronze, gold = game.params.unit_costs["infantry"]
+            if civ.resources.bronze >= bronze and civ.resources.gold >= gold:
+                civ.resources.bronze -= bronze
+                civ.resources.gold -= gold
+                civ.military.infantry += 1
+
+
+class TraderPolicy(RecruitPolicy):
+    """RecruitPolicy that also trades on the market every turn
+    
+    Sells food beyond six turns of upkeep and buys up to three; evens out
+    tin and copper so both go into bronze. Asks are 20% under the
+    reference price and bids 20% over, so traders meet each other. Takes no
+    random draws beyond RecruitPolicy's.
+    """
+    
+    def act(self, game: "Game", civ: Civilization):
+        super().act(game, civ)
+        params = game.params
+        lot, prices = params.market_lot, params.market_prices
+        res = civ.resources
+        upkeep = (res.population // params.food_divisor +
+                  civ.military.get_upkeep() // params.upkeep_divisor)
+        if res.food > upkeep * 6 + lot:
+            game.place_order("food", "sell", (res.food - upkeep * 6) // lot,
+                             prices["food"] * 8 // 10, civ=civ)
+        elif res.food < upkeep * 3:
+            bid = prices["food"] * 12 // 10
+            lots = min(-(res.food - upkeep * 3) // lot + 1, res.gold // bid)
+            if lots > 0:
+                game.place_order("food", "buy", lots, bid, civ=civ)
+        
+        excess = (res.tin - res.copper) // 2 // lot
+        if excess:
+            more, less = ("tin", "copper") if excess > 0 else ("copper", "tin")
+            excess = abs(excess)
+            game.place_order(more, "sell", excess, prices[more] * 8 // 10, civ=civ)
+            bid = prices[less] * 12 // 10
+            lots = min(excess, res.gold // bid)
+            if lots > 0:
+                game.place_order(less, "buy", lots, bid, civ=civ)
+
+
+# Per-civilization integers stored in a GameSnapshot, in order
+SNAPSHOT_FIELDS = ("food", "bronze", "gold", "tin", "copper", "population",
+                   "infantry", "chariots", "archers", "navy",
+                   "prestige", "technology_level", "is_player", "is_alive")
+
+
+@dataclass(**SLOTS)
+class GameSnapshot:
+    """Complete mutable state of a Game
+    
+    state holds turn and game_over followed by SNAPSHOT_FIELDS for every
+    civilization in civ_index order, then the civ_index pairs of every war
+    (none in a world at peace); relations is the raw int8 matrix. Raids
+    and market orders queued for the end of the turn are not part of the
+    state.
+    """
+    state: array
+    relations: bytes
+    rng_state: Optional[tuple]
+    
+    def to_bytes(self) -> bytes:
+        """Serialize to one flat buffer (not for untrusted input)"""
+        return marshal.dumps((self.state.tobytes(), self.relations, self.rng_state))
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GameSnapshot":
+        """Inverse of to_bytes()"""
+        state, relations, rng_state = marshal.loads(data)
+        return cls(array("q", state), relations, rng_state)
+
+
+class Renderer:
+    """Output and input for the interactive front-end
+    
+    The front-end writes lines with write() and reads answers with ask();
+    a renderer may hold lines back until the next ask() or flush(), so a
+    whole screen goes out at once.
+    """
+    
+    enabled = True  # False: display-only screens are skipped entirely
+    
+    def write(self, text: str = ""):
+        raise NotImplementedError
+    
+    def flush(self):
+        pass
+    
+    def ask(self, prompt: str) -> str:
+        raise NotImplementedError
+    
+    def pause(self, prompt: str = "\nPress Enter to continue..."):
+        self.ask(prompt)
+
+
+class TerminalRenderer(Renderer):
+    """Composes each screen in memory and writes it with a single call"""
+    
+    def __init__(self, stream=None):
+        self.stream = stream  # None: sys.stdout at flush time
+        self.lines: List[str] = []
+    
+    def write(self, text: str = ""):
+        self.lines.append(text)
+    
+    def _emit(self, text: str):
+        stream = self.stream or sys.stdout
+        stream.write(text)
+        stream.flush()
+    
+    def flush(self):
+        if self.lines:
+            self.lines.append("")
+            self._emit("\n".join(self.lines))
+            self.lines.clear()
+    
+    def ask(self, prompt: str) -> str:
+        self.lines.append(prompt)
+        self._emit("\n".join(self.lines))
+        self.lines.clear()
+        return input()
+
+
+class JSONRenderer(TerminalRenderer):
+    """Writes each screen as one JSON object per line: {"lines": [...]}
+    
+    Screens that end in a question also carry "prompt".
+    """
+    
+    def flush(self):
+        if self.lines:
+            self._emit(json.dumps({"lines": self.lines}) + "\n")
+            self.lines = []
+    
+    def ask(self, prompt: str) -> str:
+        self._emit(json.dumps({"lines": self.lines, "prompt": prompt}) + "\n")
+        self.lines = []
+        return input()
+
+
+class BufferedTextRenderer(Renderer):
+    """Keeps all output in memory and answers from a list of inputs
+    
+    Raises EOFError once the inputs run out, like input() at end of file.
+    """
+    
+    def __init__(self, inputs: Iterable[str] = ()):
+        self.output: List[str] = []
+        self.inputs = iter(inputs)
+    
+    @property
+    def text(self) -> str:
+        return "".join(self.output)
+    
+    def write(self, text: str = ""):
+        self.output.append(text + "\n")
+    
+    def ask(self, prompt: str) -> str:
+        self.output.append(prompt)
+        try:
+            return next(self.inputs)
+        except StopIteration:
+            raise EOFError from None
+
+
+class NullRenderer(BufferedTextRenderer):
+    """Discards all output; display-only screens are not even composed"""
+    
+    enabled = False
+    
+    def write(self, text: str = ""):
+        pass
+    
+    def ask(self, prompt: str) -> str:
+        try:
+            return next(self.inputs)
+        except StopIteration:
+            raise EOFError from None
+
+
+def journaled(method):
+    """Route a Game rule method through game.journal when one is attached"""
+    name = method.__name__
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        journal = self.journal
+        if journal is None:
+            return method(self, *args, **kwargs)
+        return journal.record(self, name, method, args, kwargs)
+    return wrapper
+
+
 class Game:
-    """Main game class"""
+    """Main game class
     
-    def __init__(self):
+    The rule methods (send_gift, resolve_raid, resolve_turn, ...) never touch
+    the console and return structured results, so a Game can be driven
+    headlessly. The *_menu methods, end_turn and play are the interactive
+    front-end built on top of them.
+    """
+    
+    # Snapshot of a new six-civilization world with neutral relations (see reset)
+    _pristine: Optional[GameSnapshot] = None
+    
+    def __init__(self, seed: Optional[int] = None, rng: Optional[random.Random] = None,
+                 prefetch: int = 0, renderer: Optional["Renderer"] = None,
+                 params: Optional[GameParams] = None, world_map: Optional[WorldMap] = None):
+        """Create a new world
+        
+        All randomness goes through self.rng, so two games built with the same
+        seed play out identically. Pass rng to supply a generator directly, or
+        prefetch > 0 to draw random numbers in blocks (see PrefetchRandom).
+        The front-end talks to renderer (default: TerminalRenderer). params
+        are the balance parameters (default: DEFAULT_PARAMS), world_map the
+        geography (default: the shared Eastern Mediterranean map).
+        """
+        self.seed = seed
+        if rng is not None:
+            self.rng = rng
+        elif prefetch > 0:
+            self.rng = PrefetchRandom(seed, block=prefetch)
+        else:
+            self.rng = random.Random(seed)
         self.turn = 1
         self.civilizations: Dict[str, Civilization] = {}
+        self.civ_index: Dict[str, int] = {}
+        self.relations = RelationshipMatrix()
         self.player_civ: Optional[Civilization] = None
         self.game_over = False
+        self.ai_policy: AIPolicy = RecruitPolicy()
+        self.ai_policies: Dict[str, AIPolicy] = {}
+        self.wars: Set[Tuple[int, int]] = set()
+        self.pending_raids: List[Tuple[str, str]] = []
+        self.market_orders: List[Order] = []
+        self.journal = None
+        self.profiler = None
+        self.renderer: Renderer = renderer or TerminalRenderer()
+        self.params = params or DEFAULT_PARAMS
+        self.event_table = self.params.event_table()
+        self.event_bounds = event_bounds(self.event_table)
+        self.world_map = world_map or eastern_mediterranean()
         self.initialize_civilizations()
     
     def initialize_civilizations(self):
         """Initialize all civilizations"""
-        civs_data = [
-            {
-                "name": "Mycenaean Greece",
-                "description": "The warrior culture of mainland Greece, ruling from fortified palaces.",
-                "resources": Resources(food=120, bronze=60, gold=70, tin=40, copper=40, population=1200),
-                "military": MilitaryForce(infantry=150, chariots=15, archers=60, navy=10)
-            },
-            {
-                "name": "Hittite Empire",
-                "description": "The powerful kingdom of Anatolia, masters of iron-working.",
-                "resources": Resources(food=150, bronze=80, gold=60, tin=50, copper=50, population=1500),
-                "military": MilitaryForce(infantry=200, chariots=25, archers=80, navy=5)
-            },
-            {
-                "name": "New Kingdom Egypt",
-                "description": "The ancient civilization of the Nile, wealthy but facing threats.",
-                "resources": Resources(food=200, bronze=70, gold=100, tin=35, copper=50, population=2000),
-                "military": MilitaryForce(infantry=180, chariots=20, archers=100, navy=15)
-            },
-            {
-                "name": "Ugarit",
-                "description": "A prosperous trading city-state on the Syrian coast.",
-                "resources": Resources(food=80, bronze=50, gold=80, tin=30, copper=30, population=800),
-                "military": MilitaryForce(infantry=80, chariots=8, archers=40, navy=12)
-            },
-            {
-                "name": "Cyprus",
-                "description": "Island kingdom rich in copper deposits.",
-                "resources": Resources(food=90, bronze=60, gold=60, tin=20, copper=80, population=900),
-                "military": MilitaryForce(infantry=90, chariots=5, archers=45, navy=15)
-            },
-            {
-                "name": "Assyria",
-                "description": "Rising power in northern Mesopotamia.",
-                "resources": Resources(food=130, bronze=70, gold=55, tin=45, copper=45, population=1300),
-                "military": MilitaryForce(infantry=160, chariots=18, archers=90, navy=3)
-            }
-        ]
-        
-        for civ_data in civs_data:
-            civ = Civilization(
-                name=civ_data["name"],
-                description=civ_data["description"],
-                resources=civ_data["resources"],
-                military=civ_data["military"]
-            )
+        self.add_civilizations(
+            Civilization(name=name, description=description,
+                         resources=Resources(*resources), military=MilitaryForce(*military))
+            for name, description, resources, military in STARTING_CIVILIZATIONS
+        )
+        self._draw_relations()
+    
+    def _draw_relations(self):
+        """Initialize relationships (slight bias towards neutral/friendly)"""
+        relations, n = self.relations, self.relations.size
+        values = relations.values
+        randint = self.rng.randint
+        for i in range(n):
+            for j in range(n):
+                if i != j:
+                    values[i * n + j] = randint(-20, 20)
+        relations.invalidate()
+    
+    def add_civilizations(self, civs: Iterable[Civilization]):
+        """Register civilizations with the world relationship matrix
+        
+        Any relationships already set on the new civilizations are copied
+        into the matrix; everything else starts neutral.
+        """
+        civs = list(civs)
+        pending = []
+        for civ in civs:
+            self.civ_index[civ.name] = len(self.civilizations)
             self.civilizations[civ.name] = civ
+            pending.append(dict(civ.relationships))
+        self.relations.resize(len(self.civilizations))
+        for civ, values in zip(civs, pending):
+            civ.relationships = RelationshipView(self.relations, self.civ_index[civ.name],
+                                                 self.civ_index)
+            for name, value in values.items():
+                if name in self.civ_index:
+                    civ.relationships[name] = value
+    
+    def set_player(self, civ_name: str) -> Civilization:
+        """Make the named civilization the player's civilization"""
+        self.player_civ = self.civilizations[civ_name]
+        self.player_civ.is_player = True
+        return self.player_civ
+    
+    def alive_rivals(self, civ: Optional[Civilization] = None) -> List[str]:
+        """Names of the living civilizations other than civ (default: player)"""
+        civ = civ or self.player_civ
+        return [name for name, other in self.civilizations.items()
+                if other.is_alive and other is not civ]
+    
+    def route_cost(self, a: str, b: str) -> Optional[int]:
+        """Route cost between two civilizations' homes; None if either is off the map"""
+        return self.world_map.civ_route_cost(a, b)
+    
+    def within_reach(self, civ: Civilization, target_name: str, limit: int) -> bool:
+        """Whether the target's home is within route cost limit of civ's (always true off the map)"""
+        cost = self.route_cost(civ.name, target_name)
+        return cost is None or cost <= limit
+    
+    def rivals_within(self, limit: int, civ: Optional[Civilization] = None) -> List[str]:
+        """Living rivals whose homes are within route cost limit, nearest first
+        
+        Found with a bounded search of the map around civ's home, so the cost
+        grows with the neighbourhood rather than the number of civilizations.
+        A civilization with no home on the map reaches every rival.
+        """
+        civ = civ or self.player_civ
+        reach = self.world_map.civs_within(civ.name, limit)
+        if reach is None:
+            return self.alive_rivals(civ)
+        civs = self.civilizations
+        return [name for name in sorted(reach, key=reach.get)
+                if name in civs and civs[name].is_alive]
+    
+    def raid_targets(self, civ: Optional[Civilization] = None) -> List[str]:
+        """Living rivals within params.raid_range"""
+        return self.rivals_within(self.params.raid_range, civ)
+    
+    def trade_partners(self, civ: Optional[Civilization] = None) -> List[str]:
+        """Living rivals within params.trade_range"""
+        return self.rivals_within(self.params.trade_range, civ)
+    
+    # ------------------------------------------------------------------
+    # Rules: pure state transitions, no console I/O
+    # ------------------------------------------------------------------
+    
+    @journaled
+    def send_gift(self, target_name: str, civ: Optional[Civilization] = None) -> ActionResult:
+        """Send gold (params.gift_cost) to improve relations with the target"""
+        civ = civ or self.player_civ
+        cost = self.params.gift_cost
+        if civ.resources.gold < cost:
+            return ActionResult(False, "Insufficient gold!")
+        civ.resources.gold -= cost
+        improvement = self.rng.randint(*self.params.gift_gain)
+        self.relations.adjust_mutual(self.civ_index[civ.name], self.civ_index[target_name],
+                                     improvement)
+        return ActionResult(True,
+                            f"You sent a valuable gift to {target_name}.\n"
+                            f"Relationship improved by {improvement}!",
+                            {"relationship": improvement})
+    
+    @journaled
+    def propose_alliance(self, target_name: str, civ: Optional[Civilization] = None) -> ActionResult:
+        """Propose an alliance; requires a Friendly relationship or better"""
+        civ = civ or self.player_civ
+        if civ.relationships.get(target_name, 0) < ALLIANCE_RELATIONSHIP:
+            return ActionResult(False, "Relationship not good enough for alliance!")
+        if self.rng.random() < 0.7:
+            self.relations.adjust_mutual(self.civ_index[civ.name],
+                                         self.civ_index[target_name], 25)
+            return ActionResult(True, f"{target_name} accepts your alliance!",
+                                {"relationship": 25})
+        return ActionResult(False, f"{target_name} declines your alliance proposal.")
+    
+    @journaled
+    def threaten(self, target_name: str, civ: Optional[Civilization] = None) -> ActionResult:
+        """Threaten the target, worsening relations"""
+        civ = civ or self.player_civ
+        change = self.rng.randint(-30, -10)
+        self.relations.adjust_mutual(self.civ_index[civ.name], self.civ_index[target_name],
+                                     change)
+        return ActionResult(True, f"You threatened {target_name}. They are not pleased.",
+                            {"relationship": change})
+    
+    @journaled
+    def request_aid(self, target_name: str, civ: Optional[Civilization] = None) -> ActionResult:
+        """Ask the target for food; requires a relationship of 50 or better"""
+        civ = civ or self.player_civ
+        if civ.relationships.get(target_name, 0) < AID_RELATIONSHIP:
+            return ActionResult(False, f"{target_name} refuses to send aid.")
+        aid = self.rng.randint(10, 30)
+        civ.resources.food += aid
+        return ActionResult(True, f"{target_name} sends {aid} food to assist you!",
+                            {"food": aid})
+    
+    @journaled
+    def establish_trade_route(self, target_name: str,
+                              civ: Optional[Civilization] = None) -> ActionResult:
+        """Pay 10 gold to open a trade route with the target"""
+        civ = civ or self.player_civ
+        if not self.within_reach(civ, target_name, self.params.trade_range):
+            return ActionResult(False, f"{target_name} is out of reach!")
+        if civ.resources.gold < TRADE_ROUTE_COST:
+            return ActionResult(False, "Insufficient gold!")
+        civ.resources.gold -= TRADE_ROUTE_COST
+        self.relations.adjust(self.civ_index[civ.name], self.civ_index[target_name], 10)
+        bonus = self.rng.randint(15, 30)
+        civ.resources.gold += bonus
+        return ActionResult(True, f"Trade route established! Gained {bonus} gold.",
+                            {"gold": bonus})
+    
+    @journaled
+    def trade_resources(self, offer: int, civ: Optional[Civilization] = None) -> ActionResult:
+        """Accept one of the fixed-rate params.trade_offers (0-based index)"""
+        civ = civ or self.player_civ
+        offers = self.params.trade_offers
+        if not 0 <= offer < len(offers):
+            return ActionResult(False, "Insufficient resources!")
+        give, give_amount, get, get_amount = offers[offer]
+        if getattr(civ.resources, give) < give_amount:
+            return ActionResult(False, "Insufficient resources!")
+        setattr(civ.resources, give, getattr(civ.resources, give) - give_amount)
+        setattr(civ.resources, get, getattr(civ.resources, get) + get_amount)
+        return ActionResult(True,
+                            f"Traded {give_amount} {give.capitalize()} for "
+                            f"{get_amount} {get.capitalize()}",
+                            {give: -give_amount, get: get_amount})
+    
+    @journaled
+    def produce_bronze(self, civ: Optional[Civilization] = None) -> ActionResult:
+        """Combine tin and copper into bronze"""
+        civ = civ or self.player_civ
+        produced = civ.produce_bronze()
+        return ActionResult(True, f"Produced {produced} bronze from tin and copper!",
+                            {"bronze": produced})
+    
+    @journaled
+    def recruit(self, unit: str, amount: int, civ: Optional[Civilization] = None) -> ActionResult:
+        """Recruit units of the given type, paying params.unit_costs per unit"""
+        civ = civ or self.player_civ
+        costs = self.params.unit_costs
+        if unit not in costs or amount <= 0:
+            return ActionResult(False, "Invalid recruitment order!")
+        bronze, gold = costs[unit]
+        cost = Resources(food=0, bronze=bronze * amount, gold=gold * amount, tin=0, copper=0)
+        if not civ.resources.can_afford(cost):
+            return ActionResult(False, "Insufficient resources!")
+        civ.resources.subtract(cost)
+        setattr(civ.military, unit, getattr(civ.military, unit) + amount)
+        return ActionResult(True, f"Recruited {amount} {unit}!", {unit: amount})
+    
+    @journaled
+    def declare_war(self, target_name: str, civ: Optional[Civilization] = None) -> ActionResult:
+        """Declare war, dropping relations on both sides to -100
+        
+        The armies then meet at the end of every turn (phase_battles) until
+        one side collapses or diplomacy lifts either side out of Hostile.
+        """
+        civ = civ or self.player_civ
+        i, j = self.civ_index[civ.name], self.civ_index[target_name]
+        self.relations.set_mutual(i, j, -100)
+        self.wars.add((min(i, j), max(i, j)))
+        return ActionResult(True, f"{civ.name} declares war on {target_name}!")
+    
+    @journaled
+    def invest(self, sector: str, civ: Optional[Civilization] = None) -> ActionResult:
+        """Invest gold in agriculture (50 gold) or technology (60 gold)"""
+        civ = civ or self.player_civ
+        if sector == "agriculture" and civ.resources.gold >= INVEST_COSTS[sector]:
+            civ.resources.gold -= INVEST_COSTS[sector]
+            civ.resources.food += 40
+            return ActionResult(True, "Invested in agriculture! Food stores increased.",
+                                {"food": 40})
+        if sector == "technology" and civ.resources.gold >= INVEST_COSTS[sector]:
+            civ.resources.gold -= INVEST_COSTS[sector]
+            civ.technology_level += 5
+            return ActionResult(True, "Invested in technology! Tech level increased.",
+                                {"technology_level": 5})
+        return ActionResult(False, "Insufficient gold!")
+    
+    @journaled
+    def hold_festival(self, civ: Optional[Civilization] = None) -> ActionResult:
+        """Spend 30 gold on a festival to raise prestige"""
+        civ = civ or self.player_civ
+        if civ.resources.gold < FESTIVAL_COST:
+            return ActionResult(False, "Insufficient gold!")
+        civ.resources.gold -= FESTIVAL_COST
+        civ.prestige += 10
+        return ActionResult(True, "Held a grand festival! Prestige increased.",
+                            {"prestige": 10})
+    
+    @journaled
+    def resolve_raid(self, target_name: str, civ: Optional[Civilization] = None) -> RaidResult:
+        """Resolve a raid by civ (default: player) on the target"""
+        civ = civ or self.player_civ
+        target = self.civilizations[target_name]
+        if not self.within_reach(civ, target_name, self.params.raid_range):
+            return RaidResult(civ.name, target_name, 0, 0, False,
+                              refusal=f"{target_name} is out of reach!")
+        
+        our_strength = civ.military.get_total_strength()
+        their_defense = target.military.get_total_strength() // 2  # Defenders have advantage
+        result = RaidResult(civ.name, target_name, our_strength, their_defense,
+                            our_strength > their_defense)
+        
+        if result.victory:
+            result.loot_gold = self.rng.randint(20, 50)
+            result.loot_food = self.rng.randint(10, 30)
+            civ.resources.gold += result.loot_gold
+            civ.resources.food += result.loot_food
+            
+            result.attacker_losses = self.rng.randint(5, 15)
+            result.defender_losses = self.rng.randint(10, 25)
+            civ.military.infantry = max(0, civ.military.infantry - result.attacker_losses)
+            target.military.infantry = max(0, target.military.infantry - result.defender_losses)
+            
+            self.relations.adjust_mutual(self.civ_index[civ.name],
+                                         self.civ_index[target_name], -30)
+            civ.prestige += 5
+        else:
+            result.attacker_losses = self.rng.randint(15, 30)
+            result.defender_losses = self.rng.randint(5, 10)
+            civ.military.infantry = max(0, civ.military.infantry - result.attacker_losses)
+            target.military.infantry = max(0, target.military.infantry - result.defender_losses)
+            
+            self.relations.adjust_pair(self.civ_index[civ.name],
+                                       self.civ_index[target_name], -20, -10)
+            civ.prestige -= 5
+        return result
+    
+    @journaled
+    def queue_raid(self, target_name: str, civ: Optional[Civilization] = None) -> ActionResult:
+        """Send a raid on the target, resolved with every other battle at the end of the turn"""
+        civ = civ or self.player_civ
+        target = self.civilizations.get(target_name)
+        if target is None or target is civ or not target.is_alive:
+            return ActionResult(False, "Invalid raid target!")
+        if not self.within_reach(civ, target_name, self.params.raid_range):
+            return ActionResult(False, f"{target_name} is out of reach!")
+        self.pending_raids.append((civ.name, target_name))
+        return ActionResult(True, f"{civ.name} musters a raid on {target_name}.")
+    
+    @journaled
+    def place_order(self, good: str, side: str, lots: int, price: int,
+                    civ: Optional[Civilization] = None) -> ActionResult:
+        """Post a limit order for lots of a good, cleared with every other order at end of turn
+        
+        Orders are checked against what civ holds now and again, in the order
+        they were placed, when the market clears.
+        """
+        civ = civ or self.player_civ
+        if good not in MARKET_GOODS or side not in ("buy", "sell") or lots <= 0 or price <= 0:
+            return ActionResult(False, "Invalid order!")
+        if side == "sell":
+            if getattr(civ.resources, good) < lots * self.params.market_lot:
+                return ActionResult(False, "Insufficient resources!")
+        elif civ.resources.gold < lots * price:
+            return ActionResult(False, "Insufficient gold!")
+        self.market_orders.append(Order(civ.name, good, side, lots, price))
+        return ActionResult(True, f"Order posted: {side} {lots * self.params.market_lot} "
+                                  f"{good} at {price} gold per {self.params.market_lot}.")
+    
+    def strike_event(self, civ: Civilization, spec: EventSpec,
+                     names: Optional[List[str]] = None) -> EventResult:
+        """Draw and apply one event's effects to civ
+
+        names lists the civilizations in civ_index order; callers striking
+        many civilizations pass it so a relational target is found without
+        rebuilding the list.
+        """
+        defended = (spec.defended_by is not None and
+                    getattr(civ.military, spec.defended_by[0]) >= spec.defended_by[1])
+        values, target = draw_event_effects(self.rng, spec, defended,
+                                            self.civ_index[civ.name], len(self.civilizations))
+        if target is not None:
+            target = (names or list(self.civilizations))[target]
+        res, mil = civ.resources, civ.military
+        for name, change in values.items():
+            if name == "relationship":
+                civ.modify_relationship(target, change)
+            elif name in RESOURCE_FIELDS:
+                setattr(res, name, getattr(res, name) + change)
+            elif name in MILITARY_FIELDS:
+                setattr(mil, name, max(0, getattr(mil, name) + change))
+            else:
+                setattr(civ, name, getattr(civ, name) + change)
+        return EventResult(spec.event, civ.name, values, target, defended)
+    
+    def resolve_events(self) -> List[EventResult]:
+        """Roll random events for every living civilization
         
-        # Initialize relationships (slight bias towards neutral/friendly)
+        One batched draw decides, for all civilizations at once, whether and
+        which row of the event table (params.event_table()) strikes; effect
+        amounts are only drawn for the civilizations that were hit.
+        """
+        civs = [civ for civ in self.civilizations.values() if civ.is_alive]
+        rand = self.rng.random
+        rolls = [rand() for _ in civs]
+        table, bounds = self.event_table, self.event_bounds
+        limit = bounds[-1]
+        names = list(self.civilizations)
+        return [self.strike_event(civ, table[bisect_right(bounds, roll)], names)
+                for civ, roll in zip(civs, rolls) if roll < limit]
+    
+    @journaled
+    def resolve_random_event(self) -> Optional[EventResult]:
+        """Roll for a random event striking the player's civilization only"""
+        civ = self.player_civ
+        if civ is None:
+            return None
+        roll = self.rng.random()
+        if roll >= self.event_bounds[-1]:
+            return None
+        return self.strike_event(civ, self.event_table[bisect_right(self.event_bounds, roll)])
+    
+    def policy_for(self, civ: Civilization) -> AIPolicy:
+        """The AI policy controlling civ"""
+        return self.ai_policies.get(civ.name, self.ai_policy)
+    
+    def ai_turn(self, civ: Civilization):
+        """AI turn for other civilizations: production, upkeep, then policy actions"""
+        # Produce bronze
+        civ.produce_bronze()
+        
+        # Add some base production
+        randint = self.rng.randint
+        civ.resources.food += randint(20, 40)
+        civ.resources.gold += randint(10, 20)
+        civ.resources.tin += randint(5, 15)
+        civ.resources.copper += randint(5, 15)
+        
+        # Consume resources
+        civ.consume_resources(self.params.food_divisor, self.params.upkeep_divisor)
+        
+        # Policy actions
+        self.ai_policies.get(civ.name, self.ai_policy).act(self, civ)
+    
+    # End-of-turn phases, in order: (phase name, Game method taking the TurnResult)
+    TURN_PHASES = (
+        ("production", "phase_production"),
+        ("bronze", "phase_bronze"),
+        ("consumption", "phase_consumption"),
+        ("ai_turns", "phase_ai_turns"),
+        ("market", "phase_market"),
+        ("battles", "phase_battles"),
+        ("defeats", "phase_defeats"),
+        ("events", "phase_events"),
+        ("victory", "phase_victory"),
+    )
+    
+    @journaled
+    def resolve_turn(self) -> TurnResult:
+        """Process all end-of-turn rules and advance the turn counter"""
+        result = TurnResult(turn=self.turn)
+        if self.profiler is not None:
+            self.profiler.profile_turn(self, result)
+        else:
+            for _, method in self.TURN_PHASES:
+                getattr(self, method)(result)
+        self.turn += 1
+        return result
+    
+    def phase_production(self, result: TurnResult):
+        """Base production for the player's civilization"""
+        player = self.player_civ
+        if player is not None:
+            res = player.resources
+            base_food = 30 + (player.technology_level // 10)
+            base_gold = 15 + (player.prestige // 10)
+            res.food += base_food
+            res.gold += base_gold
+            res.tin += 10
+            res.copper += 10
+            result.production = {"food": base_food, "gold": base_gold, "tin": 10, "copper": 10}
+    
+    def phase_bronze(self, result: TurnResult):
+        """Produce bronze automatically for the player if possible"""
+        if self.player_civ is not None:
+            result.bronze_made = self.player_civ.produce_bronze()
+    
+    def phase_consumption(self, result: TurnResult):
+        """Player population and military upkeep"""
+        if self.player_civ is not None:
+            result.starvation = self.player_civ.consume_resources(self.params.food_divisor,
+                                                                  self.params.upkeep_divisor)
+    
+    def phase_ai_turns(self, result: TurnResult):
+        """ai_turn for every living AI civilization"""
+        player = self.player_civ
         for civ in self.civilizations.values():
-            for other_civ_name in self.civilizations.keys():
-                if other_civ_name != civ.name:
-                    civ.relationships[other_civ_name] = random.randint(-20, 20)
+            if civ is not player and civ.is_alive:
+                self.ai_turn(civ)
+    
+    def phase_market(self, result: TurnResult):
+        """Clear this turn's market orders in one call auction per good (lbac_market)"""
+        if self.market_orders:
+            from lbac_market import clear_market
+            orders, self.market_orders = self.market_orders, []
+            result.market = clear_market(self, orders)
+    
+    def phase_battles(self, result: TurnResult):
+        """Queued raids and war engagements, all resolved at once (lbac_battle)"""
+        if self.wars:
+            civs = list(self.civilizations.values())
+            self.wars = {pair for pair in self.wars if self.at_war(civs, *pair)}
+        if self.pending_raids or self.wars:
+            from lbac_battle import resolve_battles
+            index = self.civ_index
+            raids = [(index[a], index[t]) for a, t in self.pending_raids]
+            self.pending_raids = []
+            result.raids, result.engagements = resolve_battles(self, raids, sorted(self.wars))
+    
+    def at_war(self, civs: List[Civilization], i: int, j: int) -> bool:
+        """Whether civs[i] and civs[j] (civ_index order) are still at war"""
+        relations = self.relations
+        return (civs[i].is_alive and civs[j].is_alive and
+                relations.status(i, j) is RelationshipStatus.HOSTILE and
+                relations.status(j, i) is RelationshipStatus.HOSTILE)
+    
+    def phase_defeats(self, result: TurnResult):
+        """Collapse civilizations with no population left"""
+        for name, civ in self.civilizations.items():
+            if civ.resources.population <= 0 and civ.is_alive:
+                civ.is_alive = False
+                result.collapsed.append(name)
+                if civ.is_player:
+                    self.game_over = True
+    
+    def phase_events(self, result: TurnResult):
+        """Random events for every living civilization"""
+        result.events = self.resolve_events()
+        player = self.player_civ
+        if player is not None:
+            result.event = next((e for e in result.events if e.civ == player.name), None)
+    
+    def phase_victory(self, result: TurnResult):
+        """Check the player's victory from params.victory_turn on"""
+        if self.turn >= self.params.victory_turn:
+            result.victory = self.resolve_victory()
+    
+    def resolve_victory(self) -> Optional[str]:
+        """Return "survival" or "prestige" if the player has won, else None"""
+        if self.player_civ is None:
+            return None
+        alive_count = sum(1 for civ in self.civilizations.values() if civ.is_alive)
+        
+        if alive_count == 1 and self.player_civ.is_alive:
+            self.game_over = True
+            return "survival"
+        if self.player_civ.prestige >= self.params.prestige_victory:
+            self.game_over = True
+            return "prestige"
+        return None
+    
+    def world_status(self) -> List[Dict[str, object]]:
+        """Summary of every living civilization"""
+        return [{"name": name,
+                 "is_player": civ.is_player,
+                 "population": civ.resources.population,
+                 "military_strength": civ.military.get_total_strength(),
+                 "prestige": civ.prestige}
+                for name, civ in self.civilizations.items() if civ.is_alive]
+    
+    def snapshot(self, include_rng: bool = True) -> GameSnapshot:
+        """Capture the complete mutable state of the game
+        
+        Copying the generator state is the most expensive part of a snapshot;
+        tree searches that reseed the RNG themselves can pass include_rng=False.
+        """
+        values = [self.turn, int(self.game_over)]
+        extend = values.extend
+        for civ in self.civilizations.values():
+            r, m = civ.resources, civ.military
+            extend((r.food, r.bronze, r.gold, r.tin, r.copper, r.population,
+                    m.infantry, m.chariots, m.archers, m.navy,
+                    civ.prestige, civ.technology_level, civ.is_player, civ.is_alive))
+        for pair in sorted(self.wars):
+            extend(pair)
+        return GameSnapshot(array("q", values), self.relations.values.tobytes(),
+                            self.rng.getstate() if include_rng else None)
+    
+    def restore(self, snap: GameSnapshot):
+        """Return to a snapshot taken from this game (or a fork of it)"""
+        state = snap.state
+        self.turn = state[0]
+        self.game_over = bool(state[1])
+        self.player_civ = None
+        k = 2
+        for civ in self.civilizations.values():
+            r, m = civ.resources, civ.military
+            (r.food, r.bronze, r.gold, r.tin, r.copper, r.population,
+             m.infantry, m.chariots, m.archers, m.navy,
+             civ.prestige, civ.technology_level, is_player, is_alive) = state[k:k + 14]
+            civ.is_player = bool(is_player)
+            civ.is_alive = bool(is_alive)
+            if is_player and self.player_civ is None:
+                self.player_civ = civ
+            k += 14
+        wars = state[k:]
+        self.wars = set(zip(wars[::2], wars[1::2]))
+        self.pending_raids = []
+        self.market_orders = []
+        self.relations.load(snap.relations)
+        if snap.rng_state is not None:
+            self.rng.setstate(snap.rng_state)
+    
+    def fork(self, snap: Optional[GameSnapshot] = None) -> "Game":
+        """Independent copy of this game, optionally positioned at snap"""
+        clone = copy.copy(self)
+        clone.ai_policies = dict(self.ai_policies)
+        clone.journal = None
+        clone.profiler = None
+        if isinstance(self.rng, PrefetchRandom):
+            clone.rng = PrefetchRandom(0, block=self.rng.block)
+        else:
+            clone.rng = type(self.rng)(0)
+        clone.rng.setstate(self.rng.getstate())
+        clone.civilizations = {}
+        clone.civ_index = {}
+        clone.relations = RelationshipMatrix()
+        clone.add_civilizations(
+            Civilization(name=civ.name, description=civ.description,
+                         resources=Resources(), military=MilitaryForce())
+            for civ in self.civilizations.values()
+        )
+        clone.restore(snap if snap is not None else self.snapshot(include_rng=False))
+        return clone
+    
+    def reset(self, seed: Optional[int] = None) -> "Game":
+        """Start over in place with the world Game(seed) would build
+        
+        Keeps the renderer, params, world map, generator type and profiler;
+        drops the journal and any AI policies set. The six starting
+        civilizations are rewritten from a cached snapshot of a new world and
+        only the relationships are drawn again, so a reset costs a fraction
+        of building a Game. A game whose civilizations were changed is
+        rebuilt from scratch.
+        """
+        self.seed = seed
+        self.rng.seed(seed)
+        self.ai_policy = RecruitPolicy()
+        self.ai_policies = {}
+        self.journal = None
+        if tuple(self.civilizations) != STARTING_NAMES:
+            self.civilizations = {}
+            self.civ_index = {}
+            self.relations = RelationshipMatrix()
+            self.initialize_civilizations()
+            return self
+        pristine = Game._pristine
+        if pristine is None:
+            state = Game(seed=0).snapshot(include_rng=False).state
+            pristine = Game._pristine = GameSnapshot(state, bytes(len(STARTING_NAMES) ** 2), None)
+        self.restore(pristine)
+        self._draw_relations()
+        return self
+    
+    def simulate(self, max_turns: int = 50) -> List[TurnResult]:
+        """Run end-of-turn processing headlessly until game over or max_turns"""
+        results = []
+        while not self.game_over and self.turn <= max_turns:
+            results.append(self.resolve_turn())
+        return results
+    
+    # ------------------------------------------------------------------
+    # Interactive front-end
+    # ------------------------------------------------------------------
     
     def choose_civilization(self):
         """Let player choose their civilization"""
-        print("\n" + "="*70)
-        print("LATE BRONZE AGE COLLAPSE")
-        print("A Game of Diplomacy, Trade, and Survival")
-        print("="*70)
-        print("\nThe year is 1200 BC. Great civilizations face unprecedented crisis.")
-        print("Choose your civilization:\n")
+        out = self.renderer
+        out.write("\n" + "="*70)
+        out.write("LATE BRONZE AGE COLLAPSE")
+        out.write("A Game of Diplomacy, Trade, and Survival")
+        out.write("="*70)
+        out.write("\nThe year is 1200 BC. Great civilizations face unprecedented crisis.")
+        out.write("Choose your civilization:\n")
         
         civ_list = list(self.civilizations.values())
         for i, civ in enumerate(civ_list, 1):
-            print(f"{i}. {civ.name}")
-            print(f"   {civ.description}")
-            print(f"   Population: {civ.resources.population}, Military Strength: {civ.military.get_total_strength()}")
-            print()
+            out.write(f"{i}. {civ.name}")
+            out.write(f"   {civ.description}")
+            out.write(f"   Population: {civ.resources.population}, Military Strength: {civ.military.get_total_strength()}")
+            out.write()
         
         while True:
             try:
-                choice = input("Select civilization (1-{}): ".format(len(civ_list)))
+                choice = out.ask("Select civilization (1-{}): ".format(len(civ_list)))
                 choice_num = int(choice)
                 if 1 <= choice_num <= len(civ_list):
-                    self.player_civ = civ_list[choice_num - 1]
-                    self.player_civ.is_player = True
-                    print(f"\nYou have chosen to lead {self.player_civ.name}!")
-                    print("Your goal: Survive the coming collapse and emerge stronger.\n")
-                    input("Press Enter to begin...")
+                    self.set_player(civ_list[choice_num - 1].name)
+                    out.write(f"\nYou have chosen to lead {self.player_civ.name}!")
+                    out.write("Your goal: Survive the coming collapse and emerge stronger.\n")
+                    out.ask("Press Enter to begin...")
                     break
                 else:
-                    print(f"Please enter a number between 1 and {len(civ_list)}")
+                    out.write(f"Please enter a number between 1 and {len(civ_list)}")
             except (ValueError, EOFError):
-                print(f"Please enter a number between 1 and {len(civ_list)}")
+                out.write(f"Please enter a number between 1 and {len(civ_list)}")
     
     def display_status(self):
         """Display current status"""
-        print("\n" + "="*70)
-        print(f"Turn {self.turn} - {self.player_civ.name}")
-        print("="*70)
-        
-        print("\nRESOURCES:")
-        print(f"  Population: {self.player_civ.resources.population}")
-        print(f"  Food: {self.player_civ.resources.food}")
-        print(f"  Bronze: {self.player_civ.resources.bronze}")
-        print(f"  Gold: {self.player_civ.resources.gold}")
-        print(f"  Tin: {self.player_civ.resources.tin} | Copper: {self.player_civ.resources.copper}")
-        
-        print("\nMILITARY:")
-        print(f"  Infantry: {self.player_civ.military.infantry}")
-        print(f"  Chariots: {self.player_civ.military.chariots}")
-        print(f"  Archers: {self.player_civ.military.archers}")
-        print(f"  Navy: {self.player_civ.military.navy}")
-        print(f"  Total Strength: {self.player_civ.military.get_total_strength()}")
-        
-        print(f"\nPRESTIGE: {self.player_civ.prestige}")
-        print(f"TECHNOLOGY: {self.player_civ.technology_level}")
+        out = self.renderer
+        if not out.enabled:
+            return
+        out.write("\n" + "="*70)
+        out.write(f"Turn {self.turn} - {self.player_civ.name}")
+        out.write("="*70)
+        
+        out.write("\nRESOURCES:")
+        out.write(f"  Population: {self.player_civ.resources.population}")
+        out.write(f"  Food: {self.player_civ.resources.food}")
+        out.write(f"  Bronze: {self.player_civ.resources.bronze}")
+        out.write(f"  Gold: {self.player_civ.resources.gold}")
+        out.write(f"  Tin: {self.player_civ.resources.tin} | Copper: {self.player_civ.resources.copper}")
+        
+        out.write("\nMILITARY:")
+        out.write(f"  Infantry: {self.player_civ.military.infantry}")
+        out.write(f"  Chariots: {self.player_civ.military.chariots}")
+        out.write(f"  Archers: {self.player_civ.military.archers}")
+        out.write(f"  Navy: {self.player_civ.military.navy}")
+        out.write(f"  Total Strength: {self.player_civ.military.get_total_strength()}")
+        
+        out.write(f"\nPRESTIGE: {self.player_civ.prestige}")
+        out.write(f"TECHNOLOGY: {self.player_civ.technology_level}")
     
     def display_relationships(self):
         """Display diplomatic relationships"""
-        print("\nDIPLOMATIC RELATIONS:")
+        out = self.renderer
+        if not out.enabled:
+            return
+        out.write("\nDIPLOMATIC RELATIONS:")
         for civ_name, civ in self.civilizations.items():
             if civ_name != self.player_civ.name and civ.is_alive:
                 status = self.player_civ.get_relationship_status(civ_name)
                 value = self.player_civ.relationships[civ_name]
-                print(f"  {civ_name}: {status.value} ({value:+d})")
+                out.write(f"  {civ_name}: {status.value} ({value:+d})")
     
     def main_menu(self) -> str:
         """Display main action menu"""
-        print("\n" + "-"*70)
-        print("ACTIONS:")
-        print("1. Diplomacy")
-        print("2. Trade")
-        print("3. Military")
-        print("4. Internal Affairs")
-        print("5. View Detailed Status")
-        print("6. End Turn")
-        print("7. Quit Game")
-        
-        choice = input("\nChoose action: ").strip()
+        out = self.renderer
+        out.write("\n" + "-"*70)
+        out.write("ACTIONS:")
+        out.write("1. Diplomacy")
+        out.write("2. Trade")
+        out.write("3. Military")
+        out.write("4. Internal Affairs")
+        out.write("5. View Detailed Status")
+        out.write("6. End Turn")
+        out.write("7. Quit Game")
+        
+        choice = out.ask("\nChoose action: ").strip()
         return choice
     
+    def choose_target(self, prompt: str, targets: Optional[List[str]] = None) -> Optional[str]:
+        """Ask the player to pick one of targets (default: every living rival)
+        
+        Returns None if there are none or the choice is cancelled.
+        """
+        out = self.renderer
+        alive_civs = self.alive_rivals() if targets is None else targets
+        if not alive_civs:
+            if targets is not None:
+                out.write("\nNo civilization is within reach.")
+            return None
+        out.write(f"\n{prompt}")
+        player = self.player_civ.name
+        for i, civ_name in enumerate(alive_civs, 1):
+            cost = self.route_cost(player, civ_name)
+            out.write(f"{i}. {civ_name}" if cost is None else f"{i}. {civ_name} (route {cost})")
+        
+        idx = int(out.ask("Select: ")) - 1
+        if 0 <= idx < len(alive_civs):
+            return alive_civs[idx]
+        return None
+    
     def diplomacy_menu(self):
         """Handle diplomatic actions"""
-        print("\n--- DIPLOMACY ---")
-        alive_civs = [name for name, civ in self.civilizations.items() 
-                     if civ.is_alive and name != self.player_civ.name]
+        out = self.renderer
+        out.write("\n--- DIPLOMACY ---")
+        alive_civs = self.alive_rivals()
         
         if not alive_civs:
-            print("No other civilizations remain!")
+            out.write("No other civilizations remain!")
             return
         
-        print("\nChoose civilization to interact with:")
+        out.write("\nChoose civilization to interact with:")
         for i, civ_name in enumerate(alive_civs, 1):
             status = self.player_civ.get_relationship_status(civ_name)
-            print(f"{i}. {civ_name} - {status.value}")
-        print(f"{len(alive_civs) + 1}. Back")
+            out.write(f"{i}. {civ_name} - {status.value}")
+        out.write(f"{len(alive_civs) + 1}. Back")
         
         try:
-            choice = int(input("\nSelect: "))
+            choice = int(out.ask("\nSelect: "))
             if 1 <= choice <= len(alive_civs):
                 target_name = alive_civs[choice - 1]
                 self.diplomatic_actions(target_name)
@@ -317,445 +1807,248 @@ class Game:
     
     def diplomatic_actions(self, target_name: str):
         """Perform diplomatic action with target civilization"""
-        target = self.civilizations[target_name]
+        out = self.renderer
         status = self.player_civ.get_relationship_status(target_name)
         
-        print(f"\n--- Diplomacy with {target_name} ---")
-        print(f"Current Relationship: {status.value} ({self.player_civ.relationships[target_name]:+d})")
-        print("\n1. Send Gift (costs 20 gold)")
-        print("2. Propose Alliance (requires Friendly or better)")
-        print("3. Threaten (may worsen relations)")
-        print("4. Request Aid")
-        print("5. Back")
+        out.write(f"\n--- Diplomacy with {target_name} ---")
+        out.write(f"Current Relationship: {status.value} ({self.player_civ.relationships[target_name]:+d})")
+        out.write(f"\n1. Send Gift (costs {self.params.gift_cost} gold)")
+        out.write("2. Propose Alliance (requires Friendly or better)")
+        out.write("3. Threaten (may worsen relations)")
+        out.write("4. Request Aid")
+        out.write("5. Back")
         
+        actions = {
+            1: self.send_gift,
+            2: self.propose_alliance,
+            3: self.threaten,
+            4: self.request_aid,
+        }
         try:
-            action = int(input("\nChoose action: "))
-            
-            if action == 1:
-                if self.player_civ.resources.gold >= 20:
-                    self.player_civ.resources.gold -= 20
-                    improvement = random.randint(10, 25)
-                    self.player_civ.modify_relationship(target_name, improvement)
-                    target.modify_relationship(self.player_civ.name, improvement)
-                    print(f"\nYou sent a valuable gift to {target_name}.")
-                    print(f"Relationship improved by {improvement}!")
-                else:
-                    print("\nInsufficient gold!")
-            
-            elif action == 2:
-                if self.player_civ.relationships[target_name] >= 25:
-                    if random.random() < 0.7:
-                        self.player_civ.modify_relationship(target_name, 25)
-                        target.modify_relationship(self.player_civ.name, 25)
-                        print(f"\n{target_name} accepts your alliance!")
-                    else:
-                        print(f"\n{target_name} declines your alliance proposal.")
-                else:
-                    print("\nRelationship not good enough for alliance!")
-            
-            elif action == 3:
-                change = random.randint(-30, -10)
-                self.player_civ.modify_relationship(target_name, change)
-                target.modify_relationship(self.player_civ.name, change)
-                print(f"\nYou threatened {target_name}. They are not pleased.")
-            
-            elif action == 4:
-                if self.player_civ.relationships[target_name] >= 50:
-                    aid = random.randint(10, 30)
-                    self.player_civ.resources.food += aid
-                    print(f"\n{target_name} sends {aid} food to assist you!")
-                else:
-                    print(f"\n{target_name} refuses to send aid.")
-        
+            action = int(out.ask("\nChoose action: "))
+            if action in actions:
+                out.write(f"\n{actions[action](target_name).message}")
         except (ValueError, EOFError):
             pass
     
     def trade_menu(self):
         """Handle trading actions"""
-        print("\n--- TRADE ---")
-        print("1. Establish Trade Route")
-        print("2. Trade Resources")
-        print("3. Produce Bronze (combine Tin + Copper)")
-        print("4. Back")
+        out = self.renderer
+        out.write("\n--- TRADE ---")
+        out.write("1. Establish Trade Route")
+        out.write("2. Trade Resources")
+        out.write("3. Produce Bronze (combine Tin + Copper)")
+        out.write("4. Post Market Order (cleared at end of turn)")
+        out.write("5. Back")
         
         try:
-            choice = int(input("\nChoose action: "))
+            choice = int(out.ask("\nChoose action: "))
             
             if choice == 1:
-                alive_civs = [name for name, civ in self.civilizations.items() 
-                            if civ.is_alive and name != self.player_civ.name]
-                if alive_civs:
-                    print("\nEstablish trade route with:")
-                    for i, civ_name in enumerate(alive_civs, 1):
-                        print(f"{i}. {civ_name}")
-                    
-                    idx = int(input("Select: ")) - 1
-                    if 0 <= idx < len(alive_civs):
-                        target_name = alive_civs[idx]
-                        if self.player_civ.resources.gold >= 10:
-                            self.player_civ.resources.gold -= 10
-                            self.player_civ.modify_relationship(target_name, 10)
-                            bonus = random.randint(15, 30)
-                            self.player_civ.resources.gold += bonus
-                            print(f"\nTrade route established! Gained {bonus} gold.")
-                        else:
-                            print("\nInsufficient gold!")
+                target_name = self.choose_target("Establish trade route with:",
+                                                 self.trade_partners())
+                if target_name:
+                    out.write(f"\n{self.establish_trade_route(target_name).message}")
             
             elif choice == 2:
-                print("\nTrade your resources:")
-                print("1. Trade 20 Food for 10 Gold")
-                print("2. Trade 15 Bronze for 20 Gold")
-                print("3. Trade 25 Gold for 15 Tin")
-                print("4. Trade 25 Gold for 15 Copper")
+                out.write("\nTrade your resources:")
+                for i, (give, give_amount, get, get_amount) in enumerate(self.params.trade_offers, 1):
+                    out.write(f"{i}. Trade {give_amount} {give.capitalize()} for "
+                          f"{get_amount} {get.capitalize()}")
                 
-                trade_choice = int(input("Select: "))
-                
-                if trade_choice == 1 and self.player_civ.resources.food >= 20:
-                    self.player_civ.resources.food -= 20
-                    self.player_civ.resources.gold += 10
-                    print("\nTraded 20 Food for 10 Gold")
-                elif trade_choice == 2 and self.player_civ.resources.bronze >= 15:
-                    self.player_civ.resources.bronze -= 15
-                    self.player_civ.resources.gold += 20
-                    print("\nTraded 15 Bronze for 20 Gold")
-                elif trade_choice == 3 and self.player_civ.resources.gold >= 25:
-                    self.player_civ.resources.gold -= 25
-                    self.player_civ.resources.tin += 15
-                    print("\nTraded 25 Gold for 15 Tin")
-                elif trade_choice == 4 and self.player_civ.resources.gold >= 25:
-                    self.player_civ.resources.gold -= 25
-                    self.player_civ.resources.copper += 15
-                    print("\nTraded 25 Gold for 15 Copper")
-                else:
-                    print("\nInsufficient resources!")
+                trade_choice = int(out.ask("Select: "))
+                out.write(f"\n{self.trade_resources(trade_choice - 1).message}")
             
             elif choice == 3:
-                produced = self.player_civ.produce_bronze()
-                print(f"\nProduced {produced} bronze from tin and copper!")
+                out.write(f"\n{self.produce_bronze().message}")
+            
+            elif choice == 4:
+                lot = self.params.market_lot
+                out.write(f"\nMarket goods (reference gold per {lot}):")
+                for i, good in enumerate(MARKET_GOODS, 1):
+                    out.write(f"{i}. {good.capitalize()} ({self.params.market_prices[good]})")
+                good_choice = int(out.ask("Select good: "))
+                if not 1 <= good_choice <= len(MARKET_GOODS):
+                    return
+                good = MARKET_GOODS[good_choice - 1]
+                side = "buy" if out.ask("Buy or sell? (b/s): ").strip().lower() == "b" else "sell"
+                lots = int(out.ask(f"How many lots of {lot}? "))
+                price = int(out.ask("Limit price (gold per lot): "))
+                out.write(f"\n{self.place_order(good, side, lots, price).message}")
         
         except (ValueError, EOFError):
             pass
     
     def military_menu(self):
         """Handle military actions"""
-        print("\n--- MILITARY ---")
-        print("1. Recruit Units")
-        print("2. Launch Raid")
-        print("3. Declare War")
-        print("4. Back")
+        out = self.renderer
+        out.write("\n--- MILITARY ---")
+        out.write("1. Recruit Units")
+        out.write("2. Launch Raid")
+        out.write("3. Declare War")
+        out.write("4. Back")
         
         try:
-            choice = int(input("\nChoose action: "))
+            choice = int(out.ask("\nChoose action: "))
             
             if choice == 1:
-                print("\nRecruit Units:")
-                print(f"1. Infantry (10 bronze, 5 gold) - Current: {self.player_civ.military.infantry}")
-                print(f"2. Chariots (25 bronze, 15 gold) - Current: {self.player_civ.military.chariots}")
-                print(f"3. Archers (8 bronze, 8 gold) - Current: {self.player_civ.military.archers}")
-                print(f"4. Navy (20 bronze, 20 gold) - Current: {self.player_civ.military.navy}")
+                costs = self.params.unit_costs
+                units = list(costs)
+                out.write("\nRecruit Units:")
+                for i, unit in enumerate(units, 1):
+                    bronze, gold = costs[unit]
+                    out.write(f"{i}. {unit.capitalize()} ({bronze} bronze, {gold} gold) - "
+                          f"Current: {getattr(self.player_civ.military, unit)}")
                 
-                unit_choice = int(input("Select unit type: "))
-                amount = int(input("How many? "))
+                unit_choice = int(out.ask("Select unit type: "))
+                amount = int(out.ask("How many? "))
                 
-                if unit_choice == 1:
-                    cost = Resources(bronze=10*amount, gold=5*amount)
-                    if self.player_civ.resources.can_afford(cost):
-                        self.player_civ.resources.subtract(cost)
-                        self.player_civ.military.infantry += amount
-                        print(f"\nRecruited {amount} infantry!")
-                    else:
-                        print("\nInsufficient resources!")
-                
-                elif unit_choice == 2:
-                    cost = Resources(bronze=25*amount, gold=15*amount)
-                    if self.player_civ.resources.can_afford(cost):
-                        self.player_civ.resources.subtract(cost)
-                        self.player_civ.military.chariots += amount
-                        print(f"\nRecruited {amount} chariots!")
-                    else:
-                        print("\nInsufficient resources!")
+                if 1 <= unit_choice <= len(units):
+                    out.write(f"\n{self.recruit(units[unit_choice - 1], amount).message}")
             
             elif choice == 2:
-                alive_civs = [name for name, civ in self.civilizations.items() 
-                            if civ.is_alive and name != self.player_civ.name]
-                if alive_civs:
-                    print("\nRaid which civilization:")
-                    for i, civ_name in enumerate(alive_civs, 1):
-                        print(f"{i}. {civ_name}")
-                    
-                    idx = int(input("Select: ")) - 1
-                    if 0 <= idx < len(alive_civs):
-                        target_name = alive_civs[idx]
-                        self.conduct_raid(target_name)
+                target_name = self.choose_target("Raid which civilization:",
+                                                 self.raid_targets())
+                if target_name:
+                    self.conduct_raid(target_name)
             
             elif choice == 3:
-                alive_civs = [name for name, civ in self.civilizations.items() 
-                            if civ.is_alive and name != self.player_civ.name]
-                if alive_civs:
-                    print("\nDeclare war on:")
-                    for i, civ_name in enumerate(alive_civs, 1):
-                        print(f"{i}. {civ_name}")
-                    
-                    idx = int(input("Select: ")) - 1
-                    if 0 <= idx < len(alive_civs):
-                        target_name = alive_civs[idx]
-                        self.player_civ.relationships[target_name] = -100
-                        self.civilizations[target_name].relationships[self.player_civ.name] = -100
-                        print(f"\n{self.player_civ.name} declares war on {target_name}!")
+                target_name = self.choose_target("Declare war on:")
+                if target_name:
+                    out.write(f"\n{self.declare_war(target_name).message}")
         
         except (ValueError, EOFError):
             pass
     
     def conduct_raid(self, target_name: str):
         """Conduct a raid on another civilization"""
-        target = self.civilizations[target_name]
-        
-        our_strength = self.player_civ.military.get_total_strength()
-        their_defense = target.military.get_total_strength() // 2  # Defenders have advantage
-        
-        print(f"\nRaiding {target_name}...")
-        print(f"Your strength: {our_strength}")
-        print(f"Their defense: {their_defense}")
+        out = self.renderer
+        result = self.resolve_raid(target_name)
         
-        if our_strength > their_defense:
-            # Successful raid
-            loot_gold = random.randint(20, 50)
-            loot_food = random.randint(10, 30)
-            self.player_civ.resources.gold += loot_gold
-            self.player_civ.resources.food += loot_food
-            
-            # Losses
-            our_losses = random.randint(5, 15)
-            their_losses = random.randint(10, 25)
-            
-            self.player_civ.military.infantry -= our_losses
-            target.military.infantry -= their_losses
-            
-            print(f"\nVictory! Plundered {loot_gold} gold and {loot_food} food!")
-            print(f"Your losses: {our_losses} infantry")
-            print(f"Their losses: {their_losses} infantry")
-            
-            # Relationship damage
-            self.player_civ.modify_relationship(target_name, -30)
-            target.modify_relationship(self.player_civ.name, -30)
-            
-            self.player_civ.prestige += 5
-        else:
-            # Failed raid
-            our_losses = random.randint(15, 30)
-            their_losses = random.randint(5, 10)
-            
-            self.player_civ.military.infantry -= our_losses
-            target.military.infantry -= their_losses
-            
-            print(f"\nDefeat! The raid failed!")
-            print(f"Your losses: {our_losses} infantry")
-            print(f"Their losses: {their_losses} infantry")
-            
-            self.player_civ.modify_relationship(target_name, -20)
-            target.modify_relationship(self.player_civ.name, -10)
-            
-            self.player_civ.prestige -= 5
+        out.write(f"\nRaiding {target_name}...")
+        cost = self.route_cost(self.player_civ.name, target_name)
+        if cost is not None:
+            out.write(f"Route cost: {cost}")
+        out.write(f"Your strength: {result.attacker_strength}")
+        out.write(f"Their defense: {result.defender_strength}")
+        out.write(f"\n{result.message}")
     
     def internal_affairs_menu(self):
         """Handle internal affairs"""
-        print("\n--- INTERNAL AFFAIRS ---")
-        print("1. Invest in Agriculture (50 gold -> increase food production)")
-        print("2. Invest in Technology (60 gold -> increase tech level)")
-        print("3. Hold Festival (30 gold -> increase prestige)")
-        print("4. Back")
+        out = self.renderer
+        out.write("\n--- INTERNAL AFFAIRS ---")
+        out.write("1. Invest in Agriculture (50 gold -> increase food production)")
+        out.write("2. Invest in Technology (60 gold -> increase tech level)")
+        out.write("3. Hold Festival (30 gold -> increase prestige)")
+        out.write("4. Back")
         
         try:
-            choice = int(input("\nChoose action: "))
+            choice = int(out.ask("\nChoose action: "))
             
-            if choice == 1 and self.player_civ.resources.gold >= 50:
-                self.player_civ.resources.gold -= 50
-                self.player_civ.resources.food += 40
-                print("\nInvested in agriculture! Food stores increased.")
-            elif choice == 2 and self.player_civ.resources.gold >= 60:
-                self.player_civ.resources.gold -= 60
-                self.player_civ.technology_level += 5
-                print("\nInvested in technology! Tech level increased.")
-            elif choice == 3 and self.player_civ.resources.gold >= 30:
-                self.player_civ.resources.gold -= 30
-                self.player_civ.prestige += 10
-                print("\nHeld a grand festival! Prestige increased.")
-            else:
-                print("\nInsufficient gold!")
+            if choice == 1:
+                out.write(f"\n{self.invest('agriculture').message}")
+            elif choice == 2:
+                out.write(f"\n{self.invest('technology').message}")
+            elif choice == 3:
+                out.write(f"\n{self.hold_festival().message}")
         except (ValueError, EOFError):
             pass
     
     def random_event(self):
         """Generate a random event"""
-        if random.random() < 0.3:  # 30% chance per turn
-            event = random.choice(list(EventType))
-            
-            print("\n" + "!"*70)
-            print("MAJOR EVENT!")
-            print("!"*70)
-            
-            if event == EventType.DROUGHT:
-                food_loss = random.randint(30, 60)
-                self.player_civ.resources.food -= food_loss
-                print(f"\nDROUGHT strikes your lands! Lost {food_loss} food.")
-            
-            elif event == EventType.EARTHQUAKE:
-                gold_loss = random.randint(20, 40)
-                pop_loss = random.randint(50, 150)
-                self.player_civ.resources.gold -= gold_loss
-                self.player_civ.resources.population -= pop_loss
-                print(f"\nEARTHQUAKE devastates your cities!")
-                print(f"Lost {gold_loss} gold and {pop_loss} population.")
-            
-            elif event == EventType.SEA_PEOPLES:
-                print("\nSEA PEOPLES raid your coasts!")
-                if self.player_civ.military.navy >= 10:
-                    print("Your navy repels the attack!")
-                    self.player_civ.prestige += 10
-                else:
-                    losses = random.randint(20, 40)
-                    self.player_civ.military.infantry -= losses
-                    self.player_civ.resources.gold -= 30
-                    print(f"They plunder your lands! Lost {losses} infantry and 30 gold.")
-            
-            elif event == EventType.PLAGUE:
-                pop_loss = random.randint(100, 300)
-                self.player_civ.resources.population -= pop_loss
-                print(f"\nPLAGUE sweeps through your population! Lost {pop_loss} people.")
-            
-            elif event == EventType.GOOD_HARVEST:
-                food_gain = random.randint(40, 80)
-                self.player_civ.resources.food += food_gain
-                print(f"\nGOOD HARVEST! Gained {food_gain} food.")
-            
-            elif event == EventType.TRADE_OPPORTUNITY:
-                gold_gain = random.randint(30, 60)
-                self.player_civ.resources.gold += gold_gain
-                print(f"\nTRADE OPPORTUNITY! Merchants bring {gold_gain} gold.")
-            
-            elif event == EventType.DIPLOMATIC_INCIDENT:
-                civs = [name for name in self.civilizations.keys() 
-                       if name != self.player_civ.name]
-                if civs:
-                    target = random.choice(civs)
-                    change = random.randint(-20, 20)
-                    self.player_civ.modify_relationship(target, change)
-                    print(f"\nDIPLOMATIC INCIDENT with {target}!")
-                    if change > 0:
-                        print(f"Relations improved by {change}.")
-                    else:
-                        print(f"Relations worsened by {abs(change)}.")
-            
-            input("\nPress Enter to continue...")
+        event = self.resolve_random_event()
+        if event is not None:
+            self.show_event(event)
     
-    def ai_turn(self, civ: Civilization):
-        """Simple AI turn for other civilizations"""
-        # Produce bronze
-        civ.produce_bronze()
-        
-        # Add some base production
-        civ.resources.food += random.randint(20, 40)
-        civ.resources.gold += random.randint(10, 20)
-        civ.resources.tin += random.randint(5, 15)
-        civ.resources.copper += random.randint(5, 15)
-        
-        # Consume resources
-        civ.consume_resources()
-        
-        # Random actions
-        if random.random() < 0.3:
-            # Recruit units
-            if civ.resources.bronze >= 10 and civ.resources.gold >= 5:
-                civ.resources.bronze -= 10
-                civ.resources.gold -= 5
-                civ.military.infantry += 1
+    def show_event(self, event: EventResult):
+        """Announce a random event to the player"""
+        out = self.renderer
+        out.write("\n" + "!"*70)
+        out.write("MAJOR EVENT!")
+        out.write("!"*70)
+        if event.message:
+            out.write(f"\n{event.message}")
+        out.pause()
     
     def end_turn(self):
         """End current turn and process turn logic"""
-        print("\nEnding turn...")
-        
-        # Player production
-        base_food = 30 + (self.player_civ.technology_level // 10)
-        base_gold = 15 + (self.player_civ.prestige // 10)
-        base_tin = 10
-        base_copper = 10
+        out = self.renderer
+        out.write("\nEnding turn...")
+        result = self.resolve_turn()
         
-        self.player_civ.resources.food += base_food
-        self.player_civ.resources.gold += base_gold
-        self.player_civ.resources.tin += base_tin
-        self.player_civ.resources.copper += base_copper
+        prod = result.production
+        out.write(f"\nProduced: {prod['food']} food, {prod['gold']} gold, "
+              f"{prod['tin']} tin, {prod['copper']} copper")
+        if result.bronze_made > 0:
+            out.write(f"Automatically produced {result.bronze_made} bronze from tin and copper")
+        if result.starvation:
+            out.write(f"\n{result.starvation}")
         
-        print(f"\nProduced: {base_food} food, {base_gold} gold, {base_tin} tin, {base_copper} copper")
-        
-        # Produce bronze automatically if possible
-        bronze_made = self.player_civ.produce_bronze()
-        if bronze_made > 0:
-            print(f"Automatically produced {bronze_made} bronze from tin and copper")
-        
-        # Consume resources
-        message = self.player_civ.consume_resources()
-        if message:
-            print(f"\n{message}")
-        
-        # AI turns
-        for name, civ in self.civilizations.items():
-            if name != self.player_civ.name and civ.is_alive:
-                self.ai_turn(civ)
+        player = self.player_civ.name
+        for clearing in result.market.values():
+            lots = clearing.fills.get(player)
+            if lots and clearing.price is not None:
+                verb = "Bought" if lots > 0 else "Sold"
+                out.write(f"\n{verb} {abs(lots) * self.params.market_lot} {clearing.good} "
+                          f"at {clearing.price} gold per {self.params.market_lot}")
+        for raid in result.raids:
+            if player in (raid.attacker, raid.target):
+                out.write(f"\n{raid.attacker} raids {raid.target}!\n{raid.message}")
+        for engagement in result.engagements:
+            if player in (engagement.side_a, engagement.side_b):
+                out.write(f"\n{engagement.message}")
         
-        # Check for defeats
-        for name, civ in self.civilizations.items():
-            if civ.resources.population <= 0 and civ.is_alive:
-                civ.is_alive = False
-                print(f"\n{name} has collapsed!")
-                if civ.is_player:
-                    self.game_over = True
+        for name in result.collapsed:
+            out.write(f"\n{name} has collapsed!")
         
-        # Random event
-        self.random_event()
+        if result.event is not None:
+            self.show_event(result.event)
         
-        # Check victory conditions
-        if self.turn >= 50:
-            self.check_victory()
+        if result.victory is not None:
+            self.show_victory(result.victory)
         
-        self.turn += 1
-        input("\nPress Enter to continue...")
+        out.pause()
     
     def check_victory(self):
         """Check if player has won"""
-        alive_count = sum(1 for civ in self.civilizations.values() if civ.is_alive)
-        
-        if alive_count == 1 and self.player_civ.is_alive:
-            print("\n" + "="*70)
-            print("VICTORY!")
-            print("="*70)
-            print(f"\nYou are the sole surviving civilization!")
-            print(f"Final score: {self.player_civ.prestige + self.player_civ.resources.population // 10}")
-            self.game_over = True
-        elif self.player_civ.prestige >= 100:
-            print("\n" + "="*70)
-            print("PRESTIGE VICTORY!")
-            print("="*70)
-            print(f"\nYour civilization's prestige is unmatched!")
-            self.game_over = True
+        victory = self.resolve_victory()
+        if victory is not None:
+            self.show_victory(victory)
+    
+    def show_victory(self, victory: str):
+        """Announce the player's victory"""
+        out = self.renderer
+        out.write("\n" + "="*70)
+        if victory == "survival":
+            out.write("VICTORY!")
+            out.write("="*70)
+            out.write(f"\nYou are the sole surviving civilization!")
+            out.write(f"Final score: {self.player_civ.prestige + self.player_civ.resources.population // 10}")
+        else:
+            out.write("PRESTIGE VICTORY!")
+            out.write("="*70)
+            out.write(f"\nYour civilization's prestige is unmatched!")
     
     def view_detailed_status(self):
         """View detailed status of all civilizations"""
-        print("\n" + "="*70)
-        print("WORLD STATUS")
-        print("="*70)
-        
-        for name, civ in self.civilizations.items():
-            if civ.is_alive:
-                marker = " (YOU)" if civ.is_player else ""
-                print(f"\n{name}{marker}:")
-                print(f"  Population: {civ.resources.population}")
-                print(f"  Military Strength: {civ.military.get_total_strength()}")
-                print(f"  Prestige: {civ.prestige}")
+        out = self.renderer
+        if out.enabled:
+            out.write("\n" + "="*70)
+            out.write("WORLD STATUS")
+            out.write("="*70)
+            
+            for status in self.world_status():
+                marker = " (YOU)" if status["is_player"] else ""
+                out.write(f"\n{status['name']}{marker}:")
+                out.write(f"  Population: {status['population']}")
+                out.write(f"  Military Strength: {status['military_strength']}")
+                out.write(f"  Prestige: {status['prestige']}")
         
-        input("\nPress Enter to continue...")
+        out.pause()
     
     def play(self):
         """Main game loop"""
+        out = self.renderer
         self.choose_civilization()
         
         while not self.game_over:
@@ -777,15 +2070,50 @@ class Game:
             elif choice == "6":
                 self.end_turn()
             elif choice == "7":
-                print("\nThanks for playing!")
+                out.write("\nThanks for playing!")
                 break
         
         if self.game_over and not self.player_civ.is_alive:
-            print("\n" + "="*70)
-            print("GAME OVER")
-            print("="*70)
-            print("\nYour civilization has fallen to the Bronze Age Collapse.")
-            print("History will remember your struggles...")
+            out.write("\n" + "="*70)
+            out.write("GAME OVER")
+            out.write("="*70)
+            out.write("\nYour civilization has fallen to the Bronze Age Collapse.")
+            out.write("History will remember your struggles...")
+        out.flush()
+
+
+class GamePool:
+    """Hands out Game instances and takes them back for reuse
+    
+    acquire(seed) returns a game in the state Game(seed) would build: a
+    recycled one reset in place when any are free, else a new one. Every
+    game of a pool shares its params, world map and prefetch setting; at
+    most max_free released games are kept.
+    """
+    
+    def __init__(self, params: Optional[GameParams] = None,
+                 world_map: Optional[WorldMap] = None, prefetch: int = 0, max_free: int = 64):
+        self.params = params
+        self.world_map = world_map
+        self.prefetch = prefetch
+        self.max_free = max_free
+        self.free: List[Game] = []
+        self.created = 0
+        self.reused = 0
+    
+    def acquire(self, seed: Optional[int] = None) -> Game:
+        """A game starting from seed"""
+        if self.free:
+            self.reused += 1
+            return self.free.pop().reset(seed)
+        self.created += 1
+        return Game(seed=seed, prefetch=self.prefetch, params=self.params,
+                    world_map=self.world_map)
+    
+    def release(self, game: Game):
+        """Give a game back; it must not be used again until acquired"""
+        if len(self.free) < self.max_free:
+            self.free.append(game)
 
 
 def main():
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Append-only action journal and deterministic replay for LBAC
+
+A Journal attached to a Game streams one compact JSON line per record to an
+append-only log:
+
+    H  header: seed, balance parameters, civilizations, world map, starting
+       state and generator state
+    P  the AI policy of every civilization, whenever it changes
+    A  a rule method call (player or AI): turn, civilization, method, arguments
+    E  a random event that struck a civilization
+    T  end of a turn, with a hash of the resulting game state
+
+Lines are collected in memory and written in one call whenever more than
+buffer_size bytes are pending, so the journal costs one write per few
+hundred records rather than one per action.
+
+replay() rebuilds the game from the header and re-applies the log without any
+console I/O: player actions are called directly, civilizations on the
+built-in policies (PassivePolicy, RecruitPolicy, TraderPolicy) re-run them, and every other
+policy (e.g. MCTSPolicy) is replaced by the actions it was recorded taking.
+Such policies must not draw from game.rng outside the rule methods they call.
+The state hash is checked after every turn.
+
+Usage:
+    python3 lbac_journal.py game.lbj            # verify a whole log
+    python3 lbac_journal.py game.lbj --turn 20  # state after turn 20
+"""
+
+import argparse
+import base64
+import hashlib
+import inspect
+import json
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from lbac_game import (
+    Game, Civilization, AIPolicy, PassivePolicy, RecruitPolicy, TraderPolicy, GameSnapshot,
+    PrefetchRandom, DEFAULT_PARAMS
+)
+from lbac_map import WorldMap, eastern_mediterranean
+
+
+JOURNAL_VERSION = 1
+
+# Policies the replayer re-runs instead of replaying their recorded actions
+REPLAY_POLICIES = {cls.__name__: cls for cls in (PassivePolicy, RecruitPolicy, TraderPolicy)}
+
+
+def state_hash(game: Game) -> str:
+    """Short digest of the complete game state (generator state excluded)"""
+    data = game.snapshot(include_rng=False).to_bytes()
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def _tuples(value):
+    """JSON lists back into the nested tuples random.setstate expects"""
+    if isinstance(value, list):
+        return tuple(_tuples(item) for item in value)
+    return value
+
+
+class Journal:
+    """Append-only log of one game; attach with Journal(path).attach(game)"""
+
+    def __init__(self, path: str, buffer_size: int = 64 * 1024):
+        self.path = path
+        self.buffer_size = buffer_size
+        self._file = open(path, "ab")
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._in_turn = False
+        self._depth = 0
+        self._policies: Optional[Dict[str, Optional[str]]] = None
+        self._params: Dict[str, List[str]] = {}
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def write(self, record: dict):
+        """Queue one record, flushing once the buffer is full"""
+        line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+        self._pending.append(line)
+        self._pending_bytes += len(line)
+        if self._pending_bytes >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write every queued record to the log"""
+        if self._pending:
+            self._file.write(b"".join(self._pending))
+            self._file.flush()
+            self._pending.clear()
+            self._pending_bytes = 0
+
+    def close(self):
+        """Flush and close the log"""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def attach(self, game: Game) -> "Journal":
+        """Start journaling game from its current state"""
+        rng = game.rng
+        self.write({
+            "k": "H", "v": JOURNAL_VERSION, "seed": game.seed,
+            "params": game.params.to_dict(),
+            "civs": list(game.civilizations),
+            "map": _map_record(game.world_map),
+            "prefetch": rng.block if isinstance(rng, PrefetchRandom) else 0,
+            "state": base64.b64encode(game.snapshot(include_rng=False).to_bytes()).decode(),
+            "rng": rng.getstate(),
+            "h": state_hash(game),
+        })
+        game.journal = self
+        return self
+
+    def detach(self, game: Game):
+        """Stop journaling game and flush the log"""
+        game.journal = None
+        self.flush()
+
+    # ------------------------------------------------------------------
+    # Recording (called by Game rule methods)
+    # ------------------------------------------------------------------
+
+    def record(self, game: Game, name: str, method, args: tuple, kwargs: dict):
+        """Run a rule method and journal the call"""
+        if self._depth:
+            return method(game, *args, **kwargs)
+        if name == "resolve_turn":
+            return self._record_turn(game, method)
+
+        self._depth += 1
+        try:
+            result = method(game, *args, **kwargs)
+        finally:
+            self._depth -= 1
+
+        params = self._params.get(name)
+        if params is None:
+            params = list(inspect.signature(method).parameters)[1:]
+            self._params[name] = params
+        values = dict(zip(params, args))
+        values.update(kwargs)
+        civ = None
+        if "civ" in params:
+            civ = values.pop("civ", None) or game.player_civ
+        record = {"k": "A", "t": game.turn, "c": civ.name if civ else None,
+                  "m": name, "a": [values[p] for p in params if p in values]}
+        if self._in_turn:
+            record["ai"] = 1
+        self.write(record)
+        return result
+
+    def _record_turn(self, game: Game, method):
+        policies = {}
+        for civ in game.civilizations.values():
+            if civ is not game.player_civ:
+                policy = game.policy_for(civ)
+                known = REPLAY_POLICIES.get(type(policy).__name__)
+                policies[civ.name] = type(policy).__name__ if known is type(policy) else None
+        if policies != self._policies:
+            self._policies = policies
+            self.write({"k": "P", "t": game.turn, "p": policies})
+
+        self._in_turn = True
+        try:
+            result = method(game)
+        finally:
+            self._in_turn = False
+
+        for event in result.events:
+            self.write({"k": "E", "t": result.turn, "c": event.civ,
+                        "e": event.event.value, "v": event.values})
+        self.write({"k": "T", "t": result.turn, "h": state_hash(game)})
+        return result
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+
+
+def read_journal(path: str) -> Iterator[dict]:
+    """Records of a journal, in order"""
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class ScriptedPolicy(AIPolicy):
+    """Re-applies the actions a civilization was recorded taking this turn"""
+
+    def __init__(self):
+        self.actions: Dict[str, List[Tuple[str, list]]] = {}
+
+    def act(self, game: Game, civ: Civilization):
+        for method, args in self.actions.pop(civ.name, ()):
+            getattr(game, method)(*args, civ=civ)
+
+
+def _map_record(world_map: WorldMap) -> dict:
+    """The header's description of a world map: the historical one by name, others in full"""
+    if world_map is eastern_mediterranean():
+        return {"name": "eastern_mediterranean"}
+    return world_map.to_dict()
+
+
+def _load_map(record: Optional[dict]) -> WorldMap:
+    if record is None or record.get("name") == "eastern_mediterranean":
+        return eastern_mediterranean()
+    return WorldMap.from_dict(record)
+
+
+def _start_game(header: dict) -> Game:
+    game = Game(seed=header["seed"], prefetch=header["prefetch"],
+                params=DEFAULT_PARAMS.override(header.get("params", {})),
+                world_map=_load_map(header.get("map")))
+    if list(game.civilizations) != header["civs"]:
+        raise ValueError("Journal was recorded with a different set of civilizations")
+    state = GameSnapshot.from_bytes(base64.b64decode(header["state"]))
+    game.restore(state)
+    game.rng.setstate(_tuples(header["rng"]))
+    return game
+
+
+def replay(path: str, until_turn: Optional[int] = None, verify: bool = True) -> Game:
+    """Rebuild the game recorded in a journal
+
+    Returns the state after turn until_turn has been resolved (default: the
+    end of the log). With verify, the state hash is checked at every turn
+    and a ValueError raised on the first divergence.
+    """
+    records = read_journal(path)
+    header = next(records, None)
+    if header is None or header.get("k") != "H":
+        raise ValueError(f"{path} is not an LBAC journal")
+    if header["v"] != JOURNAL_VERSION:
+        raise ValueError(f"Unsupported journal version {header['v']}")
+    game = _start_game(header)
+    if verify and state_hash(game) != header["h"]:
+        raise ValueError("Journal header does not match its starting state")
+
+    scripted = ScriptedPolicy()
+    scripted_civs = set()
+    for record in records:
+        kind = record["k"]
+        if kind == "A":
+            if record.get("ai"):
+                if record["c"] in scripted_civs:
+                    scripted.actions.setdefault(record["c"], []).append(
+                        (record["m"], record["a"]))
+                continue
+            kwargs = {"civ": game.civilizations[record["c"]]} if record["c"] else {}
+            getattr(game, record["m"])(*record["a"], **kwargs)
+        elif kind == "P":
+            scripted_civs = {name for name, policy in record["p"].items() if policy is None}
+            game.ai_policies = {name: REPLAY_POLICIES[policy]() if policy else scripted
+                                for name, policy in record["p"].items()}
+        elif kind == "T":
+            game.resolve_turn()
+            if verify and state_hash(game) != record["h"]:
+                raise ValueError(f"Replay diverged from the journal at turn {record['t']}")
+            if until_turn is not None and record["t"] >= until_turn:
+                break
+    return game
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Replay and verify an LBAC journal")
+    parser.add_argument("path", help="journal file")
+    parser.add_argument("--turn", type=int, default=None, help="stop after this turn")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    game = replay(args.path, args.turn)
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {game.turn - 1} turns in {elapsed * 1000:.1f} ms (all hashes verified)")
+    for status in game.world_status():
+        print(f"  {status['name']}: population {status['population']}, "
+              f"strength {status['military_strength']}, prestige {status['prestige']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Legal-action masks for LBAC
+
+legal_mask(game) answers, for every civilization at once, which typed
+actions (lbac_actions) the rules would accept right now: the action passes
+validate() and the rule method's cost and relationship checks. It says
+nothing about chance (an alliance can still be declined, a raid lost).
+
+The mask covers two kinds of action:
+
+    targeted    one kind per TARGETED_KINDS class, aimed at each
+                civilization; bytes of N x N per kind, kind-major:
+                targeted[k * N * N + i * N + j] is 1 if civilization i may
+                take kind k against civilization j
+    own         the untargeted actions of own_actions(params) (every trade
+                offer, bronze production, recruiting recruit_amount of each
+                unit, each investment, a festival); civilization-major:
+                own[i * U + u] is 1 if civilization i may take own action u
+
+The targeted part takes len(TARGETED_KINDS) bytes per ordered pair of
+civilizations, so it suits worlds of up to a few thousand civilizations.
+
+Market orders are not in the mask: whether one is accepted depends on its
+lots and price, so validate() and Game.place_order decide.
+
+The mask is built from whole-world matrices rather than by trying actions:
+relationship thresholds are one bytes.translate of the N x N relationship
+matrix, reach comes from WorldMap.reach_matrix (cached per map), and the
+per-row conditions (the actor is alive, can pay) are combined with those
+matrices by big-integer AND, so the targeted part runs at C speed. The own
+part compares each civilization's stocks against one row of minimum stocks
+per action.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Type
+
+from lbac_actions import (
+    Action, SendGift, ProposeAlliance, Threaten, RequestAid, EstablishTradeRoute,
+    TradeResources, ProduceBronze, Recruit, Raid, QueueRaid, DeclareWar, Invest, HoldFestival,
+    INVEST_SECTORS
+)
+from lbac_game import (
+    Game, GameParams, SLOTS, TRADE_ROUTE_COST, FESTIVAL_COST, INVEST_COSTS,
+    ALLIANCE_RELATIONSHIP, AID_RELATIONSHIP
+)
+
+
+TARGETED_KINDS: Tuple[Type[Action], ...] = (
+    SendGift, ProposeAlliance, Threaten, RequestAid, EstablishTradeRoute,
+    Raid, QueueRaid, DeclareWar,
+)
+
+# Stocks an own action can require, in the order of its minimums row
+_STOCKS = ("food", "bronze", "gold", "tin", "copper")
+_ANY = float("-inf")
+
+
+def _at_least(threshold: int) -> bytes:
+    """bytes.translate table: int8 value (as unsigned byte) -> 1 if >= threshold"""
+    return bytes((b - 256 if b >= 128 else b) >= threshold for b in range(256))
+
+
+_ALLIANCE_TABLE = _at_least(ALLIANCE_RELATIONSHIP)
+_AID_TABLE = _at_least(AID_RELATIONSHIP)
+
+
+def _and(*masks: bytes) -> bytes:
+    """Cell-wise AND of equal-length 0/1 byte strings"""
+    result = int.from_bytes(masks[0], "little")
+    for mask in masks[1:]:
+        result &= int.from_bytes(mask, "little")
+    return result.to_bytes(len(masks[0]), "little")
+
+
+def own_actions(params: GameParams, recruit_amount: int = 1) -> Tuple[Action, ...]:
+    """The untargeted actions covered by the mask, in mask order"""
+    return (tuple(TradeResources(offer) for offer in range(len(params.trade_offers)))
+            + (ProduceBronze(),)
+            + tuple(Recruit(unit, recruit_amount) for unit in params.unit_costs)
+            + tuple(Invest(sector) for sector in INVEST_SECTORS)
+            + (HoldFestival(),))
+
+
+def _minimums(action: Action, params: GameParams) -> Tuple[float, ...]:
+    """Least stock of each of _STOCKS an own action needs (the rule method's check)"""
+    needs = _requirement(action, params)
+    return tuple(needs.get(name, _ANY) for name in _STOCKS)
+
+
+def _requirement(action: Action, params: GameParams) -> Dict[str, int]:
+    if isinstance(action, TradeResources):
+        give, amount = params.trade_offers[action.offer][:2]
+        return {give: amount}
+    if isinstance(action, Recruit):
+        # Resources.can_afford also refuses while any stock is negative
+        bronze, gold = params.unit_costs[action.unit]
+        return {"food": 0, "bronze": bronze * action.amount, "gold": gold * action.amount,
+                "tin": 0, "copper": 0}
+    if isinstance(action, Invest):
+        return {"gold": INVEST_COSTS[action.sector]}
+    if isinstance(action, HoldFestival):
+        return {"gold": FESTIVAL_COST}
+    return {}
+
+
+# (id(params), recruit_amount) -> (params, own actions, their minimums rows)
+_OWN_PLANS: Dict[Tuple[int, int], tuple] = {}
+
+
+def _own_plan(params: GameParams, recruit_amount: int) -> tuple:
+    """own_actions and their minimums, cached per parameter set"""
+    key = (id(params), recruit_amount)
+    plan = _OWN_PLANS.get(key)
+    if plan is None or plan[0] is not params:
+        own = own_actions(params, recruit_amount)
+        if len(_OWN_PLANS) >= 64:
+            _OWN_PLANS.clear()
+        plan = _OWN_PLANS[key] = (params, own, [_minimums(action, params) for action in own])
+    return plan
+
+
+@dataclass(**SLOTS)
+class LegalMask:
+    """Legal actions of every civilization (see the module docstring for the layout)"""
+    civs: Tuple[str, ...]
+    own: Tuple[Action, ...]
+    targeted: bytes
+    own_mask: bytes
+    player: Optional[str] = None
+
+    def targets(self, civ: str, kind: Type[Action]) -> List[str]:
+        """Civilizations civ may take kind against"""
+        n = len(self.civs)
+        start = TARGETED_KINDS.index(kind) * n * n + self.civs.index(civ) * n
+        row = self.targeted[start:start + n]
+        return [name for name, legal in zip(self.civs, row) if legal]
+
+    def allows(self, action: Action) -> bool:
+        """Whether action is legal; KeyError if it is not covered by the mask"""
+        n = len(self.civs)
+        civ = self.player if action.civ is None else action.civ
+        if civ not in self.civs:
+            return False
+        i = self.civs.index(civ)
+        if type(action) in TARGETED_KINDS:
+            if action.target not in self.civs:
+                return False
+            k = TARGETED_KINDS.index(type(action))
+            return bool(self.targeted[k * n * n + i * n + self.civs.index(action.target)])
+        bare = action if action.civ is None else type(action)(*action.args())
+        try:
+            u = self.own.index(bare)
+        except ValueError:
+            raise KeyError(action) from None
+        return bool(self.own_mask[i * len(self.own) + u])
+
+    def row(self, civ: str) -> bytes:
+        """civ's whole mask: every targeted kind against each civilization, then own actions"""
+        n = len(self.civs)
+        i = self.civs.index(civ)
+        parts = [self.targeted[k * n * n + i * n:k * n * n + (i + 1) * n]
+                 for k in range(len(TARGETED_KINDS))]
+        u = len(self.own)
+        parts.append(self.own_mask[i * u:(i + 1) * u])
+        return b"".join(parts)
+
+
+def legal_mask(game: Game, recruit_amount: int = 1) -> LegalMask:
+    """Legal-action mask of every civilization of game (see the module docstring)"""
+    params = game.params
+    civs = list(game.civilizations.values())
+    names = tuple(game.civilizations)
+    n = len(civs)
+    _, own, minimums = _own_plan(params, recruit_amount)
+
+    if game.game_over:
+        alive = bytes(n)
+    else:
+        alive = bytes(civ.is_alive for civ in civs)
+    ones, zeros = b"\x01" * n, bytes(n)
+
+    # Rows whose actor is alive, columns whose target is alive and not the actor
+    valid = bytearray(b"".join(alive if actor else zeros for actor in alive))
+    valid[::n + 1] = zeros
+    valid = bytes(valid)
+
+    def rows(flags) -> bytes:
+        """Broadcast one flag per actor across its row"""
+        return b"".join(ones if flag else zeros for flag in flags)
+
+    gold = [civ.resources.gold for civ in civs]
+    relations = game.relations.values.tobytes()
+    world_map = game.world_map
+    raid_reach = world_map.reach_matrix(names, params.raid_range)
+    trade_reach = world_map.reach_matrix(names, params.trade_range)
+    raid = _and(valid, raid_reach)
+    kinds = {
+        SendGift: _and(valid, rows(g >= params.gift_cost for g in gold)),
+        ProposeAlliance: _and(valid, relations.translate(_ALLIANCE_TABLE)),
+        Threaten: valid,
+        RequestAid: _and(valid, relations.translate(_AID_TABLE)),
+        EstablishTradeRoute: _and(valid, trade_reach, rows(g >= TRADE_ROUTE_COST for g in gold)),
+        Raid: raid,
+        QueueRaid: raid,
+        DeclareWar: valid,
+    }
+    targeted = b"".join(kinds[kind] for kind in TARGETED_KINDS)
+
+    blocked = bytes(len(own))
+    own_rows = []
+    for actor, civ in zip(alive, civs):
+        if not actor:
+            own_rows.append(blocked)
+            continue
+        r = civ.resources
+        food, bronze, gold_, tin, copper = r.food, r.bronze, r.gold, r.tin, r.copper
+        own_rows.append(bytes([food >= m[0] and bronze >= m[1] and gold_ >= m[2] and
+                               tin >= m[3] and copper >= m[4] for m in minimums]))
+
+    player = game.player_civ.name if game.player_civ is not None else None
+    return LegalMask(names, own, targeted, b"".join(own_rows), player)
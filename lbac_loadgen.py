@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Load generator for the LBAC game server
+
+Opens a number of connections to a running lbac_server, creates sessions
+spread over them and plays each session with random menu actions and
+end_turn commands, pipelining the requests of all sessions that share a
+connection. Reports command throughput, latency percentiles and, from the
+server's own CPU time, how many such sessions one core can host.
+
+Usage:
+    python3 lbac_server.py --unix /tmp/lbac.sock &
+    python3 lbac_loadgen.py --unix /tmp/lbac.sock --sessions 2000 --connections 16
+    python3 lbac_loadgen.py --spawn --sessions 500      # start a server too
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from lbac_game import UNIT_COSTS, TRADE_OFFERS, MARKET_GOODS
+from lbac_server import ACTIONS
+
+
+Connector = Callable[[], Awaitable[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]]
+
+
+@dataclass
+class LoadReport:
+    """Outcome of one load run"""
+    sessions: int
+    commands: int
+    errors: int
+    wall_time: float
+    server_cpu: float
+    p50_ms: float
+    p99_ms: float
+    max_ms: float
+
+    @property
+    def commands_per_sec(self) -> float:
+        return self.commands / self.wall_time if self.wall_time else 0.0
+
+    @property
+    def sessions_per_core(self) -> float:
+        """Sessions one fully busy server core could sustain at this pace"""
+        if self.server_cpu <= 0:
+            return float("inf")
+        return self.sessions * self.wall_time / self.server_cpu
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, int(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+class Client:
+    """One pipelined protocol connection"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count(1)
+        self.waiting: Dict[int, asyncio.Future] = {}
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.listener = asyncio.ensure_future(self._listen())
+
+    async def _listen(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self.waiting.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self.waiting.values():
+            future.set_exception(ConnectionError("Server closed the connection"))
+
+    async def request(self, cmd: str, **fields) -> dict:
+        """Send one command and wait for its response"""
+        rid = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[rid] = future
+        fields["cmd"] = cmd
+        fields["id"] = rid
+        start = time.perf_counter()
+        self.writer.write(json.dumps(fields, separators=(",", ":")).encode() + b"\n")
+        response = await future
+        self.latencies.append(time.perf_counter() - start)
+        if not response.get("ok"):
+            self.errors += 1
+        return response
+
+    async def close(self):
+        self.writer.close()
+        self.listener.cancel()
+
+
+def random_action(rng: random.Random, rivals: List[str]) -> dict:
+    """A random act request body"""
+    action = rng.choice(list(ACTIONS))
+    body = {"action": action}
+    for name in ACTIONS[action][1]:
+        if name == "target":
+            body["target"] = rng.choice(rivals)
+        elif name == "offer":
+            body["offer"] = rng.randrange(len(TRADE_OFFERS))
+        elif name == "unit":
+            body["unit"] = rng.choice(list(UNIT_COSTS))
+        elif name == "amount":
+            body["amount"] = rng.randint(1, 5)
+        elif name == "sector":
+            body["sector"] = rng.choice(("agriculture", "technology"))
+        elif name == "good":
+            body["good"] = rng.choice(MARKET_GOODS)
+        elif name == "side":
+            body["side"] = rng.choice(("buy", "sell"))
+        elif name == "lots":
+            body["lots"] = rng.randint(1, 3)
+        elif name == "price":
+            body["price"] = rng.randint(5, 20)
+    return body
+
+
+async def play_session(client: Client, names: List[str], seed: int, turns: int,
+                       actions: int) -> int:
+    """Play one session as a random civilization; returns the turns played"""
+    rng = random.Random(seed)
+    player = rng.choice(names)
+    created = await client.request("new", seed=seed, civ=player)
+    if not created.get("ok"):
+        return 0
+    sid = created["session"]
+    rivals = [name for name in names if name != player]
+
+    played = 0
+    for _ in range(turns):
+        for _ in range(actions):
+            await client.request("act", session=sid, **random_action(rng, rivals))
+        result = await client.request("end_turn", session=sid)
+        if not result.get("ok"):
+            break
+        played += 1
+        if result["game_over"]:
+            break
+    await client.request("close", session=sid)
+    return played
+
+
+async def run_load(connect: Connector, sessions: int = 100, connections: int = 4,
+                   turns: int = 50, actions: int = 2, seed: int = 0) -> LoadReport:
+    """Drive sessions over connections and measure the server"""
+    clients = [Client(*await connect()) for _ in range(max(1, connections))]
+    probe = await clients[0].request("new")
+    await clients[0].request("close", session=probe["session"])
+    names = probe["civilizations"]
+    before = await clients[0].request("stats")
+    clients[0].latencies.clear()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play_session(clients[i % len(clients)], names, seed + i, turns,
+                                        actions)
+                           for i in range(sessions)))
+    wall = time.perf_counter() - start
+
+    after = await clients[0].request("stats")
+    clients[0].latencies.pop()
+    latencies = sorted(t for client in clients for t in client.latencies)
+    errors = sum(client.errors for client in clients)
+    for client in clients:
+        await client.close()
+
+    return LoadReport(
+        sessions=sessions,
+        commands=len(latencies),
+        errors=errors,
+        wall_time=wall,
+        server_cpu=after["cpu_time"] - before["cpu_time"],
+        p50_ms=percentile(latencies, 0.50) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        max_ms=(latencies[-1] if latencies else 0.0) * 1000,
+    )
+
+
+def format_report(report: LoadReport) -> str:
+    """Report as text"""
+    return "\n".join([
+        f"Sessions:          {report.sessions}",
+        f"Commands:          {report.commands} ({report.errors} rejected)",
+        f"Wall time:         {report.wall_time:.2f}s",
+        f"Throughput:        {report.commands_per_sec:,.0f} commands/s",
+        f"Latency p50/p99:   {report.p50_ms:.2f} / {report.p99_ms:.2f} ms "
+        f"(max {report.max_ms:.2f} ms)",
+        f"Server CPU:        {report.server_cpu:.2f}s",
+        f"Sessions per core: {report.sessions_per_core:,.0f}",
+    ])
+
+
+async def _wait_for_socket(path: str, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Server did not create {path}")
+        await asyncio.sleep(0.05)
+
+
+async def _main(args) -> LoadReport:
+    server = None
+    unix = args.unix
+    if args.spawn:
+        unix = os.path.join(tempfile.mkdtemp(prefix="lbac-"), "server.sock")
+        server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(
+            os.path.abspath(__file__)), "lbac_server.py"), "--unix", unix])
+        await _wait_for_socket(unix)
+    try:
+        if unix:
+            def connect():
+                return asyncio.open_unix_connection(unix)
+        else:
+            def connect():
+                return asyncio.open_connection(args.host, args.port)
+        return await run_load(connect, args.sessions, args.connections, args.turns,
+                              args.actions, args.seed)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Generate load against an LBAC server")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--unix", default=None, help="connect to this Unix socket instead")
+    parser.add_argument("--spawn", action="store_true", help="start a server for the run")
+    parser.add_argument("--sessions", type=int, default=200, help="concurrent sessions")
+    parser.add_argument("--connections", type=int, default=8, help="client connections")
+    parser.add_argument("--turns", type=int, default=50, help="turns per session")
+    parser.add_argument("--actions", type=int, default=2, help="menu actions per turn")
+    parser.add_argument("--seed", type=int, default=0, help="first session seed")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(_main(args))
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Deterministic lockstep multiplayer for LBAC
+
+Several players share one world over a local network. Every peer runs the
+same simulation from the same seed and parameters; only the players'
+actions travel, so the traffic of a turn grows with the number of actions
+taken, not with the size of the world.
+
+A host relays turns. Each player submits the typed actions (lbac_actions,
+in their dict form) of its civilization for the current turn; once every
+connected player has submitted, the host commits the turn, broadcasting
+one message with every action in a fixed order (civ_index order of the
+players, then the order each player gave), and every peer, the host
+included, applies it with apply_batch and resolves the end of turn.
+Invalid actions fail identically everywhere, so they need no special care.
+
+Players' civilizations are run by PassivePolicy (the AI skips them, their
+orders come over the wire) and otherwise follow the AI civilizations'
+rules (Game.ai_turn production and upkeep); the shared world has no
+player_civ. The game ends at max_turns or when every player's
+civilization has collapsed.
+
+Desyncs: every hash_interval turns each peer sends a hash of its complete
+state (GameSnapshot, generator included) to the host, which compares it
+with its own and answers a mismatch with its state, which the peer
+restores. A hash_interval of 0 turns the checks off.
+
+Late joiners receive the state delta-compressed against the world the seed
+starts from (which they can build themselves): the snapshot bytes XORed
+with the starting snapshot's, so unchanged values become zero bytes, then
+zlib-compressed. New players take effect from the next committed turn on
+every peer at once.
+
+Protocol (one JSON object per line, as in lbac_server):
+    peer -> host   {"cmd": "join", "civ": "Ugarit", "player": "alice"}
+                   {"cmd": "actions", "turn": 3, "actions": [{...}, ...]}
+                   {"cmd": "hash", "turn": 5, "hash": "..."}
+    host -> peer   {"cmd": "welcome", "seed": ..., "params": {...}, "state": {...}, ...}
+                   {"cmd": "turn", "turn": 3, "joined": {...}, "actions": [...], "game_over": false}
+                   {"cmd": "resync", "turn": 5, "state": {...}}
+                   {"cmd": "error", "error": "..."}
+
+Plain random.Random generators only (the default Game): the generator
+state is part of the hashed and transferred snapshot.
+
+Usage:
+    python3 lbac_lockstep.py host --port 8766 --seed 7
+    python3 lbac_lockstep.py join --port 8766 --civ Ugarit --player alice
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import sys
+import zlib
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from lbac_actions import ACTION_TYPES, Action, action_from_dict, apply_batch
+from lbac_game import (
+    Game, GameParams, GameSnapshot, PassivePolicy, NullRenderer, TurnResult, DEFAULT_PARAMS
+)
+
+
+class LockstepError(Exception):
+    """A message the lockstep protocol cannot carry out"""
+
+
+def encode_message(message: dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+# ----------------------------------------------------------------------
+# State transfer
+# ----------------------------------------------------------------------
+
+def snapshot_bytes(snap: GameSnapshot) -> bytes:
+    """A snapshot as one byte string: state length, state, relations, generator state"""
+    version, internal, gauss = snap.rng_state
+    if gauss is not None:
+        raise LockstepError("Generator state with a pending gauss value")
+    state = snap.state.tobytes()
+    return (len(snap.state).to_bytes(4, "little") + state + snap.relations
+            + array("q", internal).tobytes())
+
+
+def snapshot_from_bytes(data: bytes, num_civs: int) -> GameSnapshot:
+    """Inverse of snapshot_bytes"""
+    length = int.from_bytes(data[:4], "little")
+    end = 4 + 8 * length
+    state = array("q")
+    state.frombytes(data[4:end])
+    relations = data[end:end + num_civs * num_civs]
+    internal = array("q")
+    internal.frombytes(data[end + num_civs * num_civs:])
+    return GameSnapshot(state, relations, (3, tuple(internal), None))
+
+
+def delta_encode(base: bytes, current: bytes) -> str:
+    """current as zlib-compressed XOR against base (zero bytes where unchanged), base64"""
+    padded = base[:len(current)].ljust(len(current), b"\0")
+    diff = int.from_bytes(current, "little") ^ int.from_bytes(padded, "little")
+    return base64.b64encode(zlib.compress(diff.to_bytes(len(current), "little"), 9)).decode()
+
+
+def delta_decode(base: bytes, delta: str) -> bytes:
+    """Inverse of delta_encode"""
+    diff = zlib.decompress(base64.b64decode(delta))
+    padded = base[:len(diff)].ljust(len(diff), b"\0")
+    value = int.from_bytes(diff, "little") ^ int.from_bytes(padded, "little")
+    return value.to_bytes(len(diff), "little")
+
+
+# ----------------------------------------------------------------------
+# Simulation
+# ----------------------------------------------------------------------
+
+class LockstepSim:
+    """One peer's copy of a lockstep world
+
+    humans maps each player's civilization to the player's name, in the
+    order they were committed.
+    """
+
+    def __init__(self, seed: int, params: Optional[GameParams] = None, max_turns: int = 50):
+        self.seed = seed
+        self.params = params or DEFAULT_PARAMS
+        self.max_turns = max_turns
+        self.game = Game(seed=seed, params=self.params, renderer=NullRenderer())
+        self.humans: Dict[str, str] = {}
+        self._base: Optional[bytes] = None
+
+    @property
+    def turn(self) -> int:
+        return self.game.turn
+
+    @property
+    def game_over(self) -> bool:
+        game = self.game
+        if game.game_over or game.turn > self.max_turns:
+            return True
+        return bool(self.humans) and not any(game.civilizations[civ].is_alive
+                                             for civ in self.humans)
+
+    def add_human(self, civ: str, player: str):
+        """Hand civ over to a player"""
+        self.humans[civ] = player
+        self.game.ai_policies[civ] = PassivePolicy()
+
+    def play(self, message: dict) -> Tuple[list, TurnResult]:
+        """Apply one committed turn: new players, then the actions in order, then the end of turn"""
+        if message["turn"] != self.game.turn:
+            raise LockstepError(f"Turn {message['turn']} arrived at turn {self.game.turn}")
+        for civ, player in message.get("joined", {}).items():
+            self.add_human(civ, player)
+        actions = [action_from_dict(body) for body in message["actions"]]
+        results = apply_batch(self.game, actions)
+        return results, self.game.resolve_turn()
+
+    def state_hash(self) -> str:
+        """Hash of the complete game state"""
+        return hashlib.sha256(snapshot_bytes(self.game.snapshot())).hexdigest()[:32]
+
+    def base_state(self) -> bytes:
+        """Snapshot bytes of the world the seed starts from"""
+        if self._base is None:
+            start = Game(seed=self.seed, params=self.params, renderer=NullRenderer())
+            self._base = snapshot_bytes(start.snapshot())
+        return self._base
+
+    def encode_state(self) -> dict:
+        """The current state, delta-compressed against the starting world"""
+        current = snapshot_bytes(self.game.snapshot())
+        return {"turn": self.game.turn, "humans": dict(self.humans),
+                "delta": delta_encode(self.base_state(), current)}
+
+    def load_state(self, state: dict):
+        """Take over a state produced by encode_state on another peer"""
+        data = delta_decode(self.base_state(), state["delta"])
+        self.game.restore(snapshot_from_bytes(data, len(self.game.civilizations)))
+        self.game.ai_policies = {}
+        self.humans = {}
+        for civ, player in state["humans"].items():
+            self.add_human(civ, player)
+        if self.game.turn != state["turn"]:
+            raise LockstepError("State does not match its turn")
+
+
+# ----------------------------------------------------------------------
+# Host
+# ----------------------------------------------------------------------
+
+class LockstepHost:
+    """Relays committed turns between players and checks their state hashes
+
+    The host keeps its own LockstepSim, which is the reference for hashes
+    and the source of late joiners' state.
+    """
+
+    def __init__(self, seed: int, params: Optional[GameParams] = None, max_turns: int = 50,
+                 hash_interval: int = 5):
+        self.sim = LockstepSim(seed, params, max_turns)
+        self.hash_interval = hash_interval
+        self.peers: Dict[str, asyncio.StreamWriter] = {}
+        self.submitted: Dict[str, List[dict]] = {}
+        self.joined: Dict[str, str] = {}
+        self.hashes: Dict[int, str] = {}
+        self.desyncs: List[Tuple[int, str]] = []
+        self.turn_bytes: List[int] = []
+
+    def send(self, writer: asyncio.StreamWriter, message: dict) -> int:
+        data = encode_message(message)
+        writer.write(data)
+        return len(data)
+
+    def join(self, request: dict, writer: asyncio.StreamWriter) -> str:
+        civ = request.get("civ")
+        game = self.sim.game
+        if civ not in game.civilizations or not game.civilizations[civ].is_alive:
+            raise LockstepError(f"Unknown or collapsed civilization {civ!r}")
+        if civ in self.peers:
+            raise LockstepError(f"{civ} is already taken")
+        if self.sim.game_over:
+            raise LockstepError("Game is over")
+        self.peers[civ] = writer
+        self.joined[civ] = str(request.get("player") or civ)
+        self.send(writer, {"cmd": "welcome", "civ": civ, "seed": self.sim.seed,
+                           "params": self.sim.params.to_dict(), "max_turns": self.sim.max_turns,
+                           "hash_interval": self.hash_interval,
+                           "state": self.sim.encode_state()})
+        return civ
+
+    def submit(self, civ: str, request: dict):
+        """Take civ's actions for the current turn; commit the turn once everyone has"""
+        if self.sim.game_over:
+            raise LockstepError("Game is over")
+        if request.get("turn") != self.sim.turn:
+            raise LockstepError(f"Actions for turn {request.get('turn')} at turn {self.sim.turn}")
+        bodies = []
+        for body in request.get("actions", []):
+            if not isinstance(body, dict):
+                raise LockstepError("Actions must be objects")
+            body = {**body, "civ": civ}
+            try:
+                action_from_dict(body)
+            except (ValueError, TypeError) as e:
+                raise LockstepError(str(e)) from None
+            bodies.append(body)
+        self.submitted[civ] = bodies
+        self.try_commit()
+
+    def try_commit(self):
+        if not self.peers or any(civ not in self.submitted for civ in self.peers):
+            return
+        index = self.sim.game.civ_index
+        actions = [body for civ in sorted(self.submitted, key=index.get)
+                   for body in self.submitted[civ]]
+        message = {"cmd": "turn", "turn": self.sim.turn, "joined": self.joined,
+                   "actions": actions}
+        self.submitted, self.joined = {}, {}
+        self.sim.play(message)
+        message["game_over"] = self.sim.game_over
+        if self.hash_interval and message["turn"] % self.hash_interval == 0:
+            self.hashes[message["turn"]] = self.sim.state_hash()
+        sizes = [self.send(writer, message) for writer in self.peers.values()]
+        self.turn_bytes.append(sizes[0] if sizes else 0)
+
+    def check_hash(self, civ: str, request: dict):
+        turn = request.get("turn")
+        expected = self.hashes.get(turn)
+        if expected is not None and request.get("hash") != expected:
+            self.desyncs.append((turn, civ))
+            if turn <= self.sim.turn:
+                # The peer restores the current state, however old the mismatch
+                self.send(self.peers[civ], {"cmd": "resync", "turn": self.sim.turn - 1,
+                                            "state": self.sim.encode_state()})
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        """Serve one player until it disconnects"""
+        civ = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise LockstepError("Request must be a JSON object")
+                    cmd = request.get("cmd")
+                    if cmd == "join" and civ is None:
+                        civ = self.join(request, writer)
+                    elif civ is None:
+                        raise LockstepError("Join first")
+                    elif cmd == "actions":
+                        self.submit(civ, request)
+                    elif cmd == "hash":
+                        self.check_hash(civ, request)
+                    else:
+                        raise LockstepError(f"Unknown command {cmd!r}")
+                except (LockstepError, ValueError) as e:
+                    self.send(writer, {"cmd": "error", "error": str(e)})
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if civ is not None and self.peers.get(civ) is writer:
+                del self.peers[civ]
+                self.submitted.pop(civ, None)
+                self.try_commit()
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8766,
+                    unix: Optional[str] = None) -> asyncio.AbstractServer:
+        """Start listening on a Unix socket path or a TCP host/port"""
+        if unix:
+            return await asyncio.start_unix_server(self.handle_connection, path=unix)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+# ----------------------------------------------------------------------
+# Peer
+# ----------------------------------------------------------------------
+
+class LockstepPeer:
+    """A player's end of a lockstep game
+
+    join() connects and builds the local simulation from the host's state;
+    end_turn(actions) submits this turn's actions and returns, once the
+    host commits the turn, what every action did and the TurnResult.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.sim: Optional[LockstepSim] = None
+        self.civ: Optional[str] = None
+        self.hash_interval = 0
+        self.resyncs = 0
+        self.bytes_received = 0
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 8766,
+                      unix: Optional[str] = None) -> "LockstepPeer":
+        if unix:
+            reader, writer = await asyncio.open_unix_connection(unix)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def send(self, message: dict):
+        self.writer.write(encode_message(message))
+        await self.writer.drain()
+
+    async def receive(self) -> dict:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Host closed the connection")
+        self.bytes_received += len(line)
+        message = json.loads(line)
+        if message.get("cmd") == "error":
+            raise LockstepError(message["error"])
+        return message
+
+    async def join(self, civ: str, player: str = "") -> LockstepSim:
+        await self.send({"cmd": "join", "civ": civ, "player": player or civ})
+        welcome = await self.receive()
+        params = DEFAULT_PARAMS.override(welcome["params"])
+        self.sim = LockstepSim(welcome["seed"], params, welcome["max_turns"])
+        self.sim.load_state(welcome["state"])
+        self.civ = welcome["civ"]
+        self.hash_interval = welcome["hash_interval"]
+        return self.sim
+
+    async def end_turn(self, actions: Sequence[Action] = ()) -> Tuple[list, TurnResult]:
+        """Submit this turn's actions and play the committed turn"""
+        sim = self.sim
+        turn = sim.turn
+        await self.send({"cmd": "actions", "turn": turn,
+                         "actions": [action.to_dict() for action in actions]})
+        while True:
+            message = await self.receive()
+            if message["cmd"] == "resync":
+                self.resyncs += 1
+                sim.load_state(message["state"])
+            elif message["cmd"] == "turn" and message["turn"] == turn:
+                break
+        outcome = sim.play(message)
+        if self.hash_interval and turn % self.hash_interval == 0:
+            await self.send({"cmd": "hash", "turn": turn, "hash": sim.state_hash()})
+        return outcome
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+# ----------------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------------
+
+def parse_command(line: str) -> Action:
+    """A typed action from "<action> <arg> ...", e.g. "send_gift Cyprus" or "recruit archers 5" """
+    name, *words = line.split()
+    cls = ACTION_TYPES.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown action {name!r}")
+    params = cls.params()
+    if len(words) < len(params):
+        raise ValueError(f"{name} needs {', '.join(params)}")
+    # The last parameter takes the rest of the line (civilization names have spaces)
+    values = words[:len(params) - 1] + [" ".join(words[len(params) - 1:])] if params else []
+    return cls(*[int(v) if v.lstrip("-").isdigit() else v for v in values])
+
+
+async def _play_console(peer: LockstepPeer, civ: str, player: str):
+    """Text client: one action per line, "end" to finish the turn, "quit" to leave"""
+    loop = asyncio.get_running_loop()
+    sim = await peer.join(civ, player)
+    print(f"Joined as {civ} at turn {sim.turn}. Actions: {', '.join(ACTION_TYPES)}")
+    while not sim.game_over:
+        actions: List[Action] = []
+        while True:
+            line = (await loop.run_in_executor(None, input, f"[turn {sim.turn}] > ")).strip()
+            if line in ("end", "quit"):
+                break
+            try:
+                actions.append(parse_command(line))
+            except ValueError as e:
+                print(e)
+        if line == "quit":
+            break
+        results, turn = await peer.end_turn(actions)
+        for result in results:
+            print(getattr(result, "message", ""))
+        me = sim.game.civilizations[civ]
+        print(f"Turn {turn.turn} done: gold {me.resources.gold}, food {me.resources.food}, "
+              f"prestige {me.prestige}")
+    await peer.close()
+
+
+async def _host(args):
+    host = LockstepHost(args.seed, max_turns=args.turns, hash_interval=args.hash_interval)
+    listener = await host.start(args.host, args.port, args.unix)
+    print(f"Lockstep host for seed {args.seed} on {args.unix or f'{args.host}:{args.port}'}")
+    async with listener:
+        await listener.serve_forever()
+
+
+async def _join(args):
+    peer = await LockstepPeer.connect(args.host, args.port, args.unix)
+    await _play_console(peer, args.civ, args.player)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Lockstep multiplayer LBAC over a local network")
+    parser.add_argument("role", choices=("host", "join"))
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host")
+    parser.add_argument("--port", type=int, default=8766, help="TCP port")
+    parser.add_argument("--unix", default=None, help="use this Unix socket path instead")
+    parser.add_argument("--seed", type=int, default=0, help="world seed (host)")
+    parser.add_argument("--turns", type=int, default=50, help="turns to play (host)")
+    parser.add_argument("--hash-interval", type=int, default=5, help="turns between state hashes (0 turns them off)")
+    parser.add_argument("--civ", default="Ugarit", help="civilization to play (join)")
+    parser.add_argument("--player", default="", help="player name (join)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_host(args) if args.role == "host" else _join(args))
+    except (KeyboardInterrupt, EOFError):
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
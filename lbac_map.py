@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Geography for LBAC
+
+A WorldMap is a set of regions (land or sea, each with a position) joined by
+an undirected adjacency graph whose edges carry a travel cost: the distance
+between the two regions, halved when both are sea (ships are the fastest way
+to move goods and armies). Every civilization has a home region, and the
+route cost between two civilizations is the shortest-path cost between
+their homes.
+
+Three structures keep queries cheap on maps of tens of thousands of regions:
+
+- the adjacency lists are stored CSR-style (one offsets array and one flat
+  targets/costs array), so a region's neighbours are a slice;
+- a uniform grid spatial index buckets regions by position, so radius and
+  nearest-region queries only look at the few cells around the point;
+- shortest-path costs are computed with Dijkstra once per source region and
+  kept in an LRU cache of whole cost arrays, so a route cost is an array
+  lookup after the first query from that region.
+
+Maps are immutable once built and may be shared by any number of games.
+"""
+
+import heapq
+import math
+import random
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from lbac_slots import SLOTS
+
+
+# Route cost of a region that cannot be reached
+UNREACHABLE = -1
+
+
+@dataclass(frozen=True, **SLOTS)
+class Region:
+    """One region of the map"""
+    name: str
+    x: float
+    y: float
+    sea: bool = False
+
+
+class WorldMap:
+    """Regions, weighted adjacency, a spatial index and cached route costs
+
+    Positions are in map units (the historical map uses degrees of longitude
+    and latitude); edge costs are integers, 100 per map unit travelled over
+    land.
+    """
+
+    def __init__(self, regions: Sequence[Region], edges: Iterable[Tuple[int, int]],
+                 homes: Optional[Dict[str, int]] = None, cache_size: int = 64):
+        self.regions: List[Region] = list(regions)
+        self.index: Dict[str, int] = {r.name: i for i, r in enumerate(self.regions)}
+        self.homes: Dict[str, int] = dict(homes or {})
+        n = len(self.regions)
+
+        adjacency: List[List[Tuple[int, int]]] = [[] for _ in range(n)]
+        for a, b in edges:
+            cost = self.edge_cost(a, b)
+            adjacency[a].append((b, cost))
+            adjacency[b].append((a, cost))
+        self.offsets = array("l", [0])
+        self.targets = array("l")
+        self.costs = array("l")
+        for links in adjacency:
+            links.sort()
+            self.targets.extend(b for b, _ in links)
+            self.costs.extend(c for _, c in links)
+            self.offsets.append(len(self.targets))
+
+        self._build_grid()
+        self.cache_size = cache_size
+        self._routes: "OrderedDict[int, array]" = OrderedDict()
+        self._reach: "OrderedDict[Tuple[int, int], Dict[int, int]]" = OrderedDict()
+        self._reach_matrices: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self.residents: Dict[int, List[str]] = {}
+        for civ, region in self.homes.items():
+            self.residents.setdefault(region, []).append(civ)
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    def to_dict(self) -> dict:
+        """Regions, edges and homes as JSON-ready data (WorldMap.from_dict rebuilds it)"""
+        edges = [[a, b] for a in range(len(self.regions)) for b in self.neighbours(a) if a < b]
+        return {"regions": [[r.name, r.x, r.y, r.sea] for r in self.regions],
+                "edges": edges, "homes": dict(self.homes)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WorldMap":
+        """The map WorldMap.to_dict described"""
+        return cls([Region(*region) for region in data["regions"]],
+                   [tuple(edge) for edge in data["edges"]], data["homes"])
+
+    def edge_cost(self, a: int, b: int) -> int:
+        """Travel cost between two adjacent regions"""
+        ra, rb = self.regions[a], self.regions[b]
+        cost = max(1, round(math.hypot(ra.x - rb.x, ra.y - rb.y) * 100))
+        return max(1, cost // 2) if ra.sea and rb.sea else cost
+
+    # ------------------------------------------------------------------
+    # Adjacency
+    # ------------------------------------------------------------------
+
+    def neighbours(self, region: int) -> array:
+        """Regions adjacent to region (a slice of the CSR targets)"""
+        return self.targets[self.offsets[region]:self.offsets[region + 1]]
+
+    def links(self, region: int) -> List[Tuple[int, int]]:
+        """(neighbour, edge cost) pairs of region"""
+        start, end = self.offsets[region], self.offsets[region + 1]
+        return list(zip(self.targets[start:end], self.costs[start:end]))
+
+    def coast(self, region: int) -> bool:
+        """Whether a land region borders the sea"""
+        regions = self.regions
+        return not regions[region].sea and any(regions[b].sea for b in self.neighbours(region))
+
+    # ------------------------------------------------------------------
+    # Spatial index
+    # ------------------------------------------------------------------
+
+    def _build_grid(self):
+        regions = self.regions
+        if not regions:
+            self.cell, self.min_x, self.min_y = 1.0, 0.0, 0.0
+            self.grid: Dict[Tuple[int, int], List[int]] = {}
+            return
+        xs = [r.x for r in regions]
+        ys = [r.y for r in regions]
+        self.min_x, self.min_y = min(xs), min(ys)
+        area = max(max(xs) - self.min_x, 1e-9) * max(max(ys) - self.min_y, 1e-9)
+        # About four regions per cell
+        self.cell = max(math.sqrt(area * 4 / len(regions)), 1e-9)
+        grid: Dict[Tuple[int, int], List[int]] = {}
+        for i, r in enumerate(regions):
+            grid.setdefault(self._cell_of(r.x, r.y), []).append(i)
+        self.grid = grid
+
+    def _cell_of(self, x: float, y: float) -> Tuple[int, int]:
+        return (int((x - self.min_x) // self.cell), int((y - self.min_y) // self.cell))
+
+    def within(self, x: float, y: float, radius: float) -> List[int]:
+        """Regions within radius (map units) of a point, nearest first"""
+        cx0, cy0 = self._cell_of(x - radius, y - radius)
+        cx1, cy1 = self._cell_of(x + radius, y + radius)
+        regions, grid = self.regions, self.grid
+        limit = radius * radius
+        found = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for i in grid.get((cx, cy), ()):
+                    r = regions[i]
+                    d = (r.x - x) ** 2 + (r.y - y) ** 2
+                    if d <= limit:
+                        found.append((d, i))
+        found.sort()
+        return [i for _, i in found]
+
+    def nearest(self, x: float, y: float) -> Optional[int]:
+        """The region closest to a point"""
+        if not self.regions:
+            return None
+        cx, cy = self._cell_of(x, y)
+        regions, grid = self.regions, self.grid
+        best, best_d = None, math.inf
+        ring = 0
+        while True:
+            for gx in range(cx - ring, cx + ring + 1):
+                for gy in range(cy - ring, cy + ring + 1):
+                    if max(abs(gx - cx), abs(gy - cy)) != ring:
+                        continue
+                    for i in grid.get((gx, gy), ()):
+                        r = regions[i]
+                        d = (r.x - x) ** 2 + (r.y - y) ** 2
+                        if d < best_d:
+                            best, best_d = i, d
+            # Anything in a further ring is at least ring * cell away
+            if best is not None and (ring * self.cell) ** 2 >= best_d:
+                return best
+            ring += 1
+
+    # ------------------------------------------------------------------
+    # Routes
+    # ------------------------------------------------------------------
+
+    def route_costs(self, source: int) -> array:
+        """Shortest-path cost from source to every region (UNREACHABLE if none)
+
+        Computed once per source and kept in an LRU cache of cache_size
+        sources.
+        """
+        routes = self._routes
+        costs = routes.get(source)
+        if costs is not None:
+            routes.move_to_end(source)
+            return costs
+        costs = self._dijkstra(source)
+        routes[source] = costs
+        if len(routes) > self.cache_size:
+            routes.popitem(last=False)
+        return costs
+
+    def _dijkstra(self, source: int) -> array:
+        offsets, targets, edge_costs = self.offsets, self.targets, self.costs
+        best = [UNREACHABLE] * len(self.regions)
+        best[source] = 0
+        heap = [(0, source)]
+        pop, push = heapq.heappop, heapq.heappush
+        while heap:
+            cost, region = pop(heap)
+            if cost > best[region]:
+                continue
+            for k in range(offsets[region], offsets[region + 1]):
+                nxt = targets[k]
+                total = cost + edge_costs[k]
+                known = best[nxt]
+                if known == UNREACHABLE or total < known:
+                    best[nxt] = total
+                    push(heap, (total, nxt))
+        return array("q", best)
+
+    def route_cost(self, a: int, b: int) -> Optional[int]:
+        """Cheapest route between two regions, or None if there is none
+
+        Routes are symmetric, so a cached cost array for either end is used.
+        """
+        costs = self._routes.get(b)
+        if costs is not None:
+            cost = costs[a]
+        else:
+            cost = self.route_costs(a)[b]
+        return None if cost == UNREACHABLE else cost
+
+    def reachable(self, source: int, limit: int) -> Dict[int, int]:
+        """Regions whose route cost from source is at most limit, with their costs
+
+        A Dijkstra search cut off at limit, so it only visits the
+        neighbourhood of source; results are kept in an LRU cache.
+        """
+        key = (source, limit)
+        reach = self._reach.get(key)
+        if reach is not None:
+            self._reach.move_to_end(key)
+            return reach
+        costs = self._routes.get(source)
+        if costs is not None:
+            reach = {k: c for k, c in enumerate(costs) if 0 <= c <= limit}
+        else:
+            reach = self._dijkstra_within(source, limit)
+        self._reach[key] = reach
+        if len(self._reach) > self.cache_size * 16:
+            self._reach.popitem(last=False)
+        return reach
+
+    def _dijkstra_within(self, source: int, limit: int) -> Dict[int, int]:
+        offsets, targets, edge_costs = self.offsets, self.targets, self.costs
+        best = {source: 0}
+        heap = [(0, source)]
+        pop, push = heapq.heappop, heapq.heappush
+        while heap:
+            cost, region = pop(heap)
+            if cost > best[region]:
+                continue
+            for k in range(offsets[region], offsets[region + 1]):
+                total = cost + edge_costs[k]
+                if total > limit:
+                    continue
+                nxt = targets[k]
+                known = best.get(nxt)
+                if known is None or total < known:
+                    best[nxt] = total
+                    push(heap, (total, nxt))
+        return best
+
+    def precompute(self, sources: Iterable[int]):
+        """Fill the route cache for the given source regions"""
+        for source in sources:
+            self.route_costs(source)
+
+    # ------------------------------------------------------------------
+    # Civilizations
+    # ------------------------------------------------------------------
+
+    def home(self, civ_name: str) -> Optional[int]:
+        """Home region of a civilization, None if it has none on this map"""
+        return self.homes.get(civ_name)
+
+    def civs_within(self, civ_name: str, limit: int) -> Optional[Dict[str, int]]:
+        """Other civilizations whose homes are within limit of civ_name's, with route costs
+
+        None when civ_name has no home on this map.
+        """
+        home = self.homes.get(civ_name)
+        if home is None:
+            return None
+        residents = self.residents
+        found = {}
+        for region, cost in self.reachable(home, limit).items():
+            for name in residents.get(region, ()):
+                if name != civ_name:
+                    found[name] = cost
+        return found
+
+    def reach_matrix(self, names: Sequence[str], limit: int) -> bytes:
+        """Which civilizations are within limit of which, as an N x N 0/1 matrix
+
+        Cell [i * N + j] is 1 when names[j]'s home is within route cost limit
+        of names[i]'s; a civilization with no home reaches every other. The
+        diagonal is 0. Matrices are cached per (names, limit).
+        """
+        key = (tuple(names), limit)
+        matrix = self._reach_matrices.get(key)
+        if matrix is not None:
+            self._reach_matrices.move_to_end(key)
+            return matrix
+        n = len(names)
+        column = {name: j for j, name in enumerate(names)}
+        cells = bytearray(n * n)
+        for i, name in enumerate(names):
+            reach = self.civs_within(name, limit)
+            if reach is None:
+                cells[i * n:(i + 1) * n] = b"\x01" * n
+                cells[i * n + i] = 0
+                continue
+            for other in reach:
+                j = column.get(other)
+                if j is not None:
+                    cells[i * n + j] = 1
+        matrix = self._reach_matrices[key] = bytes(cells)
+        if len(self._reach_matrices) > self.cache_size:
+            self._reach_matrices.popitem(last=False)
+        return matrix
+
+    def civ_route_cost(self, a: str, b: str) -> Optional[int]:
+        """Route cost between two civilizations' homes (None if unplaced or unreachable)"""
+        ha, hb = self.homes.get(a), self.homes.get(b)
+        if ha is None or hb is None:
+            return None
+        return self.route_cost(ha, hb)
+
+
+# Historical Eastern Mediterranean, positions in degrees (longitude, latitude)
+HISTORICAL_REGIONS = (
+    Region("Mycenae", 22.8, 37.7),
+    Region("Miletus", 27.3, 37.5),
+    Region("Hattusa", 34.6, 40.0),
+    Region("Cilicia", 34.9, 36.9),
+    Region("Carchemish", 38.0, 36.8),
+    Region("Assur", 43.3, 35.5),
+    Region("Ugarit", 35.8, 35.6),
+    Region("Canaan", 35.2, 32.5),
+    Region("Sinai", 33.6, 30.9),
+    Region("Pi-Ramesses", 31.8, 30.8),
+    Region("Alashiya", 33.9, 35.2),
+    Region("Aegean Sea", 25.0, 37.0, sea=True),
+    Region("Cretan Sea", 26.0, 34.5, sea=True),
+    Region("Levantine Sea", 33.0, 33.5, sea=True),
+)
+
+HISTORICAL_EDGES = (
+    ("Mycenae", "Aegean Sea"),
+    ("Miletus", "Aegean Sea"),
+    ("Miletus", "Hattusa"),
+    ("Hattusa", "Cilicia"),
+    ("Cilicia", "Carchemish"),
+    ("Cilicia", "Ugarit"),
+    ("Cilicia", "Levantine Sea"),
+    ("Carchemish", "Ugarit"),
+    ("Carchemish", "Assur"),
+    ("Ugarit", "Canaan"),
+    ("Ugarit", "Levantine Sea"),
+    ("Canaan", "Sinai"),
+    ("Canaan", "Levantine Sea"),
+    ("Sinai", "Pi-Ramesses"),
+    ("Pi-Ramesses", "Levantine Sea"),
+    ("Alashiya", "Levantine Sea"),
+    ("Aegean Sea", "Cretan Sea"),
+    ("Cretan Sea", "Levantine Sea"),
+)
+
+HISTORICAL_HOMES = {
+    "Mycenaean Greece": "Mycenae",
+    "Hittite Empire": "Hattusa",
+    "New Kingdom Egypt": "Pi-Ramesses",
+    "Ugarit": "Ugarit",
+    "Cyprus": "Alashiya",
+    "Assyria": "Assur",
+}
+
+
+@lru_cache(maxsize=None)
+def eastern_mediterranean() -> WorldMap:
+    """The map of the six historical civilizations (built once, shared)"""
+    index = {r.name: i for i, r in enumerate(HISTORICAL_REGIONS)}
+    world = WorldMap(HISTORICAL_REGIONS,
+                     [(index[a], index[b]) for a, b in HISTORICAL_EDGES],
+                     {civ: index[region] for civ, region in HISTORICAL_HOMES.items()})
+    world.precompute(world.homes.values())
+    return world
+
+
+def generate_map(num_regions: int, seed: int = 0, sea_fraction: float = 0.3,
+                 civs: Sequence[str] = ()) -> WorldMap:
+    """A random map of about num_regions regions on a jittered square grid
+
+    Each region borders its (up to) eight grid neighbours. The listed
+    civilizations get land home regions spread evenly over the map.
+    """
+    rng = random.Random(seed)
+    side = max(1, math.ceil(math.sqrt(num_regions)))
+    regions = []
+    for k in range(num_regions):
+        row, col = divmod(k, side)
+        regions.append(Region(f"Region {k}", col + rng.uniform(-0.3, 0.3),
+                              row + rng.uniform(-0.3, 0.3), sea=rng.random() < sea_fraction))
+    edges = []
+    for k in range(num_regions):
+        row, col = divmod(k, side)
+        for dr, dc in ((0, 1), (1, -1), (1, 0), (1, 1)):
+            r, c = row + dr, col + dc
+            if 0 <= c < side and (r * side + c) < num_regions:
+                edges.append((k, r * side + c))
+
+    land = [k for k, region in enumerate(regions) if not region.sea] or list(range(num_regions))
+    homes = {}
+    if civs:
+        step = len(land) / len(civs)
+        homes = {name: land[int(i * step)] for i, name in enumerate(civs)}
+    return WorldMap(regions, edges, homes)
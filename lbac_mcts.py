@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo tree search AI for LBAC
+
+MCTSPolicy plugs into Game.ai_policy / Game.ai_policies and chooses one
+action per turn from the same menu the player has: gifts, alliances,
+threats, aid requests, trade routes, resource trades, raids, war,
+recruitment and internal investments (or doing nothing).
+
+Each search works on a private fork of the game. Every iteration restores
+the fork to the decision point, walks the UCT tree (one level per turn,
+advancing the whole world with Game.resolve_turn in between), expands one
+new move, plays random moves for a few more turns and scores the result.
+Other civilizations follow the default RecruitPolicy inside the search.
+"""
+
+import math
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from lbac_game import (
+    Game, Civilization, AIPolicy, PassivePolicy, RecruitPolicy, TRADE_ROUTE_COST, FESTIVAL_COST,
+    INVEST_COSTS, ALLIANCE_RELATIONSHIP, AID_RELATIONSHIP
+)
+
+
+# A move is (Game rule method, argument); ("pass", None) does nothing.
+Move = Tuple[str, Optional[object]]
+
+PASS: Move = ("pass", None)
+
+# Units recruited per recruitment move
+RECRUIT_BATCH = 5
+
+
+def candidate_moves(game: Game, civ: Civilization, max_targets: int = 6) -> List[Move]:
+    """Moves worth considering for civ this turn
+
+    Only moves that pass the rules' cost and relationship checks (game.params
+    and the cost constants of lbac_game) are listed.
+    Targeted moves consider at most max_targets rivals within trade range:
+    the friendliest, and the weakest within raid range. Raids are only
+    listed against rivals within raid range.
+    """
+    res = civ.resources
+    params = game.params
+    moves: List[Move] = [PASS]
+
+    rivals = game.trade_partners(civ)
+    raidable = set(game.raid_targets(civ))
+    if len(rivals) > max_targets:
+        half = max_targets // 2
+        by_relation = sorted(rivals, key=lambda name: -civ.relationships.get(name, 0))
+        by_strength = sorted(
+            (name for name in rivals if name in raidable),
+            key=lambda name: game.civilizations[name].military.get_total_strength())
+        rivals = list(dict.fromkeys(by_relation[:half] + by_strength[:max_targets - half]))
+
+    strength = civ.military.get_total_strength()
+    for target in rivals:
+        relation = civ.relationships.get(target, 0)
+        if res.gold >= params.gift_cost:
+            moves.append(("send_gift", target))
+        if relation >= ALLIANCE_RELATIONSHIP:
+            moves.append(("propose_alliance", target))
+        if relation >= AID_RELATIONSHIP:
+            moves.append(("request_aid", target))
+        if res.gold >= TRADE_ROUTE_COST:
+            moves.append(("establish_trade_route", target))
+        if (target in raidable and
+                strength > game.civilizations[target].military.get_total_strength() // 2):
+            moves.append(("resolve_raid", target))
+        moves.append(("threaten", target))
+        moves.append(("declare_war", target))
+
+    for unit, (bronze, gold) in params.unit_costs.items():
+        if res.bronze >= bronze * RECRUIT_BATCH and res.gold >= gold * RECRUIT_BATCH:
+            moves.append(("recruit", unit))
+
+    for offer, (give, amount, _, _) in enumerate(params.trade_offers):
+        if getattr(res, give) >= amount:
+            moves.append(("trade_resources", offer))
+
+    for sector, cost in INVEST_COSTS.items():
+        if res.gold >= cost:
+            moves.append(("invest", sector))
+    if res.gold >= FESTIVAL_COST:
+        moves.append(("hold_festival", None))
+    return moves
+
+
+def apply_move(game: Game, civ: Civilization, move: Move):
+    """Carry out a move for civ through the Game rule methods"""
+    method, arg = move
+    if method == "pass":
+        return None
+    if method == "recruit":
+        return game.recruit(arg, RECRUIT_BATCH, civ)
+    if arg is None:
+        return getattr(game, method)(civ=civ)
+    return getattr(game, method)(arg, civ)
+
+
+def evaluate(civ: Civilization) -> float:
+    """Heuristic worth of a civilization's position"""
+    if not civ.is_alive:
+        return 0.0
+    res = civ.resources
+    return (civ.prestige * 2 + res.population / 10 + civ.military.get_total_strength() / 5
+            + res.food / 5 + res.gold / 5 + res.bronze / 10 + civ.technology_level)
+
+
+class _Node:
+    """One decision in the search tree"""
+
+    __slots__ = ("move", "parent", "children", "untried", "visits", "value")
+
+    def __init__(self, move: Optional[Move], parent: Optional["_Node"]):
+        self.move = move
+        self.parent = parent
+        self.children: List["_Node"] = []
+        self.untried: Optional[List[Move]] = None
+        self.visits = 0
+        self.value = 0.0
+
+    def best_child(self, exploration: float) -> "_Node":
+        log_n = math.log(self.visits)
+        return max(self.children, key=lambda c: c.value / c.visits
+                   + exploration * math.sqrt(log_n / c.visits))
+
+
+class MCTSPolicy(AIPolicy):
+    """UCT search over the player's action menu
+
+    time_budget caps the wall-clock seconds spent per decision and
+    max_iterations caps the number of playouts; set time_budget=None for
+    fully reproducible decisions (given seed).
+    """
+
+    def __init__(self, time_budget: Optional[float] = 0.05, max_iterations: Optional[int] = 2000,
+                 tree_depth: int = 2, rollout_depth: int = 3, exploration: float = 1.0,
+                 reward_scale: float = 50.0, seed: Optional[int] = None):
+        if time_budget is None and max_iterations is None:
+            raise ValueError("MCTSPolicy needs a time_budget or max_iterations")
+        self.time_budget = time_budget
+        self.max_iterations = max_iterations
+        self.tree_depth = tree_depth
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+        self.reward_scale = reward_scale
+        self.rng = random.Random(seed)
+        self.last_search: Dict[str, object] = {}
+
+    def act(self, game: Game, civ: Civilization):
+        move = self.search(game, civ)
+        apply_move(game, civ, move)
+
+    def _scratch(self, game: Game, civ: Civilization) -> Game:
+        """Private fork where every other civ plays the default policy"""
+        scratch = game.fork()
+        scratch.ai_policy = RecruitPolicy()
+        scratch.ai_policies = {civ.name: PassivePolicy()}
+        return scratch
+
+    def _advance(self, scratch: Game, me: Civilization) -> bool:
+        """Play one world turn; False if the search line has ended"""
+        scratch.resolve_turn()
+        return me.is_alive and not scratch.game_over
+
+    def search(self, game: Game, civ: Civilization) -> Move:
+        """Best move for civ in the current game state"""
+        scratch = self._scratch(game, civ)
+        me = scratch.civilizations[civ.name]
+        root_state = scratch.snapshot(include_rng=False)
+        baseline = evaluate(me)
+        root = _Node(None, None)
+        root.untried = candidate_moves(scratch, me)
+        if len(root.untried) == 1:
+            return root.untried[0]
+
+        rng = self.rng
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        iterations = 0
+        while True:
+            if self.max_iterations is not None and iterations >= self.max_iterations:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            iterations += 1
+
+            scratch.restore(root_state)
+            scratch.rng.seed(rng.getrandbits(64))
+            node, depth, running = root, 0, True
+
+            # Selection
+            while running and not node.untried and node.children:
+                node = node.best_child(self.exploration)
+                apply_move(scratch, me, node.move)
+                running = self._advance(scratch, me)
+                depth += 1
+
+            # Expansion
+            if running and depth < self.tree_depth:
+                if node.untried is None:
+                    node.untried = candidate_moves(scratch, me)
+                if node.untried:
+                    move = node.untried.pop(rng.randrange(len(node.untried)))
+                    child = _Node(move, node)
+                    node.children.append(child)
+                    node = child
+                    apply_move(scratch, me, move)
+                    running = self._advance(scratch, me)
+
+            # Rollout
+            for _ in range(self.rollout_depth):
+                if not running:
+                    break
+                moves = candidate_moves(scratch, me, max_targets=2)
+                apply_move(scratch, me, moves[rng.randrange(len(moves))])
+                running = self._advance(scratch, me)
+
+            # Backpropagation
+            reward = 0.5 + 0.5 * math.tanh((evaluate(me) - baseline) / self.reward_scale)
+            while node is not None:
+                node.visits += 1
+                node.value += reward
+                node = node.parent
+
+        if not root.children:
+            return PASS
+        best = max(root.children, key=lambda c: c.visits)
+        self.last_search = {"iterations": iterations, "move": best.move,
+                            "visits": best.visits, "value": best.value / best.visits}
+        return best.move
+
+
+def main():
+    """Play a 50-turn all-AI game with every civilization on MCTS"""
+    game = Game(seed=1)
+    game.ai_policy = MCTSPolicy(time_budget=0.03, seed=1)
+    start = time.perf_counter()
+    game.simulate(50)
+    elapsed = time.perf_counter() - start
+    print(f"Played {game.turn - 1} turns in {elapsed:.1f}s")
+    for status in game.world_status():
+        print(f"  {status['name']}: population {status['population']}, "
+              f"strength {status['military_strength']}, prestige {status['prestige']}")
+
+
+if __name__ == "__main__":
+    main()
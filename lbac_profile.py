@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Per-phase instrumentation for LBAC turns
+
+Attach a Profiler to a game (game.profiler = Profiler()) and every
+Game.resolve_turn is run phase by phase (Game.TURN_PHASES) under named
+timers, with one extra timer per civilization around ai_turn. Each timer
+records calls, total and worst wall time and the net number of memory blocks
+allocated (sys.getallocatedblocks); with memory=True it also records the net
+bytes allocated, using tracemalloc. Counters track collapses and events.
+
+With no profiler attached resolve_turn takes its normal path, so the
+instrumentation costs nothing when disabled.
+
+Usage:
+    python3 lbac_profile.py --civs 1000 --turns 20
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from lbac_game import Game, TurnResult, SLOTS
+
+
+@dataclass(**SLOTS)
+class PhaseStats:
+    """Accumulated measurements of one named timer"""
+    calls: int = 0
+    wall_ns: int = 0
+    max_ns: int = 0
+    blocks: int = 0
+    bytes: int = 0
+
+    @property
+    def mean_us(self) -> float:
+        return self.wall_ns / self.calls / 1000 if self.calls else 0.0
+
+
+class Profiler:
+    """Named phase timers and counters
+
+    Timers for each civilization's ai_turn are named "ai_turn[<civ>]";
+    per_civ=False folds them into the single "ai_turns" phase timer.
+    """
+
+    def __init__(self, memory: bool = False, per_civ: bool = True):
+        self.memory = memory
+        self.per_civ = per_civ
+        self.stats: Dict[str, PhaseStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.turns = 0
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def attach(self, game: Game) -> "Profiler":
+        """Instrument game's turns"""
+        game.profiler = self
+        return self
+
+    def reset(self):
+        """Forget everything measured so far"""
+        self.stats.clear()
+        self.counters.clear()
+        self.turns = 0
+
+    # ------------------------------------------------------------------
+    # Measuring
+    # ------------------------------------------------------------------
+
+    def begin(self):
+        """Start a measurement; pass the token to end()"""
+        if self.memory:
+            return time.perf_counter_ns(), sys.getallocatedblocks(), \
+                tracemalloc.get_traced_memory()[0]
+        return time.perf_counter_ns(), sys.getallocatedblocks(), 0
+
+    def end(self, name: str, token):
+        """Finish a measurement started with begin() under the timer name"""
+        elapsed = time.perf_counter_ns() - token[0]
+        blocks = sys.getallocatedblocks() - token[1]
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = PhaseStats()
+        stats.calls += 1
+        stats.wall_ns += elapsed
+        if elapsed > stats.max_ns:
+            stats.max_ns = elapsed
+        stats.blocks += blocks
+        if self.memory:
+            stats.bytes += tracemalloc.get_traced_memory()[0] - token[2]
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of code under the timer name"""
+        token = self.begin()
+        try:
+            yield
+        finally:
+            self.end(name, token)
+
+    def count(self, name: str, amount: int = 1):
+        """Add to a counter"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def profile_turn(self, game: Game, result: TurnResult):
+        """Run game's turn phases under timers (called by Game.resolve_turn)"""
+        begin, end = self.begin, self.end
+        turn_token = begin()
+        for name, method in game.TURN_PHASES:
+            token = begin()
+            if name == "ai_turns" and self.per_civ:
+                player = game.player_civ
+                for civ in game.civilizations.values():
+                    if civ is not player and civ.is_alive:
+                        civ_token = begin()
+                        game.ai_turn(civ)
+                        end(f"ai_turn[{civ.name}]", civ_token)
+            else:
+                getattr(game, method)(result)
+            end(name, token)
+        end("turn", turn_token)
+        self.turns += 1
+        self.count("collapses", len(result.collapsed))
+        self.count("events", len(result.events))
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def phases(self) -> Dict[str, PhaseStats]:
+        """The per-phase timers (turn and Game.TURN_PHASES), in phase order"""
+        names = ["turn"] + [name for name, _ in Game.TURN_PHASES]
+        return {name: self.stats[name] for name in names if name in self.stats}
+
+    def slowest_civs(self, count: int = 10) -> List[str]:
+        """Civilizations whose ai_turn took the most total time"""
+        civs = [name for name in self.stats if name.startswith("ai_turn[")]
+        civs.sort(key=lambda name: -self.stats[name].wall_ns)
+        return [name[len("ai_turn["):-1] for name in civs[:count]]
+
+    def report(self, top_civs: int = 5) -> str:
+        """Phase table, the slowest AI civilizations and the counters"""
+        total = self.stats["turn"].wall_ns if "turn" in self.stats else 0
+        header = f"{'Timer':<32} {'Calls':>8} {'Total ms':>10} {'Mean us':>10} " \
+                 f"{'Max us':>10} {'Share':>7} {'Blocks':>9}"
+        if self.memory:
+            header += f" {'Bytes':>11}"
+        lines = [f"{self.turns} turns profiled", header]
+
+        def row(name: str, stats: PhaseStats):
+            share = stats.wall_ns / total if total else 0.0
+            line = (f"{name:<32} {stats.calls:>8} {stats.wall_ns / 1e6:>10.2f} "
+                    f"{stats.mean_us:>10.1f} {stats.max_ns / 1000:>10.1f} {share:>7.1%} "
+                    f"{stats.blocks:>9}")
+            if self.memory:
+                line += f" {stats.bytes:>11}"
+            lines.append(line)
+
+        for name, stats in self.phases().items():
+            row(name, stats)
+        slowest = self.slowest_civs(top_civs)
+        if slowest:
+            lines.append("Slowest AI civilizations:")
+            for civ in slowest:
+                row(f"  ai_turn[{civ}]", self.stats[f"ai_turn[{civ}]"])
+        if self.counters:
+            lines.append("Counters: " + ", ".join(
+                f"{name}={value}" for name, value in self.counters.items()))
+        return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    from lbac_bench import build_world
+
+    parser = argparse.ArgumentParser(description="Profile the phases of LBAC turns")
+    parser.add_argument("--civs", type=int, default=6, help="civilizations in the world")
+    parser.add_argument("--turns", type=int, default=50, help="turns to profile")
+    parser.add_argument("--memory", action="store_true", help="also trace allocated bytes")
+    args = parser.parse_args(argv)
+
+    game = build_world(args.civs)
+    profiler = Profiler(memory=args.memory).attach(game)
+    game.simulate(args.turns)
+    print(profiler.report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
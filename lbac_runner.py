@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo runner for LBAC
+
+Plays many headless games across a process pool and merges the per-game
+outcomes into one result table. Every game gets its own random generator seeded
+from a master seed and its game index, so the results are bit-identical for the
+same master seed no matter how many workers are used.
+
+Usage:
+    python3 lbac_runner.py --games 1000 --seed 42 --workers 8 --output results.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from lbac_game import Game, GamePool
+from lbac_telemetry import TelemetryRecorder
+
+
+@dataclass
+class GameOutcome:
+    """Result of one simulated game"""
+    game: int
+    seed: int
+    turns: int
+    winner: Optional[str]
+    victory: Optional[str] = None
+    collapse_turn: Dict[str, Optional[int]] = field(default_factory=dict)
+    prestige: Dict[str, int] = field(default_factory=dict)
+    population: Dict[str, int] = field(default_factory=dict)
+
+
+def derive_seed(master_seed: int, index: int) -> int:
+    """Independent 64-bit seed for game `index` of a run"""
+    digest = hashlib.sha256(f"lbac:{master_seed}:{index}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+# Games of this process, recycled from one play_game to the next
+_POOL = GamePool()
+
+
+def score(game: Game, name: str) -> int:
+    """Time-limit score: prestige + population / 10"""
+    civ = game.civilizations[name]
+    return civ.prestige + civ.resources.population // 10
+
+
+def play_game(index: int, seed: int, max_turns: int = 50,
+              player: Optional[str] = None,
+              recorder: Optional[TelemetryRecorder] = None) -> GameOutcome:
+    """Play one headless game and summarise it, recording telemetry if given a recorder"""
+    game = _POOL.acquire(seed)
+    if player:
+        game.set_player(player)
+
+    collapse_turn: Dict[str, Optional[int]] = {name: None for name in game.civilizations}
+    victory = None
+    results = recorder.simulate(game, index, max_turns) if recorder else game.simulate(max_turns)
+    for result in results:
+        for name in result.collapsed:
+            collapse_turn[name] = result.turn
+        victory = victory or result.victory
+
+    if victory:
+        winner = game.player_civ.name
+    else:
+        survivors = [name for name, civ in game.civilizations.items() if civ.is_alive]
+        winner = max(survivors, key=lambda name: score(game, name)) if survivors else None
+
+    outcome = GameOutcome(
+        game=index,
+        seed=seed,
+        turns=game.turn - 1,
+        winner=winner,
+        victory=victory,
+        collapse_turn=collapse_turn,
+        prestige={name: civ.prestige for name, civ in game.civilizations.items()},
+        population={name: civ.resources.population for name, civ in game.civilizations.items()},
+    )
+    _POOL.release(game)
+    return outcome
+
+
+def _play_task(task):
+    return play_game(*task)
+
+
+def _play_recorded_batch(batch):
+    """Play a batch of games into its own telemetry directory"""
+    tasks, directory = batch
+    with TelemetryRecorder(os.path.join(directory, f"part-{tasks[0][0]:08d}")) as recorder:
+        return [play_game(*task, recorder=recorder) for task in tasks]
+
+
+def run_monte_carlo(num_games: int, master_seed: int = 0, workers: Optional[int] = None,
+                    max_turns: int = 50, player: Optional[str] = None,
+                    telemetry: Optional[str] = None) -> List[GameOutcome]:
+    """Play num_games games, in parallel when workers > 1, ordered by game index
+
+    With telemetry, every game's per-turn rows are recorded under that
+    directory (one part per batch of games; read with TelemetryStore).
+    """
+    tasks = [(i, derive_seed(master_seed, i), max_turns, player) for i in range(num_games)]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, num_games // (workers * 8))
+    if telemetry:
+        batches = [(tasks[i:i + chunksize], telemetry) for i in range(0, num_games, chunksize)]
+        if workers == 1 or num_games <= 1:
+            return [o for batch in batches for o in _play_recorded_batch(batch)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return [o for part in pool.map(_play_recorded_batch, batches) for o in part]
+
+    if workers == 1 or num_games <= 1:
+        return [_play_task(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_play_task, tasks, chunksize=chunksize))
+
+
+def outcome_rows(outcomes: List[GameOutcome]) -> List[Dict[str, object]]:
+    """Flatten outcomes into one row per (game, civilization)"""
+    rows = []
+    for outcome in outcomes:
+        for name in outcome.prestige:
+            rows.append({
+                "game": outcome.game,
+                "seed": outcome.seed,
+                "turns": outcome.turns,
+                "civilization": name,
+                "winner": int(name == outcome.winner),
+                "victory": outcome.victory or "",
+                "collapse_turn": outcome.collapse_turn[name] or "",
+                "prestige": outcome.prestige[name],
+                "population": outcome.population[name],
+            })
+    return rows
+
+
+def summarize(outcomes: List[GameOutcome]) -> Dict[str, Dict[str, float]]:
+    """Win rate, collapse rate and mean final prestige/population per civilization"""
+    summary: Dict[str, Dict[str, float]] = {}
+    count = len(outcomes) or 1
+    for outcome in outcomes:
+        for name in outcome.prestige:
+            stats = summary.setdefault(name, {"win_rate": 0.0, "collapse_rate": 0.0,
+                                              "prestige": 0.0, "population": 0.0})
+            stats["win_rate"] += (name == outcome.winner) / count
+            stats["collapse_rate"] += (outcome.collapse_turn[name] is not None) / count
+            stats["prestige"] += outcome.prestige[name] / count
+            stats["population"] += outcome.population[name] / count
+    return summary
+
+
+def write_csv(outcomes: List[GameOutcome], path: str):
+    """Write the per-(game, civilization) result table as CSV"""
+    rows = outcome_rows(outcomes)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["game"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Run many headless LBAC games in parallel")
+    parser.add_argument("--games", type=int, default=1000, help="number of games")
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--turns", type=int, default=50, help="maximum turns per game")
+    parser.add_argument("--player", default=None, help="civilization played by the (passive) player")
+    parser.add_argument("--output", default=None, help="write the result table to this CSV file")
+    parser.add_argument("--telemetry", default=None,
+                        help="record per-turn columnar telemetry under this directory")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    outcomes = run_monte_carlo(args.games, args.seed, args.workers, args.turns, args.player,
+                               args.telemetry)
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        write_csv(outcomes, args.output)
+
+    print(f"Played {len(outcomes)} games in {elapsed:.2f}s "
+          f"({len(outcomes) / elapsed:.0f} games/s)")
+    print(f"\n{'Civilization':<20} {'Win %':>7} {'Collapse %':>11} {'Prestige':>9} {'Population':>11}")
+    for name, stats in summarize(outcomes).items():
+        print(f"{name:<20} {stats['win_rate'] * 100:>7.1f} {stats['collapse_rate'] * 100:>11.1f} "
+              f"{stats['prestige']:>9.1f} {stats['population']:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
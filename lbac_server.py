@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Multi-session LBAC game server
+
+One asyncio process holds many Game instances (sessions) and serves them over
+a local TCP or Unix socket. The protocol is one JSON object per line in each
+direction; every request may carry an "id" that is echoed in its response,
+so a client can pipeline requests for many sessions over one connection.
+
+Requests:
+    {"cmd": "new", "seed": 7, "civ": "Ugarit"}            -> {"session": 1, ...}
+    {"cmd": "status", "session": 1}
+    {"cmd": "act", "session": 1, "action": "send_gift", "target": "Cyprus"}
+    {"cmd": "end_turn", "session": 1}
+    {"cmd": "close", "session": 1}
+    {"cmd": "ping"} / {"cmd": "stats"}
+
+Responses are {"ok": true, ...} or {"ok": false, "error": "..."}.
+
+Actions are the typed actions of lbac_actions, sent in their dict form.
+Commands for one session run one at a time; a cheap turn is resolved on the
+event loop, while a heavy one (many civilizations, or a search-based AI
+policy) is sent to a process pool so the loop keeps serving other sessions.
+
+Usage:
+    python3 lbac_server.py --port 8765
+    python3 lbac_server.py --unix /tmp/lbac.sock --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from lbac_actions import ACTION_TYPES, action_from_dict
+from lbac_game import Game, PassivePolicy, RecruitPolicy, ActionResult, RaidResult, TurnResult
+
+
+# action -> (menu, request fields passed to the rule method)
+ACTIONS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    name: (cls.menu, cls.params()) for name, cls in ACTION_TYPES.items()
+}
+
+# Policies cheap enough to run on the event loop
+LIGHT_POLICIES = (PassivePolicy, RecruitPolicy)
+
+
+class ProtocolError(Exception):
+    """A request the server cannot carry out"""
+
+
+@dataclass
+class Session:
+    """One hosted game"""
+    game: Game
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def encode_result(result) -> dict:
+    """JSON-ready form of a rule method result"""
+    if isinstance(result, ActionResult):
+        return {"success": result.success, "message": result.message, "values": result.values}
+    if isinstance(result, RaidResult):
+        return {"success": result.victory, "message": result.message,
+                "values": {"loot_gold": result.loot_gold, "loot_food": result.loot_food,
+                           "attacker_losses": result.attacker_losses,
+                           "defender_losses": result.defender_losses}}
+    return {}
+
+
+def encode_turn(result: TurnResult, game: Game) -> dict:
+    """JSON-ready form of a TurnResult"""
+    return {
+        "turn": result.turn,
+        "production": result.production,
+        "bronze_made": result.bronze_made,
+        "starvation": result.starvation,
+        "collapsed": result.collapsed,
+        "events": [{"civ": e.civ, "event": e.event.value, "message": e.message}
+                   for e in result.events],
+        "raids": [{"attacker": r.attacker, "target": r.target, "victory": r.victory,
+                   "message": r.message} for r in result.raids],
+        "engagements": [{"sides": [e.side_a, e.side_b], "winner": e.winner,
+                         "message": e.message} for e in result.engagements],
+        "market": {good: {"price": c.price, "lots": c.lots,
+                          "filled": c.fills.get(game.player_civ.name, 0)
+                          if game.player_civ else 0}
+                   for good, c in result.market.items()},
+        "victory": result.victory,
+        "game_over": game.game_over,
+    }
+
+
+def encode_status(game: Game) -> dict:
+    """The player's civilization plus a world summary"""
+    status = {"turn": game.turn, "game_over": game.game_over, "world": game.world_status()}
+    civ = game.player_civ
+    if civ is not None:
+        res, mil = civ.resources, civ.military
+        status["player"] = {
+            "name": civ.name, "prestige": civ.prestige,
+            "technology_level": civ.technology_level, "is_alive": civ.is_alive,
+            "resources": {"food": res.food, "bronze": res.bronze, "gold": res.gold,
+                          "tin": res.tin, "copper": res.copper,
+                          "population": res.population},
+            "military": {"infantry": mil.infantry, "chariots": mil.chariots,
+                         "archers": mil.archers, "navy": mil.navy},
+            "relationships": dict(civ.relationships),
+        }
+    return status
+
+
+def _resolve_turn_remote(game: Game) -> Tuple[Game, TurnResult]:
+    """Worker-process side of an offloaded turn"""
+    result = game.resolve_turn()
+    return game, result
+
+
+class GameServer:
+    """Hosts sessions and answers protocol requests
+
+    workers is the size of the process pool for heavy turns (0 resolves every
+    turn on the event loop). A turn is heavy when the world has at least
+    offload_civs living civilizations or an AI civilization uses a policy
+    other than the built-in light ones.
+    """
+
+    def __init__(self, workers: Optional[int] = None, offload_civs: int = 200,
+                 max_sessions: int = 100_000):
+        self.sessions: Dict[int, Session] = {}
+        self.next_session = 1
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.offload_civs = offload_civs
+        self.max_sessions = max_sessions
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.commands = 0
+        self.offloaded = 0
+        self.handlers = {
+            "new": self.cmd_new, "status": self.cmd_status, "act": self.cmd_act,
+            "end_turn": self.cmd_end_turn, "close": self.cmd_close,
+            "ping": self.cmd_ping, "stats": self.cmd_stats,
+        }
+
+    # ------------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------------
+
+    def session(self, request: dict) -> Session:
+        try:
+            return self.sessions[request["session"]]
+        except KeyError:
+            raise ProtocolError(f"Unknown session {request.get('session')!r}") from None
+
+    async def cmd_new(self, request: dict) -> dict:
+        if len(self.sessions) >= self.max_sessions:
+            raise ProtocolError("Server is full")
+        game = Game(seed=request.get("seed"))
+        civ = request.get("civ")
+        if civ is not None:
+            if civ not in game.civilizations:
+                raise ProtocolError(f"Unknown civilization {civ!r}")
+            game.set_player(civ)
+        sid = self.next_session
+        self.next_session += 1
+        self.sessions[sid] = Session(game)
+        return {"session": sid, "civilizations": list(game.civilizations)}
+
+    async def cmd_status(self, request: dict) -> dict:
+        return encode_status(self.session(request).game)
+
+    async def cmd_act(self, request: dict) -> dict:
+        session = self.session(request)
+        body = {name: value for name, value in request.items() if name != "civ"}
+        try:
+            action = action_from_dict(body)
+        except ValueError as e:
+            raise ProtocolError(str(e)) from None
+        async with session.lock:
+            game = session.game
+            if game.player_civ is None:
+                raise ProtocolError("Session has no player civilization")
+            error = action.validate(game)
+            if error is not None:
+                raise ProtocolError(error)
+            session.last_used = time.monotonic()
+            return encode_result(action.apply(game))
+
+    def is_heavy(self, game: Game) -> bool:
+        """Whether a turn of game should be resolved in the worker pool"""
+        if self.workers <= 0:
+            return False
+        alive = 0
+        for civ in game.civilizations.values():
+            if civ.is_alive:
+                alive += 1
+                if civ is not game.player_civ and not isinstance(game.policy_for(civ),
+                                                                 LIGHT_POLICIES):
+                    return True
+        return alive >= self.offload_civs
+
+    async def cmd_end_turn(self, request: dict) -> dict:
+        session = self.session(request)
+        async with session.lock:
+            game = session.game
+            if game.game_over:
+                raise ProtocolError("Game is over")
+            if self.is_heavy(game):
+                if self.pool is None:
+                    self.pool = ProcessPoolExecutor(max_workers=self.workers)
+                loop = asyncio.get_running_loop()
+                game, result = await loop.run_in_executor(self.pool, _resolve_turn_remote, game)
+                session.game = game
+                self.offloaded += 1
+            else:
+                result = game.resolve_turn()
+            session.last_used = time.monotonic()
+            return encode_turn(result, game)
+
+    async def cmd_close(self, request: dict) -> dict:
+        self.session(request)
+        del self.sessions[request["session"]]
+        return {}
+
+    async def cmd_ping(self, request: dict) -> dict:
+        return {}
+
+    async def cmd_stats(self, request: dict) -> dict:
+        return {"sessions": len(self.sessions), "commands": self.commands,
+                "offloaded_turns": self.offloaded, "cpu_time": time.process_time()}
+
+    # ------------------------------------------------------------------
+    # Transport
+    # ------------------------------------------------------------------
+
+    async def handle_request(self, request: dict) -> dict:
+        """Answer one decoded request"""
+        self.commands += 1
+        handler = self.handlers.get(request.get("cmd"))
+        try:
+            if handler is None:
+                raise ProtocolError(f"Unknown command {request.get('cmd')!r}")
+            response = await handler(request)
+            response["ok"] = True
+        except ProtocolError as e:
+            response = {"ok": False, "error": str(e)}
+        except (TypeError, ValueError) as e:
+            response = {"ok": False, "error": f"Bad request: {e}"}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def _answer(self, line: bytes, writer: asyncio.StreamWriter):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            response = {"ok": False, "error": f"Bad request: {e}"}
+        else:
+            response = await self.handle_request(request)
+        writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        """Serve one client connection until it closes"""
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.ensure_future(self._answer(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                if writer.transport.get_write_buffer_size() > 1 << 20:
+                    await writer.drain()
+            if tasks:
+                await asyncio.gather(*tasks)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765,
+                    unix: Optional[str] = None) -> asyncio.AbstractServer:
+        """Start listening on a Unix socket path or a TCP host/port"""
+        if unix:
+            return await asyncio.start_unix_server(self.handle_connection, path=unix)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        """Shut down the worker pool"""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+async def serve(host: str, port: int, unix: Optional[str], workers: Optional[int],
+                offload_civs: int):
+    """Run a GameServer until cancelled"""
+    server = GameServer(workers=workers, offload_civs=offload_civs)
+    listener = await server.start(host, port, unix)
+    where = unix or f"{host}:{port}"
+    print(f"LBAC server listening on {where}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Serve many LBAC games over a local socket")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--unix", default=None, help="serve on this Unix socket path instead")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for heavy turns (0: resolve every turn inline)")
+    parser.add_argument("--offload-civs", type=int, default=200,
+                        help="offload turns of worlds with at least this many civilizations")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.offload_civs))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""
+Dataclass options shared by every LBAC module
+
+A leaf module (standard library only), so lbac_game and lbac_map can both
+import it without importing each other.
+"""
+
+import sys
+
+
+# Slotted dataclasses drop the per-instance __dict__ (Python 3.10+)
+SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
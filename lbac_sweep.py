@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Balance-parameter sweeps for LBAC
+
+Evaluates many GameParams configurations (a grid or a random search over
+named parameters, see GameParams.override) by playing headless games with
+each, in parallel, and ranks them by a per-game metric.
+
+Configurations are raced rather than played out in full: games are played in
+rounds, every configuration on the same seeds (so differences between them
+are paired and much less noisy), and after each round a configuration is
+dropped once a one-sided paired test shows it is worse than the current
+leader at the given confidence (Bonferroni-corrected over the field). Only
+the contenders play on, up to max_games each, so clearly bad configurations
+cost a round or two instead of the full budget.
+
+Usage:
+    python3 lbac_sweep.py --grid gift_cost=10,20,30 --grid event_severity=0.5,1,1.5
+    python3 lbac_sweep.py --random event_severity=0.5:2 --random upkeep_divisor=5:20 \\
+        --samples 40 --metric survival --output sweep.csv
+    python3 lbac_sweep.py --space space.json    # {"grid": {...}} or {"random": {...}}
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from statistics import NormalDist, fmean, stdev
+from typing import Callable, Dict, List, Optional, Sequence
+
+from lbac_game import Game, GameParams, GamePool, DEFAULT_PARAMS
+from lbac_runner import derive_seed, score
+
+
+def balance(game: Game) -> float:
+    """1 minus the coefficient of variation of final scores, floored at 0
+
+    Collapsed civilizations score 0.
+    """
+    scores = [score(game, name) if civ.is_alive else 0
+              for name, civ in game.civilizations.items()]
+    mean = fmean(scores)
+    return max(0.0, 1.0 - stdev(scores) / mean) if mean > 0 else 0.0
+
+
+def survival(game: Game) -> float:
+    """Fraction of civilizations still alive"""
+    civs = game.civilizations.values()
+    return sum(civ.is_alive for civ in civs) / len(civs)
+
+
+def length(game: Game) -> float:
+    """Turns played"""
+    return float(game.turn - 1)
+
+
+# Per-game metrics; a sweep maximises the mean
+METRICS: Dict[str, Callable[[Game], float]] = {
+    "balance": balance,
+    "survival": survival,
+    "length": length,
+}
+
+
+@dataclass
+class SweepResult:
+    """One configuration of a sweep"""
+    config: int
+    overrides: Dict[str, object]
+    samples: List[float] = field(default_factory=list)
+    dropped_round: Optional[int] = None
+
+    @property
+    def games(self) -> int:
+        return len(self.samples)
+
+    @property
+    def mean(self) -> float:
+        return fmean(self.samples) if self.samples else 0.0
+
+    @property
+    def stderr(self) -> float:
+        n = len(self.samples)
+        return stdev(self.samples) / math.sqrt(n) if n > 1 else 0.0
+
+
+def grid_space(axes: Dict[str, Sequence]) -> List[Dict[str, object]]:
+    """Every combination of the listed values"""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def random_space(ranges: Dict[str, Sequence], samples: int,
+                 seed: int = 0) -> List[Dict[str, object]]:
+    """Random configurations
+
+    A (low, high) pair of ints is sampled uniformly as an int, a pair with a
+    float as a float; any other list is a set of choices.
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(samples):
+        config = {}
+        for name, values in ranges.items():
+            if len(values) == 2 and all(isinstance(v, (int, float)) for v in values):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    config[name] = rng.randint(low, high)
+                else:
+                    config[name] = round(rng.uniform(low, high), 4)
+            else:
+                config[name] = rng.choice(list(values))
+        configs.append(config)
+    return configs
+
+
+def evaluate(params: GameParams, seeds: Sequence[int], metric: str = "balance",
+             max_turns: int = 50, player: Optional[str] = None) -> List[float]:
+    """Play one game per seed with params; the metric of each game"""
+    measure = METRICS[metric]
+    pool = GamePool(params)
+    values = []
+    for seed in seeds:
+        game = pool.acquire(seed)
+        if player:
+            game.set_player(player)
+        game.simulate(max_turns)
+        values.append(measure(game))
+        pool.release(game)
+    return values
+
+
+def _evaluate_task(task):
+    config, params, seeds, metric, max_turns, player = task
+    return config, evaluate(params, seeds, metric, max_turns, player)
+
+
+def leader_gap(result: SweepResult, leader: SweepResult) -> float:
+    """Paired t statistic of result minus leader over their common games"""
+    diffs = [a - b for a, b in zip(result.samples, leader.samples)]
+    if len(diffs) < 2:
+        return 0.0
+    mean = fmean(diffs)
+    spread = stdev(diffs)
+    if spread == 0:
+        return -math.inf if mean < 0 else 0.0
+    return mean / (spread / math.sqrt(len(diffs)))
+
+
+def race(configs: List[Dict[str, object]], metric: str = "balance", master_seed: int = 0,
+         workers: Optional[int] = None, round_games: int = 32, min_games: int = 64,
+         max_games: int = 512, confidence: float = 0.99, max_turns: int = 50,
+         player: Optional[str] = None, base: GameParams = DEFAULT_PARAMS) -> List[SweepResult]:
+    """Race configurations (overrides of base) against each other, best first
+
+    Every round plays round_games more games for each surviving configuration.
+    From min_games on, a configuration is dropped when its paired test
+    against the leader rejects at confidence.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}")
+    params = [base.override(config) for config in configs]
+    results = [SweepResult(i, config) for i, config in enumerate(configs)]
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        alive = list(results)
+        played = 0
+        rounds = 0
+        while alive and played < max_games:
+            seeds = [derive_seed(master_seed, i)
+                     for i in range(played, min(played + round_games, max_games))]
+            chunk = max(1, math.ceil(len(seeds) * len(alive) / (workers * 4)))
+            tasks = [(r.config, params[r.config], seeds[k:k + chunk], metric, max_turns, player)
+                     for r in alive for k in range(0, len(seeds), chunk)]
+            mapped = pool.map(_evaluate_task, tasks) if pool else map(_evaluate_task, tasks)
+            for config, values in mapped:
+                results[config].samples.extend(values)
+            played += len(seeds)
+            rounds += 1
+            if len(alive) == 1 and len(results) > 1:
+                break
+            if played >= min_games and len(alive) > 1:
+                critical = NormalDist().inv_cdf(1 - (1 - confidence) / (len(alive) - 1))
+                leader = max(alive, key=lambda r: r.mean)
+                for result in alive:
+                    if result is not leader and leader_gap(result, leader) < -critical:
+                        result.dropped_round = rounds
+                alive = [r for r in alive if r.dropped_round is None]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return sorted(results, key=lambda r: (r.dropped_round is not None, -r.mean))
+
+
+def format_results(results: List[SweepResult], metric: str, top: int = 10) -> str:
+    """Ranking table"""
+    lines = [f"{'#':>4} {metric:>10} {'+/-':>8} {'Games':>6} {'Status':>12}  Parameters"]
+    for result in results[:top]:
+        status = (f"dropped r{result.dropped_round}" if result.dropped_round is not None
+                  else "contender")
+        lines.append(f"{result.config:>4} {result.mean:>10.4f} {result.stderr:>8.4f} "
+                     f"{result.games:>6} {status:>12}  {json.dumps(result.overrides)}")
+    return "\n".join(lines)
+
+
+def write_csv(results: List[SweepResult], path: str):
+    """One row per configuration"""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["config", "mean", "stderr", "games", "dropped_round", "overrides"])
+        for r in results:
+            writer.writerow([r.config, r.mean, r.stderr, r.games,
+                             "" if r.dropped_round is None else r.dropped_round,
+                             json.dumps(r.overrides)])
+
+
+def _parse_axis(spec: str) -> tuple:
+    """name=v1,v2,... (JSON values) or name=low:high"""
+    name, _, values = spec.partition("=")
+    if ":" in values and not values.startswith("["):
+        low, high = values.split(":")
+        return name, [json.loads(low), json.loads(high)]
+    return name, [json.loads(v) for v in values.split(",")]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Sweep LBAC balance parameters")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2",
+                        help="grid axis (repeatable)")
+    parser.add_argument("--random", action="append", default=[], metavar="NAME=LOW:HIGH",
+                        help="random-search range or NAME=V1,V2 choices (repeatable)")
+    parser.add_argument("--space", default=None, help='JSON file: {"grid": {...}} or '
+                                                      '{"random": {...}, "samples": N}')
+    parser.add_argument("--samples", type=int, default=20, help="random configurations")
+    parser.add_argument("--metric", default="balance", choices=sorted(METRICS))
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--round-games", type=int, default=32, help="games per round")
+    parser.add_argument("--min-games", type=int, default=64, help="games before any drop")
+    parser.add_argument("--max-games", type=int, default=512, help="games per configuration")
+    parser.add_argument("--confidence", type=float, default=0.99, help="drop confidence")
+    parser.add_argument("--turns", type=int, default=50, help="maximum turns per game")
+    parser.add_argument("--player", default=None, help="civilization played by the (passive) player")
+    parser.add_argument("--output", default=None, help="write the ranking to this CSV file")
+    args = parser.parse_args(argv)
+
+    grid = dict(_parse_axis(spec) for spec in args.grid)
+    ranges = dict(_parse_axis(spec) for spec in args.random)
+    samples = args.samples
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+        grid.update(space.get("grid", {}))
+        ranges.update(space.get("random", {}))
+        samples = space.get("samples", samples)
+    configs = []
+    if grid:
+        configs += grid_space(grid)
+    if ranges:
+        configs += random_space(ranges, samples, args.seed)
+    if not configs:
+        parser.error("give at least one --grid, --random or --space")
+
+    start = time.perf_counter()
+    results = race(configs, args.metric, args.seed, args.workers, args.round_games,
+                   args.min_games, args.max_games, args.confidence, args.turns, args.player)
+    elapsed = time.perf_counter() - start
+    games = sum(r.games for r in results)
+
+    if args.output:
+        write_csv(results, args.output)
+    print(f"Raced {len(results)} configurations in {elapsed:.2f}s: {games} games played "
+          f"({games / (len(results) * args.max_games):.0%} of a full sweep)")
+    print(format_results(results, args.metric))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
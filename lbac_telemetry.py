@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Columnar per-turn telemetry for LBAC
+
+TelemetryRecorder appends one row per civilization per turn into
+preallocated column arrays: game, turn, civ (index into the civilization
+list) and every GameSnapshot field (resources, military, prestige,
+technology level, player and alive flags), plus the civilization's row of
+the relationship matrix. Full chunks are spilled to disk as plain .npy
+files and listed in an index.json, so memory stays bounded however many
+games are recorded.
+
+The files are in NumPy's .npy format (int64 columns, an int8 relations
+matrix of shape (rows, civs)), so numpy.load(path, mmap_mode="r") maps them
+directly; TelemetryStore reads them with the standard library's mmap.
+
+Layout of a telemetry directory (one per recorder; a store may hold many):
+
+    index.json                  {"civs": [...], "columns": [...], "chunks": [...]}
+    c00000.food.npy             one file per column per chunk
+    c00000.relations.npy
+"""
+
+import ast
+import json
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from lbac_game import Game, SNAPSHOT_FIELDS
+
+
+COLUMNS = ("game", "turn", "civ") + SNAPSHOT_FIELDS
+# Order of the values staged per row (civ is derived from the row position)
+BUFFER_FIELDS = ("game", "turn") + SNAPSHOT_FIELDS
+ROW_WIDTH = len(BUFFER_FIELDS)
+STAGED_ROW = struct.Struct(f"<{ROW_WIDTH}q")
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def write_npy(path: str, data, descr: str, shape: tuple):
+    """Write a buffer as a version 1.0 .npy file"""
+    header = repr({"descr": descr, "fortran_order": False, "shape": shape})
+    length = len(NPY_MAGIC) + 2 + len(header) + 1
+    header += " " * (-length % 64) + "\n"
+    with open(path, "wb") as f:
+        f.write(NPY_MAGIC)
+        f.write(len(header).to_bytes(2, "little"))
+        f.write(header.encode("latin1"))
+        f.write(data)
+
+
+def map_npy(path: str) -> memoryview:
+    """Memory-map a .npy file written by write_npy; returns a typed view"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(NPY_MAGIC)] != NPY_MAGIC:
+        raise ValueError(f"{path} is not a version 1.0 .npy file")
+    start = len(NPY_MAGIC) + 2
+    length = int.from_bytes(mapped[len(NPY_MAGIC):start], "little")
+    header = ast.literal_eval(mapped[start:start + length].decode("latin1"))
+    code = {"<i8": "q", "|i1": "b"}[header["descr"]]
+    return memoryview(mapped)[start + length:].cast(code)
+
+
+class TelemetryRecorder:
+    """Records per-turn rows and spills them to disk as columnar chunks
+
+    Game rows are packed straight into a preallocated row-major staging
+    array (one struct.pack_into per civilization per turn, the cheapest way
+    to write a row from Python) and written out column by column with
+    strided slices when a whole chunk is spilled. BatchWorld rows are copied
+    into the column arrays instead.
+    """
+
+    def __init__(self, directory: str, chunk_rows: int = 1 << 16):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.civs: List[str] = []
+        self.chunks: List[Dict[str, object]] = []
+        self.columns: Dict[str, array] = {}
+        self.staged = array("q")
+        self.staged_rows = 0
+        self.capacity = 0
+        self._game_ids: Dict[tuple, array] = {}
+        self.relations = bytearray()
+        self.rows = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _allocate(self, civs: List[str], min_rows: int):
+        self.civs = list(civs)
+        n = len(self.civs)
+        self.chunk_rows = max(min_rows, self.chunk_rows - self.chunk_rows % n)
+        self.relations = bytearray(self.chunk_rows * n)
+
+    def _reserve(self, n: int, staged: bool = True):
+        """Make room for n more rows, spilling first if the chunk is full
+
+        Game rows go to the staging array and BatchWorld rows to the column
+        arrays. Either grows by doubling up to a whole chunk, so recorders
+        that only ever see a few games never allocate a full one.
+        """
+        if self.rows + n > self.chunk_rows:
+            self.spill()
+        capacity = self.capacity if staged else len(self.columns.get("game", ()))
+        if self.rows + n <= capacity:
+            return
+        grown = min(self.chunk_rows, max(2 * capacity, self.rows + n, 1024))
+        zeros = bytes(8 * (grown - capacity))
+        if staged:
+            self.staged.frombytes(zeros * ROW_WIDTH)
+            self.capacity = grown
+        else:
+            for name in COLUMNS:
+                self.columns.setdefault(name, array("q")).frombytes(zeros)
+
+    def record(self, game: Game, game_id: int = 0):
+        """Append one row per civilization for the turn game has just resolved"""
+        civs = game.civilizations
+        n = len(civs)
+        if n != len(self.civs):
+            if self.civs:
+                raise ValueError("All recorded games must have the same civilizations")
+            self._allocate(list(civs), n)
+        rows = self.rows
+        if rows != self.staged_rows:
+            raise ValueError("Cannot mix Game and BatchWorld rows in one chunk")
+        if rows + n > self.capacity:
+            self._reserve(n)
+            rows = self.rows
+
+        pack_into, size = STAGED_ROW.pack_into, STAGED_ROW.size
+        staged = self.staged
+        at = rows * size
+        turn = game.turn - 1
+        for civ in civs.values():
+            r, m = civ.resources, civ.military
+            pack_into(staged, at, game_id, turn, r.food, r.bronze, r.gold, r.tin, r.copper,
+                      r.population, m.infantry, m.chariots, m.archers, m.navy,
+                      civ.prestige, civ.technology_level, civ.is_player, civ.is_alive)
+            at += size
+        self.relations[rows * n:(rows + n) * n] = game.relations.values
+        self.rows = self.staged_rows = rows + n
+
+    def simulate(self, game: Game, game_id: int = 0, max_turns: int = 50):
+        """Game.simulate, recording every turn"""
+        results = []
+        while not game.game_over and game.turn <= max_turns:
+            results.append(game.resolve_turn())
+            self.record(game, game_id)
+        return results
+
+    def record_world(self, world, games: Optional[Sequence[int]] = None,
+                     first_game: int = 0):
+        """Append rows for the given BatchWorld games (default: all of them)
+
+        The batch columns are copied slice by slice, without touching single
+        values from Python. BatchWorld keeps no relationship matrix, so the
+        relations of these rows are recorded as 0.
+        """
+        m = world.num_civs
+        if not self.civs:
+            self._allocate(world.civ_names, world.num_games * m)
+        elif self.civs != list(world.civ_names):
+            raise ValueError("All recorded games must have the same civilizations")
+        if self.staged_rows:
+            raise ValueError("Cannot mix Game and BatchWorld rows in one chunk")
+        if games is None:
+            games = range(world.num_games)
+        count = len(games) * m
+        self._reserve(count, staged=False)
+        rows = self.rows
+        columns = self.columns
+
+        if len(games) == world.num_games:
+            spans = [(rows, 0, count)]
+        else:
+            spans = [(rows + k * m, g * m, m) for k, g in enumerate(games)]
+        sources = {name: getattr(world, name) for name in SNAPSHOT_FIELDS}
+        for name in ("is_player", "is_alive"):
+            sources[name] = array("q", list(sources[name]))
+        civ_ids = array("q", range(m))
+        for at, start, size in spans:
+            for name, source in sources.items():
+                columns[name][at:at + size] = source[start:start + size]
+            columns["civ"][at:at + size] = civ_ids * (size // m)
+        turns = world.turn
+        if len(spans) == 1 and min(turns) == max(turns):
+            key = (first_game, world.num_games, m)
+            if key not in self._game_ids:
+                self._game_ids = {key: array("q", [first_game + g for g in games
+                                                   for _ in range(m)])}
+            columns["game"][rows:rows + count] = self._game_ids[key]
+            columns["turn"][rows:rows + count] = array("q", [turns[0] - 1]) * count
+        else:
+            at = rows
+            for g in games:
+                columns["game"][at:at + m] = array("q", [first_game + g]) * m
+                columns["turn"][at:at + m] = array("q", [turns[g] - 1]) * m
+                at += m
+        self.relations[rows * m:(rows + count) * m] = bytes(count * m)
+        self.rows = rows + count
+
+    def simulate_world(self, world, max_turns: int = 50, first_game: int = 0):
+        """Run a BatchWorld for max_turns, recording every turn of every game"""
+        expected = world.num_games * world.num_civs * max_turns
+        while True:
+            running = [g for g in range(world.num_games)
+                       if not world.game_over[g] and world.turn[g] <= max_turns]
+            if not running:
+                break
+            world.end_turn()
+            self.record_world(world, running, first_game)
+            if expected:
+                # Size the columns for the whole run (at most a chunk) in one go
+                self._reserve(min(expected, self.chunk_rows) - self.rows, staged=False)
+                expected = 0
+
+    def spill(self):
+        """Write the buffered rows as a new chunk and update the index"""
+        rows = self.rows
+        if rows == 0:
+            return
+        n = len(self.civs)
+        if self.staged_rows:
+            staged = self.staged
+            end = rows * ROW_WIDTH
+            columns = {name: staged[k:end:ROW_WIDTH] for k, name in enumerate(BUFFER_FIELDS)}
+            columns["civ"] = array("q", range(n)) * (rows // n)
+            self.staged_rows = 0
+        else:
+            columns = {name: memoryview(column)[:rows] for name, column in self.columns.items()}
+
+        prefix = f"c{len(self.chunks):05d}"
+        for name in COLUMNS:
+            write_npy(os.path.join(self.directory, f"{prefix}.{name}.npy"),
+                      columns[name], "<i8", (rows,))
+        write_npy(os.path.join(self.directory, f"{prefix}.relations.npy"),
+                  memoryview(self.relations)[:rows * n], "|i1", (rows, n))
+        game = columns["game"]
+        self.chunks.append({"prefix": prefix, "rows": rows,
+                            "games": [game[0], game[rows - 1]]})
+        self.rows = 0
+        self._write_index()
+
+    def _write_index(self):
+        index = {"civs": self.civs, "columns": list(COLUMNS) + ["relations"],
+                 "chunks": self.chunks}
+        path = os.path.join(self.directory, "index.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(path + ".tmp", path)
+
+    def close(self):
+        """Spill whatever is still buffered"""
+        self.spill()
+
+    def __enter__(self) -> "TelemetryRecorder":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TelemetryStore:
+    """Read access to every telemetry directory under a root directory"""
+
+    def __init__(self, root: str):
+        self.parts: List[str] = []
+        for path, _, files in sorted(os.walk(root)):
+            if "index.json" in files:
+                self.parts.append(path)
+        self.parts.sort()
+        self.indexes = []
+        for part in self.parts:
+            with open(os.path.join(part, "index.json")) as f:
+                self.indexes.append(json.load(f))
+        self.civs: List[str] = self.indexes[0]["civs"] if self.indexes else []
+
+    @property
+    def rows(self) -> int:
+        return sum(chunk["rows"] for index in self.indexes for chunk in index["chunks"])
+
+    def chunks(self, column: str) -> Iterator[memoryview]:
+        """Memory-mapped views of a column, one per chunk
+
+        The relations column is flat: row r of a chunk covers items
+        [r * civs, (r + 1) * civs).
+        """
+        for part, index in zip(self.parts, self.indexes):
+            for chunk in index["chunks"]:
+                yield map_npy(os.path.join(part, f"{chunk['prefix']}.{column}.npy"))
+
+    def column(self, column: str) -> array:
+        """A whole column loaded into memory"""
+        code = "b" if column == "relations" else "q"
+        data = array(code)
+        for view in self.chunks(column):
+            data.frombytes(view.tobytes())
+        return data
+
+    def trajectory(self, game: int, civ: str, column: str) -> List:
+        """Per-turn values of column for one civilization of one game
+
+        For the relations column each value is that civilization's row of
+        the relationship matrix, as a list with one entry per civilization.
+        """
+        k = self.civs.index(civ)
+        width = len(self.civs) if column == "relations" else 0
+        values: Dict[int, object] = {}
+        for games, civs, turns, data in zip(self.chunks("game"), self.chunks("civ"),
+                                            self.chunks("turn"), self.chunks(column)):
+            for i, (g, c) in enumerate(zip(games, civs)):
+                if g == game and c == k:
+                    if width:
+                        values[turns[i]] = data[i * width:(i + 1) * width].tolist()
+                    else:
+                        values[turns[i]] = data[i]
+        return [values[turn] for turn in sorted(values)]
+
+
+def record_games(directory: str, seeds: List[int], max_turns: int = 50,
+                 player: Optional[str] = None, first_game: int = 0):
+    """Play one headless game per seed, recording all of them into directory"""
+    with TelemetryRecorder(directory) as recorder:
+        for offset, seed in enumerate(seeds):
+            game = Game(seed=seed)
+            if player:
+                game.set_player(player)
+            recorder.simulate(game, first_game + offset, max_turns)
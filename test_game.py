@@ -3,10 +3,16 @@
 Test script to validate LBAC game mechanics
 """
 
+import builtins
+import random
 import sys
+import threading
 from lbac_game import (
     Game, Civilization, Resources, MilitaryForce, 
-    RelationshipStatus, EventType
+    RelationshipStatus, EventType, TurnResult, PrefetchRandom,
+    RelationshipMatrix, TIER_STATUSES, relationship_status, GameSnapshot,
+    AIPolicy, EVENT_TABLE, TerminalRenderer, BufferedTextRenderer, NullRenderer,
+    JSONRenderer
 )
 
 
@@ -152,6 +158,1111 @@ def test_resource_consumption():
     print("✓ Resource consumption test passed")
 
 
+def test_headless_simulation():
+    """Test that turns and actions run without console I/O"""
+    print("Testing Headless Simulation...")
+    
+    def no_input(prompt=""):
+        raise AssertionError("Headless rules must not call input()")
+    
+    original_input = builtins.input
+    builtins.input = no_input
+    try:
+        game = Game()
+        game.set_player("Ugarit")
+        
+        gold = game.player_civ.resources.gold
+        result = game.send_gift("Cyprus")
+        assert result.success, "Gift should succeed with 80 gold"
+        assert game.player_civ.resources.gold == gold - 20, "Gift should cost 20 gold"
+        
+        result = game.recruit("archers", 2)
+        assert result.success, "Should afford 2 archers"
+        assert game.player_civ.military.archers == 42, "Should have 42 archers"
+        assert not game.recruit("navy", -1).success, "Negative recruitment is invalid"
+        
+        raid = game.resolve_raid("Cyprus")
+        assert raid.attacker == "Ugarit" and raid.target == "Cyprus"
+        
+        results = game.simulate(max_turns=10)
+        assert all(isinstance(r, TurnResult) for r in results), "Should return TurnResults"
+        assert [r.turn for r in results] == list(range(1, len(results) + 1))
+        assert game.turn == len(results) + 1, "Turn counter should advance"
+        
+        # A world with no player runs AI turns only
+        observer = Game()
+        observer.simulate(max_turns=5)
+        assert observer.turn == 6, "Observer game should run 5 turns"
+    finally:
+        builtins.input = original_input
+    
+    print("✓ Headless simulation test passed")
+
+
+def test_batch_world_matches_scalar():
+    """Test that BatchWorld reproduces scalar turns for the same seeds"""
+    from lbac_batch import BatchWorld
+    print("Testing Batch World...")
+    
+    def build(seed):
+        games = []
+        for g in range(6):
+            game = Game(seed=seed + g, prefetch=64 if g >= 4 else 0)
+            if g % 2:
+                game.set_player("Hittite Empire")
+            games.append(game)
+        return games
+    
+    scalar = build(11)
+    for game in scalar:
+        for _ in range(30):
+            if not game.game_over:
+                game.resolve_turn()
+    
+    games = build(11)
+    world = BatchWorld.from_games(games)
+    for _ in range(30):
+        world.end_turn()
+    
+    for g, game in enumerate(games):
+        world.store_game(g, game)
+        assert game.turn == scalar[g].turn, f"Game {g} turn mismatch"
+        for civ, ref in zip(game.civilizations.values(), scalar[g].civilizations.values()):
+            assert civ.resources == ref.resources, f"{civ.name} resources differ in game {g}"
+            assert civ.military == ref.military, f"{civ.name} military differs in game {g}"
+            assert civ.is_alive == ref.is_alive, f"{civ.name} alive flag differs in game {g}"
+            assert civ.prestige == ref.prestige, f"{civ.name} prestige differs in game {g}"
+    
+    print("✓ Batch world test passed")
+
+
+def test_monte_carlo_runner():
+    """Test that runner results depend only on the master seed"""
+    from lbac_runner import run_monte_carlo, derive_seed
+    print("Testing Monte Carlo Runner...")
+    
+    serial = run_monte_carlo(6, master_seed=5, workers=1, max_turns=20)
+    parallel = run_monte_carlo(6, master_seed=5, workers=2, max_turns=20)
+    assert serial == parallel, "Results must not depend on worker count"
+    assert [o.game for o in serial] == list(range(6)), "Outcomes should be in game order"
+    assert serial[0].seed == derive_seed(5, 0), "Game seeds derive from the master seed"
+    assert len({o.seed for o in serial}) == 6, "Every game gets its own seed"
+    assert all(o.turns == 20 for o in serial), "Observer games run to the turn limit"
+    
+    other = run_monte_carlo(6, master_seed=6, workers=1, max_turns=20)
+    assert other != serial, "A different master seed should give different games"
+    
+    print("✓ Monte Carlo runner test passed")
+
+
+def test_seeded_games():
+    """Test that a game's seed alone determines how it plays out"""
+    print("Testing Seeded Games...")
+    
+    def play(seed, prefetch=0):
+        game = Game(seed=seed, prefetch=prefetch)
+        game.set_player("Cyprus")
+        game.send_gift("Ugarit")
+        game.resolve_raid("Assyria")
+        game.simulate(max_turns=25)
+        return [(civ.resources, civ.military, civ.relationships, civ.prestige)
+                for civ in game.civilizations.values()]
+    
+    assert play(3) == play(3), "Same seed should replay identically"
+    assert play(3) != play(4), "Different seeds should differ"
+    assert play(3, prefetch=64) == play(3, prefetch=64), "Prefetching is deterministic"
+    
+    # Games in threads do not share random state
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, play(7)))
+               for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(result == play(7) for result in results.values()), \
+        "Threaded games should match a serial replay"
+    
+    rng = PrefetchRandom(1, block=8)
+    draws = [rng.randint(1, 6) for _ in range(5)]
+    state = rng.getstate()
+    after = [rng.randint(1, 6) for _ in range(20)]
+    rng.setstate(state)
+    assert [rng.randint(1, 6) for _ in range(20)] == after, "State should round-trip"
+    assert all(1 <= d <= 6 for d in draws + after), "randint stays in range"
+    
+    print("✓ Seeded games test passed")
+
+
+def test_benchmark_suite():
+    """Test the benchmark harness and baseline comparison"""
+    from lbac_bench import (build_world, bench_world, bench_batch, bench_telemetry,
+                            check_budgets, check_claims, find_regressions)
+    print("Testing Benchmark Suite...")
+    
+    world = build_world(20)
+    assert len(world.civilizations) == 20, "Should build a 20-civ world"
+    assert len(world.player_civ.relationships) == 19, "Small worlds get full relationships"
+    
+    results = bench_world(6, min_time=0.001)
+    assert all(value > 0 for value in results.values()), "Every benchmark should report"
+    assert "full_game_50@6" in results and "memory_per_civ@6" in results
+    
+    baseline = {"end_turn@6": 1000.0, "memory_per_civ@6": 500.0}
+    assert not find_regressions({"end_turn@6": 900.0, "memory_per_civ@6": 550.0},
+                                baseline, 0.15), "Within threshold is not a regression"
+    regressions = find_regressions({"end_turn@6": 800.0, "memory_per_civ@6": 600.0},
+                                   baseline, 0.15)
+    assert len(regressions) == 2, "Slower ops and bigger memory both regress"
+    
+    results = bench_batch(4, turns=2, repeats=1)
+    assert sorted(results) == ["batch_turns@4g", "scalar_turns@4g"]
+    assert not check_claims({"batch_turns@4g": 120.0, "scalar_turns@4g": 100.0})
+    assert len(check_claims({"batch_turns@4g": 90.0, "scalar_turns@4g": 100.0})) == 1, \
+        "A batch engine slower than scalar games breaks its claim"
+    
+    results = bench_telemetry(4, turns=2, repeats=1)
+    assert sorted(results) == ["traced_batch_turns@4g", "traced_turns@4g",
+                               "untraced_batch_turns@4g", "untraced_turns@4g"]
+    assert not check_budgets({"traced_turns@4g": 96.0, "untraced_turns@4g": 100.0})
+    over = {"traced_turns@4g": 90.0, "untraced_turns@4g": 100.0}
+    assert len(check_budgets(over)) == 1, "Telemetry past its budget is reported"
+    assert not check_claims(over), "but is not a broken claim"
+    
+    print("✓ Benchmark suite test passed")
+
+
+def test_relationship_matrix():
+    """Test the world relationship matrix and its per-civ views"""
+    print("Testing Relationship Matrix...")
+    m = RelationshipMatrix(4)
+    m.adjust_mutual(0, 1, 90)
+    m.adjust_mutual(0, 1, 90)
+    assert m.get(0, 1) == 100 and m.get(1, 0) == 100, "Mutual updates clamp at 100"
+    m.adjust_pair(2, 3, -20, -10)
+    assert (m.get(2, 3), m.get(3, 2)) == (-20, -10), "Pair updates can be asymmetric"
+    m.set_mutual(1, 2, -150)
+    assert m.get(1, 2) == -100, "Values clamp at -100"
+    
+    m.adjust_row(0, -150)
+    assert list(m.row(0)) == [0, -50, -100, -100], "Row update clamps and skips the diagonal"
+    m.adjust_column(3, 250)
+    assert [m.get(i, 3) for i in range(3)] == [100, 100, 100], "Column update clamps"
+    
+    for i in range(4):
+        expected = [relationship_status(v) for v in m.row(i)]
+        assert m.statuses_row(i) == expected, "Vectorized tiers match scalar classification"
+    tiers = m.tiers()
+    assert [TIER_STATUSES[t] for t in tiers[4:8]] == m.statuses_row(1)
+    
+    game = Game(seed=1)
+    egypt = game.civilizations["New Kingdom Egypt"]
+    assert len(egypt.relationships) == 5, "Views exclude the civilization itself"
+    assert "New Kingdom Egypt" not in egypt.relationships
+    egypt.relationships["Cyprus"] = 60
+    i, j = game.civ_index["New Kingdom Egypt"], game.civ_index["Cyprus"]
+    assert game.relations.get(i, j) == 60, "Views write through to the matrix"
+    assert egypt.get_relationship_status("Cyprus") == RelationshipStatus.FRIENDLY
+    
+    game.set_player("New Kingdom Egypt")
+    game.declare_war("Cyprus")
+    assert game.civilizations["Cyprus"].relationships["New Kingdom Egypt"] == -100, \
+        "War is declared on both sides"
+    assert egypt.get_relationship_status("Cyprus") == RelationshipStatus.HOSTILE, \
+        "Cached tiers are dropped when the row changes"
+    assert egypt.get_relationship_status("Atlantis") == RelationshipStatus.NEUTRAL
+    
+    snap = game.snapshot()
+    game.send_gift("Cyprus")
+    game.relations.adjust_column(j, 120)
+    game.restore(snap)
+    civs = list(game.civilizations.values())
+    for civ in civs:
+        for other in civs:
+            if other is not civ:
+                assert civ.get_relationship_status(other.name) == \
+                    relationship_status(civ.relationships[other.name]), "Tier cache stays valid"
+    
+    assert egypt.military.get_upkeep() == (egypt.military.infantry + egypt.military.archers +
+                                           2 * (egypt.military.chariots + egypt.military.navy))
+    
+    print("✓ Relationship matrix test passed")
+
+
+def test_compact_objects():
+    """Test that core dataclasses carry no per-instance __dict__"""
+    print("Testing Compact Objects...")
+    if sys.version_info < (3, 10):
+        print("✓ Compact objects test skipped (needs Python 3.10+)")
+        return
+    
+    civ = Civilization(name="Test", description="Test")
+    for obj in (civ, civ.resources, civ.military):
+        assert not hasattr(obj, "__dict__"), f"{type(obj).__name__} should be slotted"
+    
+    try:
+        civ.resources.silver = 5
+        assert False, "Unknown attributes should be rejected"
+    except AttributeError:
+        pass
+    
+    game = Game(seed=2)
+    assert not hasattr(game.civilizations["Cyprus"].relationships, "__dict__"), \
+        "Relationship views should be slotted"
+    
+    print("✓ Compact objects test passed")
+
+
+def test_snapshot_fork_restore():
+    """Test that snapshots round-trip and forks play out independently"""
+    print("Testing Snapshot, Fork and Restore...")
+    game = Game(seed=8)
+    game.set_player("Assyria")
+    game.simulate(max_turns=5)
+    snap = game.snapshot()
+    
+    assert GameSnapshot.from_bytes(snap.to_bytes()) == snap, "Flat buffer should round-trip"
+    
+    fork = game.fork()
+    assert fork.snapshot() == snap, "A fork starts in the same state"
+    assert fork.player_civ.name == "Assyria", "The fork keeps the player"
+    fork.threaten("Ugarit")
+    fork.simulate(max_turns=15)
+    assert game.snapshot() == snap, "Playing a fork must not touch the original"
+    
+    game.simulate(max_turns=15)
+    other = game.fork(snap)
+    other.threaten("Ugarit")
+    other.simulate(max_turns=15)
+    assert other.snapshot() == fork.snapshot(), "Forks from one snapshot replay identically"
+    
+    game.restore(snap)
+    assert game.snapshot() == snap, "Restore returns to the exact snapshot"
+    assert game.turn == 6 and game.civilizations["Assyria"].is_player
+    
+    prefetching = Game(seed=8, prefetch=32)
+    prefetching.simulate(max_turns=3)
+    assert prefetching.fork().snapshot() == prefetching.snapshot(), \
+        "Prefetched draws are part of the snapshot"
+    
+    print("✓ Snapshot, fork and restore test passed")
+
+
+def test_ai_policies():
+    """Test pluggable AI policies and the MCTS policy"""
+    from lbac_mcts import MCTSPolicy, candidate_moves
+    print("Testing AI Policies...")
+    
+    class Gifting(AIPolicy):
+        def __init__(self):
+            self.calls = []
+        
+        def act(self, game, civ):
+            self.calls.append(civ.name)
+            game.send_gift("Ugarit", civ)
+    
+    game = Game(seed=4)
+    game.set_player("Ugarit")
+    gifting = Gifting()
+    game.ai_policies["Cyprus"] = gifting
+    before = game.civilizations["Ugarit"].relationships["Cyprus"]
+    game.resolve_turn()
+    assert gifting.calls == ["Cyprus"], "Only Cyprus uses the custom policy"
+    assert game.civilizations["Ugarit"].relationships["Cyprus"] > before, \
+        "The policy acts through the game rules"
+    
+    game = Game(seed=4)
+    cyprus = game.civilizations["Cyprus"]
+    moves = candidate_moves(game, cyprus)
+    assert ("pass", None) in moves and ("send_gift", "Ugarit") in moves
+    pricey = Game(seed=4, params=game.params.override({"gift_cost": cyprus.resources.gold + 1}))
+    assert ("send_gift", "Ugarit") not in candidate_moves(pricey, pricey.civilizations["Cyprus"]), \
+        "Gifts follow params.gift_cost"
+    
+    def play():
+        game = Game(seed=4)
+        game.ai_policy = MCTSPolicy(time_budget=None, max_iterations=20, seed=9)
+        game.simulate(max_turns=4)
+        return game.snapshot()
+    
+    assert play() == play(), "Iteration-bounded MCTS is reproducible"
+    
+    print("✓ AI policies test passed")
+
+
+def test_random_events():
+    """Test that table-driven events strike every civilization"""
+    print("Testing Random Events...")
+    
+    assert {spec.event for spec in EVENT_TABLE} == set(EventType), "Every event type has a row"
+    
+    game = Game(seed=8)
+    game.set_player("New Kingdom Egypt")
+    struck = set()
+    for _ in range(30):
+        result = game.resolve_turn()
+        struck.update(event.civ for event in result.events)
+        player_events = [e for e in result.events if e.civ == "New Kingdom Egypt"]
+        assert result.event == (player_events[0] if player_events else None)
+        for event in result.events:
+            assert event.message, "Every event has an announcement"
+    assert struck - {"New Kingdom Egypt"}, "Events also strike AI civilizations"
+    
+    game = Game(seed=8)
+    egypt = game.civilizations["New Kingdom Egypt"]
+    egypt.military.navy = 20
+    sea_peoples = next(s for s in EVENT_TABLE if s.event == EventType.SEA_PEOPLES)
+    prestige = egypt.prestige
+    event = game.strike_event(egypt, sea_peoples)
+    assert event.defended and egypt.prestige == prestige + 10, "Navy repels the Sea Peoples"
+    
+    egypt.military.navy = 0
+    egypt.military.infantry = 5
+    gold = egypt.resources.gold
+    event = game.strike_event(egypt, sea_peoples)
+    assert not event.defended and egypt.military.infantry == 0, "Infantry losses floor at 0"
+    assert egypt.resources.gold == gold - 30
+    assert "and 30 gold" in event.message
+    
+    print("✓ Random events test passed")
+
+
+def test_journal_replay():
+    """Test that a journaled game replays to identical states"""
+    import os
+    import tempfile
+    from lbac_game import TraderPolicy
+    from lbac_journal import Journal, replay, state_hash
+    from lbac_map import generate_map
+    from lbac_mcts import MCTSPolicy
+    print("Testing Journal Replay...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "game.lbj")
+        game = Game(seed=6)
+        game.set_player("Cyprus")
+        game.ai_policies["Assyria"] = MCTSPolicy(time_budget=0.002, seed=1)
+        hashes = {}
+        with Journal(path, buffer_size=256) as journal:
+            journal.attach(game)
+            game.send_gift("Ugarit")
+            game.recruit("navy", 1)
+            for _ in range(12):
+                game.resolve_turn()
+                hashes[game.turn - 1] = state_hash(game)
+                game.trade_resources(0)
+        
+        assert state_hash(replay(path)) == state_hash(game), "Replay reaches the final state"
+        assert state_hash(replay(path, until_turn=5)) == hashes[5], "Replay stops at any turn"
+        
+        with open(path) as f:
+            lines = f.readlines()
+        lines[1] = lines[1].replace('"Ugarit"', '"Assyria"')
+        with open(path, "w") as f:
+            f.writelines(lines)
+        try:
+            replay(path)
+            assert False, "Tampered journal should not verify"
+        except ValueError:
+            pass
+        
+        path = os.path.join(tmp, "mapped.lbj")
+        game = Game(seed=8)
+        game.world_map = generate_map(30, seed=4, civs=list(game.civilizations))
+        game.set_player("Ugarit")
+        with Journal(path) as journal:
+            journal.attach(game)
+            for _ in range(8):
+                game.queue_raid(game.raid_targets(game.player_civ)[0])
+                game.resolve_turn()
+        replayed = replay(path)
+        assert replayed.world_map.to_dict() == game.world_map.to_dict(), "The header keeps the map"
+        assert state_hash(replayed) == state_hash(game)
+        
+        path = os.path.join(tmp, "traders.lbj")
+        game = Game(seed=9)
+        game.set_player("Cyprus")
+        for name in ("Ugarit", "Assyria", "Hittite Empire"):
+            game.ai_policies[name] = TraderPolicy()
+        with Journal(path) as journal:
+            journal.attach(game)
+            for _ in range(10):
+                game.resolve_turn()
+        assert state_hash(replay(path)) == state_hash(game), "TraderPolicy civilizations replay"
+    
+    print("✓ Journal replay test passed")
+
+
+def test_game_server():
+    """Test the multi-session server protocol and load generator"""
+    import asyncio
+    from lbac_server import GameServer
+    from lbac_loadgen import run_load
+    print("Testing Game Server...")
+    
+    async def scenario():
+        server = GameServer(workers=1, offload_civs=6)
+        new = await server.handle_request({"cmd": "new", "seed": 3, "civ": "Ugarit", "id": 7})
+        assert new["ok"] and new["id"] == 7
+        sid = new["session"]
+        gift = await server.handle_request(
+            {"cmd": "act", "session": sid, "action": "send_gift", "target": "Cyprus"})
+        assert gift["ok"] and gift["success"], "Actions map onto the rule methods"
+        bad = await server.handle_request({"cmd": "act", "session": sid, "action": "recruit"})
+        assert not bad["ok"], "Missing arguments are rejected"
+        bad = await server.handle_request({"cmd": "status", "session": 99})
+        assert not bad["ok"], "Unknown sessions are rejected"
+        
+        reference = Game(seed=3)
+        reference.set_player("Ugarit")
+        reference.send_gift("Cyprus")
+        reference.resolve_turn()
+        turn = await server.handle_request({"cmd": "end_turn", "session": sid})
+        assert turn["ok"] and server.offloaded == 1, "Large worlds are offloaded"
+        status = await server.handle_request({"cmd": "status", "session": sid})
+        assert status["turn"] == 2
+        assert status["player"]["resources"]["gold"] == \
+            reference.civilizations["Ugarit"].resources.gold, "Offloaded turns match"
+        server.close()
+        
+        server = GameServer(workers=0)
+        listener = await server.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        report = await run_load(lambda: asyncio.open_connection("127.0.0.1", port),
+                                sessions=6, connections=2, turns=3, actions=2)
+        listener.close()
+        await listener.wait_closed()
+        assert report.commands >= 6 * (3 * 3 + 2), "Every session played its turns"
+        assert not server.sessions, "Sessions are closed afterwards"
+        assert report.p99_ms >= report.p50_ms > 0
+    
+    asyncio.run(scenario())
+    print("✓ Game server test passed")
+
+
+def test_renderers():
+    """Test that the front-end talks only to its renderer"""
+    import io
+    import json
+    print("Testing Renderers...")
+    
+    script = ["4", "", "6", "", "", "", "7"]  # Ugarit, end turn, continue..., quit
+    
+    buffered = BufferedTextRenderer(script)
+    Game(seed=2, renderer=buffered).play()
+    assert "You have chosen to lead Ugarit!" in buffered.text
+    assert "Turn 2 - Ugarit" in buffered.text and "Thanks for playing!" in buffered.text
+    
+    null = NullRenderer(script)
+    game = Game(seed=2, renderer=null)
+    game.play()
+    assert game.turn == 2, "The null renderer still drives the game"
+    
+    class CountingStream(io.StringIO):
+        writes = 0
+        
+        def write(self, text):
+            CountingStream.writes += 1
+            return super().write(text)
+    
+    stream = CountingStream()
+    game = Game(seed=2, renderer=TerminalRenderer(stream))
+    game.set_player("Ugarit")
+    game.display_status()
+    game.display_relationships()
+    game.renderer.flush()
+    assert CountingStream.writes == 1, "A whole screen is written at once"
+    assert stream.getvalue() in buffered.text
+    
+    stream = io.StringIO()
+    game = Game(seed=2, renderer=JSONRenderer(stream))
+    game.set_player("Ugarit")
+    game.display_relationships()
+    game.renderer.flush()
+    screen = json.loads(stream.getvalue())
+    assert screen["lines"][0] == "\nDIPLOMATIC RELATIONS:"
+    
+    print("✓ Renderers test passed")
+
+
+def test_phase_profiler():
+    """Test per-phase turn instrumentation"""
+    from lbac_profile import Profiler
+    print("Testing Phase Profiler...")
+    
+    plain = Game(seed=12)
+    plain.set_player("Assyria")
+    plain.simulate(max_turns=5)
+    
+    game = Game(seed=12)
+    game.set_player("Assyria")
+    profiler = Profiler().attach(game)
+    game.simulate(max_turns=5)
+    assert game.snapshot() == plain.snapshot(), "Profiling does not change the game"
+    
+    phases = profiler.phases()
+    assert list(phases) == ["turn"] + [name for name, _ in Game.TURN_PHASES]
+    assert all(stats.calls == 5 for stats in phases.values()), "Every phase runs each turn"
+    assert profiler.stats["ai_turn[Cyprus]"].calls == 5, "Each AI civ has its own timer"
+    assert "ai_turn[Assyria]" not in profiler.stats, "The player has no AI timer"
+    assert phases["turn"].wall_ns >= phases["ai_turns"].wall_ns > 0
+    assert profiler.counters["events"] >= 0
+    
+    with profiler.phase("custom"):
+        sum(range(100))
+    assert profiler.stats["custom"].calls == 1
+    assert "ai_turns" in profiler.report()
+    
+    profiler.reset()
+    assert not profiler.stats and profiler.turns == 0
+    
+    print("✓ Phase profiler test passed")
+
+
+def test_telemetry():
+    """Test columnar telemetry recording and memory-mapped reads"""
+    import os
+    import tempfile
+    from lbac_batch import BatchWorld
+    from lbac_telemetry import TelemetryRecorder, TelemetryStore, map_npy
+    print("Testing Telemetry...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        games = []
+        with TelemetryRecorder(os.path.join(tmp, "scalar"), chunk_rows=50) as recorder:
+            for i in range(3):
+                game = Game(seed=30 + i)
+                game.set_player("Ugarit")
+                recorder.simulate(game, i, max_turns=10)
+                games.append(game)
+        assert len(recorder.chunks) > 1, "Small chunks force several spills"
+        
+        store = TelemetryStore(tmp)
+        civs = len(store.civs)
+        assert store.rows == sum((g.turn - 1) * civs for g in games)
+        replay = Game(seed=31)
+        replay.set_player("Ugarit")
+        food, relations = [], []
+        cyprus = list(replay.civilizations).index("Cyprus")
+        for _ in range(games[1].turn - 1):
+            replay.resolve_turn()
+            food.append(replay.civilizations["Cyprus"].resources.food)
+            relations.append(list(replay.relations.values[cyprus * civs:(cyprus + 1) * civs]))
+        assert store.trajectory(1, "Cyprus", "food") == food, "Rows match the played game"
+        assert store.trajectory(1, "Cyprus", "relations") == relations, \
+            "Relations trajectories are the civilization's matrix rows"
+        first = Game(seed=30)
+        first.set_player("Ugarit")
+        first.resolve_turn()
+        assert store.column("relations")[:civs].tolist() == list(first.relations.values[:civs])
+        
+        played = [Game(seed=40 + i) for i in range(4)]
+        played[0].set_player("Ugarit")
+        world = BatchWorld.from_games(played)
+        with TelemetryRecorder(os.path.join(tmp, "batch")) as recorder:
+            recorder.simulate_world(world, max_turns=5, first_game=100)
+        batch = TelemetryStore(os.path.join(tmp, "batch"))
+        assert batch.rows == 4 * 5 * world.num_civs
+        assert sorted(set(batch.column("game"))) == [100, 101, 102, 103]
+        last = -4 * world.num_civs
+        assert batch.column("is_alive")[last:].tolist() == list(world.is_alive), \
+            "Flags are stored as 0/1 values"
+        assert batch.column("is_player")[last:].tolist() == list(world.is_player)
+        
+        view = map_npy(os.path.join(tmp, "batch", "c00000.turn.npy"))
+        assert view.format == "q" and len(view) == batch.rows
+        assert min(view) == 1 and max(view) == 5, "Turn column holds the resolved turn"
+    
+    print("✓ Telemetry test passed")
+
+
+def test_balance_params():
+    """Test balance parameters and the racing parameter sweep"""
+    from lbac_game import DEFAULT_PARAMS
+    from lbac_batch import BatchWorld
+    from lbac_sweep import race, grid_space
+    print("Testing Balance Parameters...")
+    
+    params = DEFAULT_PARAMS.override({"gift_cost": 30, "unit_costs.infantry": [12, 6],
+                                      "event_severity": 2, "upkeep_divisor": 5})
+    assert params.unit_costs["infantry"] == (12, 6) and DEFAULT_PARAMS.unit_costs["infantry"] == (10, 5)
+    assert params.event_table()[0].effects == (("food", -120, -60),)
+    assert DEFAULT_PARAMS.override(params.to_dict()) == params, "Parameters round-trip"
+    try:
+        DEFAULT_PARAMS.override({"gift_costs": 1})
+        assert False, "Unknown parameters are rejected"
+    except ValueError:
+        pass
+    
+    game = Game(seed=3, params=params)
+    game.set_player("Ugarit")
+    gold = game.player_civ.resources.gold
+    assert game.send_gift("Cyprus").success
+    assert game.player_civ.resources.gold == gold - 30
+    game.recruit("infantry", 1)
+    assert game.player_civ.resources.gold == gold - 36
+    
+    import os
+    import tempfile
+    from lbac_journal import Journal, replay
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "params.lbj")
+        with Journal(path).attach(game):
+            game.simulate(max_turns=8)
+        assert replay(path).params == params, "Journals record the parameters"
+    
+    # The batch engine follows the same parameters
+    scalar = [Game(seed=50 + g, params=params) for g in range(4)]
+    for g in scalar:
+        g.simulate(max_turns=20)
+    world = BatchWorld.from_games([Game(seed=50 + g, params=params) for g in range(4)])
+    for _ in range(20):
+        world.end_turn()
+    for g, ref in enumerate(scalar):
+        base = g * world.num_civs
+        assert list(world.food[base:base + world.num_civs]) == \
+            [civ.resources.food for civ in ref.civilizations.values()]
+    
+    configs = grid_space({"event_severity": [0, 3]})
+    results = race(configs, metric="survival", workers=1, round_games=8, min_games=16,
+                   max_games=64)
+    assert results[0].overrides == {"event_severity": 0}, "Harmless events keep civs alive"
+    assert results[1].dropped_round is not None, "The clearly worse config is dropped"
+    assert results[1].games < 64 and results[0].games <= 64
+    
+    results = race(grid_space({"gift_cost": [20]}), workers=1, round_games=4, min_games=4,
+                   max_games=8)
+    assert len(results) == 1 and results[0].games == 8, "A lone config plays every game"
+    
+    print("✓ Balance parameters test passed")
+
+
+def test_battles():
+    """Test simultaneous raid and war resolution"""
+    print("Testing Battle Resolution...")
+    game = Game(seed=12)
+    game.set_player("Ugarit")
+    game.simulate(max_turns=3)
+    
+    # One queued raid is exactly resolve_raid
+    for target in ("Cyprus", "New Kingdom Egypt"):  # a victory and a defeat
+        direct, queued = game.fork(), game.fork()
+        expected = direct.resolve_raid(target)
+        assert queued.queue_raid(target).success
+        result = TurnResult(turn=queued.turn)
+        queued.phase_battles(result)
+        assert result.raids == [expected], "A lone raid matches resolve_raid"
+        assert queued.snapshot() == direct.snapshot()
+    assert not game.queue_raid("Ugarit").success, "Cannot raid yourself"
+    
+    # Raids are simultaneous: both are fought with the armies of the phase start
+    battle = game.fork()
+    ugarit, cyprus = battle.civilizations["Ugarit"], battle.civilizations["Cyprus"]
+    strength = ugarit.military.get_total_strength()
+    battle.queue_raid("Cyprus")
+    battle.queue_raid("Ugarit", civ=cyprus)
+    result = battle.resolve_turn()
+    assert [r.attacker for r in result.raids] == ["Ugarit", "Cyprus"]
+    assert result.raids[1].defender_strength == strength // 2
+    assert not battle.pending_raids, "Queued raids are spent"
+    
+    # Wars fight every turn until diplomacy lifts either side out of Hostile
+    war = game.fork()
+    assert war.declare_war("Hittite Empire").success
+    i, j = war.civ_index["Ugarit"], war.civ_index["Hittite Empire"]
+    assert war.wars == {(min(i, j), max(i, j))}
+    infantry = war.civilizations["Hittite Empire"].military.infantry
+    result = war.resolve_turn()
+    (engagement,) = result.engagements
+    assert engagement.winner in ("Ugarit", "Hittite Empire")
+    lost = engagement.losses_a if engagement.side_a == "Hittite Empire" else engagement.losses_b
+    assert lost["infantry"] == infantry // (10 if engagement.winner == "Ugarit" else 20)
+    snap = war.snapshot()
+    assert war.fork(snap).wars == war.wars, "Wars survive snapshots and forks"
+    assert Game(seed=12).fork().snapshot().state[2 + 14 * 6:].tolist() == [], \
+        "A world at peace adds nothing to the snapshot"
+    war.relations.set_mutual(i, j, 0)
+    assert war.resolve_turn().engagements == [] and not war.wars, "Peace ends the war"
+    war.restore(snap)
+    assert len(war.wars) == 1, "Restore brings the war back"
+    
+    print("✓ Battle resolution test passed")
+
+
+def test_world_map():
+    """Test the map layer: adjacency, spatial index, route costs and reach"""
+    from lbac_map import generate_map, eastern_mediterranean
+    from lbac_mcts import candidate_moves
+    from lbac_journal import state_hash
+    print("Testing World Map...")
+    
+    world = eastern_mediterranean()
+    cyprus = world.home("Cyprus")
+    assert all(world.regions[r].sea for r in world.neighbours(cyprus)), "Cyprus is an island"
+    assert world.coast(world.home("Ugarit")) and not world.coast(world.home("Assyria"))
+    assert world.route_cost(cyprus, world.home("Assyria")) == \
+        world.route_cost(world.home("Assyria"), cyprus), "Routes are symmetric"
+    
+    game = Game(seed=4)
+    game.set_player("Assyria")
+    assert game.raid_targets() == ["Ugarit"], "Assyria can only reach Ugarit"
+    assert game.trade_partners()[0] == "Ugarit" and len(game.trade_partners()) == 5
+    assert not game.queue_raid("Mycenaean Greece").success, "Raids need a route in range"
+    before = state_hash(game)
+    assert not game.resolve_raid("Mycenaean Greece").success, "So do immediate raids"
+    assert state_hash(game) == before, "A raid out of reach changes nothing"
+    near = Game(seed=4, params=game.params.override({"trade_range": 1000}))
+    near.set_player("Assyria")
+    gold = near.player_civ.resources.gold
+    assert not near.establish_trade_route("Cyprus").success, "Trade needs a route in range"
+    assert near.player_civ.resources.gold == gold
+    assert near.establish_trade_route("Ugarit").success
+    raids = [target for move, target in candidate_moves(game, game.player_civ)
+             if move == "resolve_raid"]
+    assert set(raids) <= {"Ugarit"}, "The AI only raids within reach"
+    
+    # The spatial index and the bounded search agree with brute force
+    big = generate_map(2500, seed=1, civs=[f"Civ {i}" for i in range(50)])
+    for x, y in ((3.2, 7.9), (25.0, 25.0), (49.4, 0.1)):
+        brute = sorted(range(len(big)),
+                       key=lambda i: (big.regions[i].x - x) ** 2 + (big.regions[i].y - y) ** 2)
+        assert big.nearest(x, y) == brute[0]
+        assert set(big.within(x, y, 3.0)) == {
+            i for i in brute
+            if (big.regions[i].x - x) ** 2 + (big.regions[i].y - y) ** 2 <= 9.0}
+    home = big.home("Civ 7")
+    full = big.route_costs(home)
+    reach = big.reachable(home, 800)
+    assert reach == {i: c for i, c in enumerate(full) if 0 <= c <= 800}
+    assert all(big.route_cost(r, home) == c for r, c in reach.items())
+    assert set(big.civs_within("Civ 7", 800)) == {
+        name for name, region in big.homes.items()
+        if name != "Civ 7" and 0 <= full[region] <= 800}
+    
+    print("✓ World map test passed")
+
+
+def test_market():
+    """Test batch market clearing and the trading AI"""
+    from lbac_game import Order, TraderPolicy
+    from lbac_market import clear_market
+    print("Testing Market...")
+    
+    game = Game(seed=6)
+    game.set_player("Ugarit")
+    civs = game.civilizations
+    
+    def totals():
+        return [sum(getattr(civ.resources, name) for civ in civs.values())
+                for name in ("gold", "food", "tin")]
+    
+    before = totals()
+    food = civs["Cyprus"].resources.food
+    orders = [
+        Order("Ugarit", "food", "buy", 3, 8),
+        Order("Assyria", "food", "buy", 2, 4),              # bids under every ask
+        Order("Cyprus", "food", "sell", 2, 5),
+        Order("Hittite Empire", "food", "sell", 5, 6),
+        Order("Mycenaean Greece", "tin", "sell", 1000, 1),  # more than it holds...
+        Order("Ugarit", "tin", "buy", 1000, 40),            # ...and more than Ugarit can pay
+        Order("Assyria", "copper", "sell", 1, 30),          # no buyers
+    ]
+    tin = civs["Mycenaean Greece"].resources.tin
+    gold = civs["Ugarit"].resources.gold
+    cleared = clear_market(game, orders)
+    food_market = cleared["food"]
+    assert totals() == before, "Trades move goods and gold, never create them"
+    assert food_market.fills["Ugarit"] == 3 and "Assyria" not in food_market.fills
+    assert food_market.fills["Cyprus"] == -2 and food_market.fills["Hittite Empire"] == -1, \
+        "The cheapest asks fill first"
+    assert food_market.price == 7 and food_market.lots == 3, "Halfway between 8 and 6"
+    assert civs["Cyprus"].resources.food == food - 20
+    assert cleared["tin"].fills["Mycenaean Greece"] == -min(tin // 10, (gold - 3 * 8) // 40), \
+        "Orders are trimmed to holdings, buyers' gold counted at their limits"
+    assert cleared["copper"].price is None and cleared["copper"].best_ask == 30
+    
+    assert game.place_order("tin", "sell", 2, 15).success
+    assert not game.place_order("gold", "sell", 1, 15).success, "Gold is the currency"
+    assert not game.place_order("food", "buy", 10 ** 6, 5).success, "Buyers need the gold"
+    
+    # The AIs bid for what they lack every turn; a granary sells to them
+    def play():
+        traders = Game(seed=6)
+        traders.set_player("Ugarit")
+        traders.ai_policy = TraderPolicy()
+        traders.player_civ.resources.food = 2000
+        results = []
+        for _ in range(12):
+            traders.place_order("food", "sell", 10, 5)
+            results.append(traders.resolve_turn())
+        return traders, results
+    traders, results = play()
+    assert all(result.market["food"].best_bid for result in results), "Hungry AIs bid for food"
+    assert any(result.market["food"].fills.get("Ugarit") for result in results), "and buy it"
+    assert not traders.market_orders, "Orders are cleared every turn"
+    assert play()[0].snapshot() == traders.snapshot()
+    
+    print("✓ Market test passed")
+
+
+def test_actions():
+    """Test typed actions and batch application"""
+    from lbac_actions import (
+        ACTION_TYPES, SendGift, Recruit, Raid, QueueRaid, TradeResources, Invest,
+        HoldFestival, PlaceOrder, action_from_dict, apply_batch, play_turn
+    )
+    print("Testing Typed Actions...")
+    
+    orders = [
+        SendGift("Cyprus"),
+        Recruit("archers", 2, civ="Assyria"),
+        HoldFestival(civ="Cyprus"),
+        QueueRaid("Cyprus"),
+        PlaceOrder("tin", "sell", 1, 20, civ="Hittite Empire"),
+        Invest("technology", civ="New Kingdom Egypt"),
+    ]
+    batched = Game(seed=9)
+    batched.set_player("Ugarit")
+    direct = batched.fork()
+    results, turn = play_turn(batched, orders)
+    assert all(result.success for result in results)
+    civs = direct.civilizations
+    direct.send_gift("Cyprus")
+    direct.recruit("archers", 2, civ=civs["Assyria"])
+    direct.hold_festival(civ=civs["Cyprus"])
+    direct.queue_raid("Cyprus")
+    direct.place_order("tin", "sell", 1, 20, civ=civs["Hittite Empire"])
+    direct.invest("technology", civ=civs["New Kingdom Egypt"])
+    direct.resolve_turn()
+    assert batched.snapshot() == direct.snapshot(), "A batch is the rule calls in order"
+    assert len(turn.raids) == 1
+    
+    invalid = [Raid("Mycenaean Greece"), TradeResources(9), Invest("temples"),
+               Recruit("elephants", 1), SendGift("Atlantis"), SendGift("Ugarit"),
+               HoldFestival(civ="Atlantis")]
+    before = batched.snapshot()
+    results = apply_batch(batched, invalid)
+    assert not any(result.success for result in results), "Invalid orders are skipped"
+    assert batched.snapshot() == before, "and change nothing"
+    assert results[0].message == "Mycenaean Greece is out of reach!"
+    
+    for action in orders:
+        assert action_from_dict(action.to_dict()) == action, "Actions round-trip as dicts"
+    assert {"send_gift", "resolve_raid", "declare_war", "invest"} <= set(ACTION_TYPES)
+    try:
+        action_from_dict({"action": "recruit", "unit": "infantry"})
+        assert False, "Missing arguments are rejected"
+    except ValueError:
+        pass
+    
+    print("✓ Typed actions test passed")
+
+
+def test_vector_env():
+    """Test the vectorized RL environment"""
+    from lbac_env import VectorEnv, OBS_FIELDS
+    print("Testing Vector Environment...")
+    
+    env = VectorEnv(5, seed=3, max_turns=6)
+    observations = env.reset()
+    assert len(observations) == 5 * env.observation_size
+    assert env.observation_size == len(OBS_FIELDS) + len(env.civ_names)
+    assert env.actions[0] is None and env.action_count == len(env.actions)
+    
+    rng = random.Random(1)
+    actions = [[rng.randrange(env.action_count) for _ in range(5)] for _ in range(14)]
+    history = []
+    for step in actions:
+        obs, rewards, dones = env.step(step)
+        assert obs is observations, "Buffers are reused in place"
+        history.append((obs.tobytes(), rewards.tobytes(), bytes(dones)))
+    assert any(done for _, _, dones in history for done in dones), "Games end at max_turns"
+    assert sum(env.episodes) > 5, "and are replaced by fresh episodes"
+    
+    again = VectorEnv(5, seed=3, max_turns=6)
+    again.reset()
+    assert [(o.tobytes(), r.tobytes(), bytes(d))
+            for o, r, d in map(again.step, actions)] == history, "Runs are reproducible"
+    
+    with VectorEnv(5, seed=3, max_turns=6, workers=2) as sharded:
+        sharded.reset()
+        for step, expected in zip(actions, history):
+            obs, rewards, dones = sharded.step(step)
+            assert (obs.tobytes(), rewards.tobytes(), bytes(dones)) == expected, \
+                "Worker processes give the same results"
+        for bad in ([0, 0, -1, 0, 0], [0, 0, 0, 0, sharded.action_count]):
+            for vector in (sharded, again):
+                try:
+                    vector.step(bad)
+                    assert False, "Out-of-range action indices are rejected"
+                except ValueError:
+                    pass
+    
+    print("✓ Vector environment test passed")
+
+
+def test_legal_masks():
+    """Test legal-action masks against trying every action"""
+    from lbac_legal import TARGETED_KINDS, legal_mask
+    from lbac_env import VectorEnv
+    print("Testing Legal-Action Masks...")
+    
+    def refused(result):
+        # Only the rules' checks count: a declined alliance was still legal
+        return not getattr(result, "success", True) and "declines" not in result.message
+    
+    rng = random.Random(4)
+    for seed in range(6):
+        game = Game(seed=seed)
+        game.set_player("Ugarit")
+        for civ in game.civilizations.values():
+            civ.resources.gold = rng.randrange(0, 80)
+            civ.resources.bronze = rng.randrange(0, 80)
+            civ.resources.food = rng.randrange(-5, 40)
+            for other in game.civilizations:
+                if other != civ.name:
+                    civ.relationships[other] = rng.randrange(-100, 101)
+        game.civilizations["Cyprus"].is_alive = seed % 2 == 0
+        mask = legal_mask(game, recruit_amount=3)
+        for name in game.civilizations:
+            actions = [kind(target, civ=name) for kind in TARGETED_KINDS
+                       for target in game.civilizations]
+            actions += [type(action)(*action.args(), civ=name) for action in mask.own]
+            for action in actions:
+                trial = game.fork()
+                legal = action.validate(trial) is None and not refused(action.apply(trial))
+                assert mask.allows(action) == legal, f"{action} legal={legal}"
+    
+    from lbac_actions import Raid
+    assert legal_mask(game).targets("Assyria", Raid) == ["Ugarit"]
+    assert len(mask.row("Ugarit")) == len(TARGETED_KINDS) * 6 + len(mask.own)
+    game.game_over = True
+    assert not any(legal_mask(game).row("Ugarit")), "Nothing is legal once the game is over"
+    
+    env = VectorEnv(3, seed=2, masks=True)
+    env.reset()
+    for i, game in enumerate(env.games):
+        for index, action in enumerate(env.actions):
+            legal = action is None or legal_mask(game, 5).allows(action)
+            assert env.legal[i * env.action_count + index] == legal
+    with VectorEnv(3, seed=2, masks=True, workers=2) as sharded:
+        sharded.reset()
+        assert bytes(sharded.legal) == bytes(env.legal), "Workers fill the same masks"
+    
+    print("✓ Legal-action masks test passed")
+
+
+def test_game_reset_and_pool():
+    """Test resetting games in place and recycling them through a pool"""
+    from lbac_game import GamePool, PassivePolicy
+    print("Testing Game Reset and Pool...")
+    
+    game = Game(seed=1)
+    game.set_player("Ugarit")
+    game.declare_war("Cyprus")
+    game.place_order("food", "sell", 1, 5)
+    game.ai_policies["Assyria"] = PassivePolicy()
+    game.simulate(15)
+    for seed in (2, 2, 99):
+        game.reset(seed)
+        fresh = Game(seed=seed)
+        assert game.snapshot() == fresh.snapshot(), "A reset game is a new game"
+        assert game.player_civ is None and not game.wars and not game.ai_policies
+        game.set_player("Ugarit")
+        fresh.set_player("Ugarit")
+        game.simulate(20)
+        fresh.simulate(20)
+        assert game.snapshot() == fresh.snapshot(), "and plays out like one"
+    
+    from lbac_bench import build_world
+    grown = build_world(12)
+    grown.reset(5)
+    assert grown.snapshot() == Game(seed=5).snapshot(), "Changed worlds are rebuilt"
+    
+    pool = GamePool()
+    first = pool.acquire(7)
+    pool.release(first)
+    second = pool.acquire(8)
+    assert second is first and (pool.created, pool.reused) == (1, 1)
+    assert second.snapshot() == Game(seed=8).snapshot()
+    assert pool.acquire(9) is not second, "Games in use are not handed out twice"
+    
+    print("✓ Game reset and pool test passed")
+
+
+def test_lockstep_multiplayer():
+    """Test lockstep multiplayer: late joiners, hashes and resyncs"""
+    import asyncio
+    from lbac_actions import SendGift, Recruit, QueueRaid, Invest
+    from lbac_lockstep import (LockstepHost, LockstepPeer, LockstepError, parse_command,
+                               delta_encode, delta_decode)
+    print("Testing Lockstep Multiplayer...")
+    
+    assert parse_command("send_gift New Kingdom Egypt") == SendGift("New Kingdom Egypt")
+    assert parse_command("recruit archers 5") == Recruit("archers", 5)
+    base, current = bytes(range(200)), bytes(range(200))[:150] + b"changed" + bytes(60)
+    assert delta_decode(base, delta_encode(base, current)) == current
+    
+    async def scenario():
+        host = LockstepHost(7, max_turns=20, hash_interval=2)
+        listener = await host.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        alice = await LockstepPeer.connect(port=port)
+        await alice.join("Ugarit", "alice")
+        for _ in range(3):
+            await alice.end_turn([SendGift("Cyprus"), Recruit("archers", 1)])
+        
+        bob = await LockstepPeer.connect(port=port)
+        await bob.join("Assyria", "bob")
+        assert bob.sim.game.snapshot() == host.sim.game.snapshot(), "Late joiners get the state"
+        for _ in range(4):
+            await asyncio.gather(alice.end_turn([QueueRaid("Cyprus")]),
+                                 bob.end_turn([Invest("technology"), SendGift("Ugarit")]))
+        assert set(host.sim.humans) == {"Ugarit", "Assyria"}
+        assert not host.desyncs
+        
+        alice.sim.game.civilizations["Ugarit"].resources.gold += 1
+        for _ in range(3):
+            await asyncio.gather(alice.end_turn(), bob.end_turn())
+        assert host.desyncs == [(8, "Ugarit")] and alice.resyncs == 1, "Desyncs are caught"
+        reference = host.sim.game.snapshot()
+        assert alice.sim.game.snapshot() == reference == bob.sim.game.snapshot(), \
+            "and repaired"
+        host.check_hash("Ugarit", {"turn": 2, "hash": "stale"})
+        await asyncio.gather(alice.end_turn(), bob.end_turn())
+        assert alice.resyncs == 2, "A mismatch for an older turn resyncs too"
+        assert alice.sim.game.snapshot() == host.sim.game.snapshot()
+        assert max(host.turn_bytes) < 400, "Turns carry actions, not state"
+        
+        await alice.close()
+        await bob.close()
+        listener.close()
+        await listener.wait_closed()
+    
+    async def unhashed():
+        host = LockstepHost(7, max_turns=3, hash_interval=0)
+        listener = await host.start(port=0)
+        carol = await LockstepPeer.connect(port=listener.sockets[0].getsockname()[1])
+        await carol.join("Cyprus", "carol")
+        for _ in range(3):
+            await carol.end_turn()
+        assert not host.hashes, "A hash interval of 0 turns the checks off"
+        assert carol.sim.game_over
+        try:
+            await carol.end_turn()
+            assert False, "No turns are committed after the game is over"
+        except LockstepError:
+            pass
+        assert host.sim.turn == 4
+        await carol.close()
+        listener.close()
+        await listener.wait_closed()
+    
+    asyncio.run(scenario())
+    asyncio.run(unhashed())
+    print("✓ Lockstep multiplayer test passed")
+
+
 def run_all_tests():
     """Run all tests"""
     print("="*70)
@@ -166,6 +1277,30 @@ def run_all_tests():
         test_game_initialization()
         test_relationship_mechanics()
         test_resource_consumption()
+        test_headless_simulation()
+        test_batch_world_matches_scalar()
+        test_monte_carlo_runner()
+        test_seeded_games()
+        test_benchmark_suite()
+        test_relationship_matrix()
+        test_compact_objects()
+        test_snapshot_fork_restore()
+        test_ai_policies()
+        test_random_events()
+        test_journal_replay()
+        test_game_server()
+        test_renderers()
+        test_phase_profiler()
+        test_telemetry()
+        test_balance_params()
+        test_battles()
+        test_world_map()
+        test_market()
+        test_actions()
+        test_vector_env()
+        test_legal_masks()
+        test_game_reset_and_pool()
+        test_lockstep_multiplayer()
         
         print()
         print("="*70)